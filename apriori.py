@@ -4,7 +4,14 @@ Use class `AssociationRuleMining` to generate association rules,
 see test section for code example.
 """
 
-from encoder import StringToIntegerEncoder, ListToIntegerEncoder
+from budget import MiningCheckpoint
+from constraint import ItemConstraint
+from encoder import EncodedTransactions, StringToIntegerEncoder, ListToIntegerEncoder, ItemsetView
+from frozen import FrozenModel
+from itemset_trie import ItemsetTrie
+from lossy_counting import LossyCounter
+from measure import RULE_BATCH_SIZE, attach_measures, generate_rules, iter_rules, split_itemset
+from support_cache import SupportCache
 
 class AssociationRuleMining:
     """Generate association rule with Apriori algorithm.
@@ -13,39 +20,140 @@ class AssociationRuleMining:
     thus speed up association rule generation.
     """
 
-    def __init__(self, transactions=None, min_sup=0.1, min_cof=0.1, max_k=0):
+    def __init__(self, transactions=None, min_sup=0.1, min_cof=0.1, max_k=0,
+                 epsilon=0, verify=True, constraint=None, min_lift=0,
+                 support_cache=None, budget=None, checkpoint=None, taxonomy=None):
         """Initialize settings for association rule mining.
 
         Args:
             transactions （list of list of item):
-                Transaction database.
+                Transaction database, or `EncodedTransactions` to skip encoding.
             min_sup (float):
                 Minimum support for frequent itemset.
             min_cof (float):
                 Minimum confidence for association rule.
             max_k (int):
                 Maximum size for freuent itemset (k-itemset).
+            epsilon (float):
+                If greater than 0, frequent 1-itemset and 2-itemset are counted
+                approximately by `LossyCounter` with support error at most `epsilon`.
+            verify (bool):
+                Recount survivors of approximate counting exactly,
+                result will be the same as exact counting.
+                If not set, survivors may include itemsets with support at least
+                `min_sup - epsilon`, but their support counts are still exact.
+                Only used when `epsilon` is greater than 0.
+            constraint (ItemConstraint):
+                Item and length constraints pushed into mining.
+            min_lift (float):
+                Minimum lift for association rule.
+            support_cache (SupportCache):
+                Cache of support counts, default to an unbounded cache.
+            budget (MiningBudget):
+                If exceeded, mining stops and only completed levels are kept.
+            checkpoint (str):
+                Path of checkpoint file, completed levels are appended to it,
+                and restored from it if it exists.
+            taxonomy (Taxonomy):
+                If given, generalized itemsets over every level of taxonomy are mined (Cumulate).
+
+        Raises:
+            ValueError:
+                If checkpoint is created with different settings.
         """
 
         self.__min_sup = min_sup
         self.__min_cof = min_cof
-        self.__sup_count = {}
+        self.__min_lift = min_lift
+        self.__epsilon = epsilon
+        self.__verify = verify
+        self.__lossy_counter = None
+        self.__sup_count = SupportCache() if support_cache is None else support_cache
         self.__frequent_k_itemset = {}
         self.__association_rules = []
+        self.__trie = None
+        self.__rule_measures = {}
         self.__item_encoder = StringToIntegerEncoder()
         self.__itemset_encoder = ListToIntegerEncoder()
         self.__transactions = transactions
 
-        # Encode transactions to speed up calculation.
-        self.__encoded_transactions = (self
-                                       .__item_encoder
-                                       .encode_from_list_of_string_list(transactions))
+        # Encode transactions to speed up calculation,
+        # identical transactions are collapsed and paired with their count.
+        # Transactions already encoded (such as by ingestion) are adopted as they are.
+        if isinstance(transactions, EncodedTransactions):
+            self.__item_encoder = transactions.item_encoder()
+            self.__encoded_transactions = transactions.encoded_transactions()
+        else:
+            self.__encoded_transactions = (self
+                                           .__item_encoder
+                                           .encode_from_list_of_string_list_with_count(transactions))
         self.__n_transactions = len(transactions)
+
+        # Extend transactions with all ancestors for exact support count of any itemset,
+        # but only frequent ancestors can take part in frequent itemsets.
+        self.__encoded_taxonomy = None
+        level_transactions = self.__encoded_transactions
+        if taxonomy is not None:
+            self.__encoded_taxonomy = taxonomy.encode(self.__item_encoder)
+            frequent_ancestors = {ancestor for ancestor, count
+                                  in (self.__encoded_taxonomy
+                                      .count_ancestors(self.__encoded_transactions)
+                                      .items())
+                                  if count / self.__n_transactions >= self.__min_sup}
+            level_transactions = self.__encoded_taxonomy.extend(self.__encoded_transactions,
+                                                                frequent_ancestors)
+            self.__encoded_transactions = self.__encoded_taxonomy.extend(self.__encoded_transactions)
+
+        # Push item constraints into mining by projecting transactions.
+        self.__constraint = constraint or ItemConstraint()
+        self.__encoded_constraint = self.__constraint.encode(self.__item_encoder)
+
+        # Projected transactions trimmed between levels, only used to count candidates.
+        self.__level_transactions = self.__encoded_constraint.project(level_transactions)
+        self.__level_size = sum(len(transaction) for transaction, _ in self.__level_transactions)
+        self.__item_volume = {}
+        for transaction, _ in self.__level_transactions:
+            for item in transaction:
+                self.__item_volume[item] = self.__item_volume.get(item, 0) + 1
+        self.__level_items = set(self.__item_volume)
+
+        # Items counted by ingestion are reused if transactions are not projected.
+        self.__item_count = None
+        if (isinstance(transactions, EncodedTransactions)
+                and self.__level_transactions is self.__encoded_transactions):
+            self.__item_count = transactions.item_count()
+
         self.__max_k = max_k
         if self.__max_k <= 0:
-            for transaction in self.__transactions:
+            for transaction, _ in self.__encoded_transactions:
                 if self.__max_k < len(transaction):
                     self.__max_k = len(transaction)
+            # Itemsets of ancestors can be longer than original transactions.
+            if self.__encoded_taxonomy is not None:
+                for transaction, _ in self.__level_transactions:
+                    if self.__max_k < len(transaction):
+                        self.__max_k = len(transaction)
+
+        # Stop mining if budget is exceeded, and resume completed levels from checkpoint.
+        self.__budget = budget
+        self.__partial = False
+        self.__checkpoint = None
+        if checkpoint is not None:
+            settings = {
+                'engine': 'apriori',
+                'min_sup': min_sup,
+                'max_k': self.__max_k,
+                'epsilon': epsilon,
+                'verify': verify,
+                'n_transactions': self.__n_transactions,
+                'n_item_occurrences': sum(len(transaction) * count
+                                          for transaction, count in self.__encoded_transactions),
+                'constraint': self.__constraint.settings(),
+            }
+            if taxonomy is not None:
+                settings['taxonomy'] = taxonomy.settings()
+            self.__checkpoint = MiningCheckpoint(checkpoint, settings)
+            self.__restore_checkpoint()
 
     @staticmethod
     def __join(itemset_1, itemset_2):
@@ -62,43 +170,6 @@ class AssociationRuleMining:
         join_itemset.sort()
         return join_itemset
 
-    @staticmethod
-    def __split_itemset(itemset):
-        """All possible way of spliting itemset into two smaller itemset.
-
-        Same problem as 2 equivalent class,
-        number of possible combination is Stiring number of second kind S(k, 2).
-        This method is intended to be private.
-
-        Args:
-            itemset (list of item):
-                Target itemset to be splited.
-
-        Returns:
-            list of tuple of list of itemset:
-                All possible combination of two smaller itemset.
-        """
-
-        # Recursive end condition.
-        if len(itemset) == 2:
-            return [([itemset[0]], [itemset[1]])]
-
-        all_split = []
-
-        # First way to split: 1-itemset & k-1-items
-        all_split.append(([itemset[0]], itemset[1:]))
-        for front, back in AssociationRuleMining.__split_itemset(itemset[1:]):
-            # Second way to split: 1-itemset + k-n-1-itemset & n-itemset
-            # Keep order by put 1-itemset at front.
-            new_split1 = ([itemset[0]]+front, back)
-
-            # Third way to split: k-n-1-itemset & 1-itemset + n-itemset
-            # Keep order by put 1-itemset at front.
-            new_split2 = (front, [itemset[0]]+back)
-            all_split.append(new_split1)
-            all_split.append(new_split2)
-        return all_split
-
     def support_count(self, itemset):
         """Support count for the itemset.
 
@@ -117,24 +188,29 @@ class AssociationRuleMining:
                 Support count for the given itemset.
         """
 
-        # Encode items in itemset.
-        itemset = self.__item_encoder.encode_from_string_list(itemset)
+        # Encode items in itemset without growing encoder,
+        # item never seen before is in no transaction.
+        itemset = self.__item_encoder.lookup_string_list(itemset)
+        if itemset is None:
+            return 0
 
-        # Encode itemset.
-        encoded_itemset = self.__itemset_encoder.encode_from_list(itemset)
+        # Sorted items are the key of support count cache, so evicted keys are freed.
+        key = tuple(itemset)
 
         # If already calculated before, skip the calculation process.
-        if encoded_itemset in self.__sup_count:
+        sup_count = self.__sup_count.get(key)
+        if sup_count is not None:
             pass
         # Else enumerate all transactions to do support count.
         else:
-            self.__sup_count[encoded_itemset] = 0
-            for transaction in self.__encoded_transactions:
+            sup_count = 0
+            for transaction, count in self.__encoded_transactions:
                 if all(map(lambda item: item in transaction, itemset)):
-                    self.__sup_count[encoded_itemset] = self.__sup_count[encoded_itemset] + 1
+                    sup_count = sup_count + count
+            self.__sup_count.put(key, sup_count)
 
         # Support count cached result.
-        return self.__sup_count[encoded_itemset]
+        return sup_count
 
     def support(self, itemset):
         """Support for the itemset.
@@ -173,6 +249,197 @@ class AssociationRuleMining:
 
         return self.support_count(itemset_1 + itemset_2) / self.support_count(itemset_1)
 
+    def __approximate_k_itemset(self, k):
+        """Frequent k-itemset with approximate counting, k=1, 2.
+
+        All 1-itemsets and 2-itemsets of projected transactions
+        are counted in a single pass by `LossyCounter`,
+        only survivors are kept (and verified if `verify` is set).
+        Verified support count of survivors containing required items will be cached.
+        Without verification, approximate count is only a lower bound of true count,
+        so it is never cached and `support_count()` counts survivors exactly when queried.
+        This method is intended to be private.
+
+        Args:
+            k (int):
+                size of frequent itemset, must be 1 or 2.
+        """
+
+        transactions = [transaction for transaction, _ in self.__level_transactions]
+        counts = [count for _, count in self.__level_transactions]
+        if not counts:
+            self.__frequent_k_itemset[k] = set()
+            return
+
+        # Minimum support relative to projected transactions,
+        # slightly lowered to avoid rounding error and filtered again after verification.
+        min_sup = self.__min_sup * self.__n_transactions / sum(counts)
+
+        # Count all transactions in one pass.
+        if self.__lossy_counter is None:
+            self.__lossy_counter = LossyCounter(epsilon=self.__epsilon,
+                                                max_k=min(2, self.__max_k))
+            self.__lossy_counter.push_all(transactions, counts)
+
+        if self.__verify:
+            k_itemsets = self.__lossy_counter.verify(transactions, min_sup * (1 - 1e-9), k, counts)
+            k_itemsets = {k_itemset: count
+                          for k_itemset, count in k_itemsets.items()
+                          if count / self.__n_transactions >= self.__min_sup}
+        else:
+            k_itemsets = self.__lossy_counter.frequent_k_itemset(min_sup, k)
+
+        self.__frequent_k_itemset[k] = set()
+        for k_itemset, count in k_itemsets.items():
+            # Keep Apriori property for approximate result.
+            if k == 2 and not all(self.__itemset_encoder.lookup_list([item])
+                                  in self.__frequent_k_itemset[1]
+                                  for item in k_itemset):
+                continue
+            # Item and its own ancestor are never in the same itemset.
+            if (k == 2 and self.__encoded_taxonomy is not None
+                    and self.__encoded_taxonomy.contain_ancestor(k_itemset)):
+                continue
+            encoded_itemset = self.__itemset_encoder.encode_from_list(list(k_itemset))
+            if self.__verify and self.__encoded_constraint.contain_required(k_itemset):
+                self.__sup_count.put(self.__itemset_encoder.decode_to_tuple(encoded_itemset), count, pin=True)
+            self.__frequent_k_itemset[k].add(encoded_itemset)
+
+    def __trim_transactions(self, k, n_candidates):
+        """Trim transactions before counting candidate k-itemsets.
+
+        Items which are not in any frequent k-1-itemset cannot take part in any candidate,
+        and transactions with less than k remaining items cannot contain any candidate.
+        Trimming costs one pass over the current transactions,
+        so it is only done when estimated counting cost saved is larger than that.
+        This method is intended to be private.
+
+        Args:
+            k (int):
+                size of candidate itemset
+            n_candidates (int):
+                Number of candidate k-itemsets to be counted.
+        """
+
+        kept_items = set()
+        for k_1_itemset in self.__frequent_k_itemset[k-1]:
+            kept_items.update(self.__itemset_encoder.decode_to_list(k_1_itemset))
+        kept_items = kept_items & self.__level_items
+
+        # Estimate trimmed size by volume of kept items.
+        level_volume = sum(self.__item_volume[item] for item in self.__level_items)
+        kept_volume = sum(self.__item_volume[item] for item in kept_items)
+        estimated_size = self.__level_size * kept_volume / level_volume if level_volume else 0
+
+        # Counting cost is proportional to number of candidates times size of transactions.
+        if self.__level_size + n_candidates * estimated_size >= n_candidates * self.__level_size:
+            return
+
+        level_transactions = []
+        level_size = 0
+        for transaction, count in self.__level_transactions:
+            transaction = [item for item in transaction if item in kept_items]
+            if len(transaction) >= k:
+                level_transactions.append((transaction, count))
+                level_size = level_size + len(transaction)
+        self.__level_transactions = level_transactions
+        self.__level_size = level_size
+        self.__level_items = kept_items
+
+    def __candidate_support_count(self, itemset):
+        """Support count for candidate itemset with trimmed transactions.
+
+        Trimmed transactions only keep items of frequent itemsets,
+        so count is exact for candidate itemset containing all required items.
+        Count is not cached here, caller pins it if candidate is frequent,
+        so counts of frequent itemsets are never evicted by infrequent candidates.
+        This method is intended to be private.
+
+        Args:
+            itemset (list of int):
+                Encoded candidate itemset.
+
+        Returns:
+            int:
+                Support count for the given itemset.
+        """
+
+        sup_count = 0
+        for transaction, count in self.__level_transactions:
+            if all(map(lambda item: item in transaction, itemset)):
+                sup_count = sup_count + count
+        return sup_count
+
+    def __stop_mining(self):
+        """Whether mining should stop.
+
+        This method is intended to be private.
+
+        Returns:
+            bool:
+                True if budget is exceeded now or before.
+        """
+
+        if not self.__partial and self.__budget is not None and self.__budget.exceeded():
+            self.__partial = True
+        return self.__partial
+
+    def __save_checkpoint(self, k):
+        """Append completed frequent k-itemset to checkpoint.
+
+        Support count is saved only if it is cached.
+        This method is intended to be private.
+
+        Args:
+            k (int):
+                size of completed frequent itemset
+        """
+
+        if self.__checkpoint is None:
+            return
+
+        itemsets = []
+        for encoded_itemset in self.__frequent_k_itemset[k]:
+            itemset = self.__itemset_encoder.decode_to_list(encoded_itemset)
+            itemsets.append([self.__item_encoder.decode_to_string_list(itemset),
+                             self.__sup_count.get(self.__itemset_encoder.decode_to_tuple(encoded_itemset))])
+        self.__checkpoint.append({'k': k, 'itemsets': itemsets})
+
+    def __restore_checkpoint(self):
+        """Restore completed frequent k-itemsets from checkpoint.
+
+        This method is intended to be private.
+        """
+
+        for step in self.__checkpoint.load():
+            self.__frequent_k_itemset[step['k']] = set()
+            for itemset, count in step['itemsets']:
+                itemset = sorted(self.__item_encoder.encode_from_string_list(itemset))
+                encoded_itemset = self.__itemset_encoder.encode_from_list(itemset)
+                self.__frequent_k_itemset[step['k']].add(encoded_itemset)
+                if count is not None:
+                    self.__sup_count.put(self.__itemset_encoder.decode_to_tuple(encoded_itemset), count, pin=True)
+
+    def is_partial(self):
+        """Whether mining is stopped by budget.
+
+        Returns:
+            bool:
+                True if frequent itemsets only contain levels completed before budget is exceeded.
+        """
+
+        return self.__partial
+
+    def support_cache_stats(self):
+        """Statistics of support count cache.
+
+        Returns:
+            dict:
+                See `SupportCache.stats` for keys.
+        """
+
+        return self.__sup_count.stats()
+
     def frequent_k_itemset(self, k=1):
         """Frequent k-itemset of the transactions.
 
@@ -185,7 +452,7 @@ class AssociationRuleMining:
                 size of frequent itemset
 
         Returns:
-            list of k-itemset:
+            ItemsetView of k-itemset:
                 Itemsets in list are frequent k-itemset.
 
         Raises:
@@ -202,17 +469,33 @@ class AssociationRuleMining:
         # If already calculated before, skip the calculation process.
         if k in self.__frequent_k_itemset:
             pass
-        # Else if k is 1, directly enumerate frequent 1-itemset.
+        # Else if budget is exceeded, stop mining and keep completed levels only.
+        elif self.__stop_mining():
+            return ItemsetView(self.__item_encoder, [])
+        # Else if approximate counting is used, count 1-itemset and 2-itemset in one pass.
+        elif self.__epsilon > 0 and k <= 2:
+            if k == 2:
+                self.frequent_k_itemset(1)
+                if self.__stop_mining():
+                    return ItemsetView(self.__item_encoder, [])
+            self.__approximate_k_itemset(k)
+            self.__save_checkpoint(k)
+        # Else if k is 1, count all items of projected transactions in one pass.
         elif k == 1:
             self.__frequent_k_itemset[1] = set()
-            for transaction in self.__encoded_transactions:
-                for item in transaction:
-                    one_itemset = [item]
-                    decoded_1_itemset = self.__item_encoder.decode_to_string_list(one_itemset)
-                    if self.support(decoded_1_itemset) >= self.__min_sup:
-                        (self
-                         .__frequent_k_itemset[1]
-                         .add(self.__itemset_encoder.encode_from_list(one_itemset)))
+            item_count = self.__item_count
+            if item_count is None:
+                item_count = {}
+                for transaction, count in self.__level_transactions:
+                    for item in transaction:
+                        item_count[item] = item_count.get(item, 0) + count
+            for item, count in item_count.items():
+                if count / self.__n_transactions >= self.__min_sup:
+                    encoded_itemset = self.__itemset_encoder.encode_from_list([item])
+                    if self.__encoded_constraint.contain_required([item]):
+                        self.__sup_count.put(self.__itemset_encoder.decode_to_tuple(encoded_itemset), count, pin=True)
+                    self.__frequent_k_itemset[1].add(encoded_itemset)
+            self.__save_checkpoint(1)
         # Else use Apriori algorithm to generate frequent k-itemset.
         else:
             self.__frequent_k_itemset[k] = set()
@@ -223,7 +506,14 @@ class AssociationRuleMining:
             n_of_k_1_itemset = len(frequent_k_1_itemset)
 
             # Enumerate all possible combination of two frequent k-1-itemsets to form k-itemset.
+            candidates = []
+            encoded_candidates = set()
             for i in range(n_of_k_1_itemset-1):
+                # Drop unfinished level if budget is exceeded.
+                if self.__stop_mining():
+                    del self.__frequent_k_itemset[k]
+                    return ItemsetView(self.__item_encoder, [])
+
                 k_1_itemset_1 = self.__itemset_encoder.decode_to_list(frequent_k_1_itemset[i])
                 for j in range(i+1, n_of_k_1_itemset):
                     k_1_itemset_2 = self.__itemset_encoder.decode_to_list(frequent_k_1_itemset[j])
@@ -235,23 +525,45 @@ class AssociationRuleMining:
                     # Join two frequent k-1-itemsets to form k-itemset.
                     candidate_k_itemset = AssociationRuleMining.__join(k_1_itemset_1, k_1_itemset_2)
 
-                    # Decode items in itemset because support function need items to be decoded.
-                    decoded_candidate_k_itemset = (self
-                                                   .__item_encoder
-                                                   .decode_to_string_list(candidate_k_itemset))
-
-                    # If itemset satisfying minimum support, then it's a frequent itemset.
-                    if self.support(decoded_candidate_k_itemset) >= self.__min_sup:
-                        # Encode itemset to minimize memory usage.
-                        (self
-                         .__frequent_k_itemset[k]
-                         .add(self.__itemset_encoder.encode_from_list(candidate_k_itemset)))
-
-        # Frequent k-itemset cached result.
-        return [self
-                .__item_encoder
-                .decode_to_string_list(self.__itemset_encoder.decode_to_list(k_itemset))
-                for k_itemset in self.__frequent_k_itemset[k]]
+                    # Prune candidate containing an item and its own ancestor,
+                    # its support is the same as the candidate without the ancestor.
+                    if (self.__encoded_taxonomy is not None
+                            and self.__encoded_taxonomy.contain_ancestor(candidate_k_itemset)):
+                        continue
+                    # Only frequent itemsets are encoded, candidates are compared by tuple.
+                    candidate_key = tuple(candidate_k_itemset)
+                    if candidate_key not in encoded_candidates:
+                        encoded_candidates.add(candidate_key)
+                        candidates.append(candidate_k_itemset)
+
+            # Drop useless items and transactions if it makes counting cheaper.
+            self.__trim_transactions(k, len(candidates))
+
+            for candidate_k_itemset in candidates:
+                # Drop unfinished level if budget is exceeded.
+                if self.__stop_mining():
+                    del self.__frequent_k_itemset[k]
+                    return ItemsetView(self.__item_encoder, [])
+
+                # If itemset satisfying minimum support, then it's a frequent itemset.
+                count = self.__candidate_support_count(candidate_k_itemset)
+                if count / self.__n_transactions >= self.__min_sup:
+                    # Encode itemset to minimize memory usage.
+                    encoded_itemset = self.__itemset_encoder.encode_from_list(candidate_k_itemset)
+                    self.__frequent_k_itemset[k].add(encoded_itemset)
+                    # Support count of frequent itemset is never evicted,
+                    # count is exact only if itemset contains all required items.
+                    if self.__encoded_constraint.contain_required(candidate_k_itemset):
+                        self.__sup_count.put(self.__itemset_encoder.decode_to_tuple(encoded_itemset), count, pin=True)
+            self.__save_checkpoint(k)
+
+        # Frequent k-itemset cached result, only itemsets satisfying constraint are shown.
+        f_itemset = []
+        for k_itemset in self.__frequent_k_itemset[k]:
+            k_itemset = self.__itemset_encoder.decode_to_tuple(k_itemset)
+            if self.__encoded_constraint.satisfy(k_itemset):
+                f_itemset.append(k_itemset)
+        return ItemsetView(self.__item_encoder, f_itemset)
 
     def frequent_itemset(self, len_descend=True):
         """Frequent itemset of the transactions.
@@ -264,53 +576,117 @@ class AssociationRuleMining:
                 Show frequent itemset list in descend length order.
 
         Returns:
-            list of frequent itemset:
+            ItemsetView of frequent itemset:
                 All frequent itemsets of the transactions.
         """
 
         f_itemset = []
         for k in range(self.__max_k):
-            f_itemset = f_itemset + self.frequent_k_itemset(k+1)
+            f_itemset.extend(self.frequent_k_itemset(k+1).encoded())
         f_itemset.sort(key=len, reverse=len_descend)
-        return f_itemset
+        return ItemsetView(self.__item_encoder, f_itemset)
 
-    def association_rules(self):
+    def association_rules(self, measures=False):
         """List all association rules of the transactions.
 
         Split frequent itemset into two part, and calculate confidence.
         Number of possible conbination of split is Stiring number of second kind.
+        Measures of all rules are calculated in bulk from cached support counts,
+        and rules with lift smaller than `min_lift` are never generated.
+
+        Args:
+            measures (bool):
+                Also return interestingness measures of each rule.
 
         Returns:
             list of dict:
                 Each dict has two keys,
                 'condition' stands occurence of itemset,
                 'prediction' stands cooccurence itemset.
+                If `measures` is set, each dict also has keys in `measure.MEASURES`.
         """
 
         # If already calculated before, skip the calculation process.
         if self.__association_rules:
             pass
-        # Else enumerate frequent itemset, split into two part and calculate confidence.
+        # Else enumerate frequent itemset, split into two part and calculate measures.
         else:
-            for f_itemset in self.frequent_itemset():
-                if len(f_itemset) >= 2:
-                    for front, back in AssociationRuleMining.__split_itemset(f_itemset):
-                        # If front -> back satisfying minimum confidence,
-                        # then it's an association rule.
-                        if self.confidence(front, back) >= self.__min_cof:
-                            (self
-                             .__association_rules
-                             .append({'condition': front, 'prediction': back}))
-                        # If back -> front satisfying minimum confidence,
-                        # then it's an association rule.
-                        if self.confidence(back, front) >= self.__min_cof:
-                            (self
-                             .__association_rules
-                             .append({'condition': back, 'prediction': front}))
+            self.__association_rules, self.__rule_measures = generate_rules(
+                self.trie(),
+                split_itemset,
+                self.support_count,
+                self.__constraint.allow_rule,
+                self.__n_transactions,
+                self.__min_cof,
+                self.__min_lift)
+
+        if measures:
+            return attach_measures(self.__association_rules, self.__rule_measures)
 
         # Association rule cached result.
         return self.__association_rules
 
+    def iter_association_rules(self, batch_size=RULE_BATCH_SIZE):
+        """Stream association rules with their measures.
+
+        Rules are generated batch by batch and are not cached,
+        so memory does not grow with number of rules.
+
+        Args:
+            batch_size (int):
+                Number of candidate rules measured together.
+
+        Yields:
+            dict:
+                Association rule as in `association_rules(measures=True)`.
+        """
+
+        for rules, measures in iter_rules(
+                self.trie(),
+                split_itemset,
+                self.support_count,
+                self.__constraint.allow_rule,
+                self.__n_transactions,
+                self.__min_cof,
+                self.__min_lift,
+                batch_size):
+            yield from attach_measures(rules, measures)
+
+    def trie(self):
+        """Frequent itemsets with support counts in a prefix trie.
+
+        Built once from `frequent_itemset()`, and shared by rule generation and `freeze()`.
+
+        Returns:
+            ItemsetTrie:
+                Trie for support, subset and superset queries of frequent itemsets.
+        """
+
+        # If already built before, skip the building process.
+        if self.__trie is None:
+            self.__trie = ItemsetTrie([(f_itemset, self.support_count(f_itemset))
+                                       for f_itemset in self.frequent_itemset()])
+
+        # Trie cached result.
+        return self.__trie
+
+    def freeze(self):
+        """Immutable model of mining result for concurrent queries.
+
+        Queries of frozen model never mutate caches or encoders,
+        so one frozen model can be shared by many threads.
+        Later changes of this object are not reflected in frozen model.
+
+        Returns:
+            FrozenModel:
+                Frequent itemsets, supports and association rules.
+        """
+
+        return FrozenModel(self.trie(),
+                           self.association_rules(measures=True),
+                           self.__n_transactions,
+                           self.support_count)
+
 # Test section.
 if __name__ == '__main__':
     import json
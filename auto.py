@@ -0,0 +1,385 @@
+"""Module for association rules generation.
+
+Use class `AssociationRuleMining` to generate association rules
+with engine chosen by dataset statistics,
+see test section for code example.
+"""
+
+import apriori
+import brutal_force
+import eclat
+import fp_growth
+from encoder import EncodedTransactions
+from measure import RULE_BATCH_SIZE
+
+ENGINES = {
+    'brutal_force': brutal_force.AssociationRuleMining,
+    'apriori': apriori.AssociationRuleMining,
+    'eclat': eclat.AssociationRuleMining,
+    'fp_growth': fp_growth.AssociationRuleMining,
+}
+
+class AssociationRuleMining:
+    """Generate association rule with automatically selected engine.
+
+    Transactions are profiled before mining, then mining is dispatched to
+    horizontal (Apriori), vertical (Eclat) or tree (FP-Growth) representation.
+    Brutal force is only used when asked explicitly.
+    """
+
+    # Maximum memory (in bytes) of vertical bitsets.
+    MAX_VERTICAL_BYTES = 256 * 1024 * 1024
+
+    # Density above which fp tree compresses transactions well.
+    MIN_TREE_DENSITY = 0.1
+
+    def __init__(self, transactions=None, min_sup=0.1, min_cof=0.1, max_k=0,
+                 engine=None, n_jobs=1, constraint=None, min_lift=0,
+                 support_cache=None, taxonomy=None):
+        """Initialize settings for association rule mining.
+
+        Args:
+            transactions （list of list of item):
+                Transaction database, or `EncodedTransactions` to skip encoding.
+            min_sup (float):
+                Minimum support for frequent itemset.
+            min_cof (float):
+                Minimum confidence for association rule.
+            max_k (int):
+                Maximum size for freuent itemset (k-itemset).
+            engine (str):
+                Override selected engine, must be a key of `ENGINES`.
+            n_jobs (int):
+                Number of processes, only used by Eclat and FP-Growth.
+            constraint (ItemConstraint):
+                Item and length constraints pushed into mining.
+            min_lift (float):
+                Minimum lift for association rule.
+            support_cache (SupportCache):
+                Cache of support counts, default to an unbounded cache.
+            taxonomy (Taxonomy):
+                If given, generalized itemsets over every level of taxonomy are mined,
+                only supported by Apriori.
+
+        Raises:
+            ValueError:
+                If engine is unknown, or taxonomy is given to engine other than Apriori.
+        """
+
+        if engine is not None and engine not in ENGINES:
+            raise ValueError('engine should be one of {}.'.format(', '.join(ENGINES)))
+        if taxonomy is not None and engine not in (None, 'apriori'):
+            raise ValueError('taxonomy is only supported by apriori.')
+
+        self.__profile = AssociationRuleMining.__profile_transactions(transactions, min_sup)
+
+        if engine is not None:
+            self.__engine_name = engine
+            self.__reason = 'engine is given by caller.'
+        elif taxonomy is not None:
+            self.__engine_name = 'apriori'
+            self.__reason = 'taxonomy is given, only Apriori mines generalized itemsets (Cumulate).'
+        else:
+            self.__engine_name, self.__reason = self.__select_engine(n_jobs)
+
+        if self.__engine_name in ('fp_growth', 'eclat'):
+            self.__engine = ENGINES[self.__engine_name](transactions=transactions,
+                                                        min_sup=min_sup,
+                                                        min_cof=min_cof,
+                                                        max_k=max_k,
+                                                        n_jobs=n_jobs,
+                                                        constraint=constraint,
+                                                        min_lift=min_lift,
+                                                        support_cache=support_cache)
+        elif self.__engine_name == 'apriori':
+            self.__engine = ENGINES[self.__engine_name](transactions=transactions,
+                                                        min_sup=min_sup,
+                                                        min_cof=min_cof,
+                                                        max_k=max_k,
+                                                        constraint=constraint,
+                                                        min_lift=min_lift,
+                                                        support_cache=support_cache,
+                                                        taxonomy=taxonomy)
+        else:
+            self.__engine = ENGINES[self.__engine_name](transactions=transactions,
+                                                        min_sup=min_sup,
+                                                        min_cof=min_cof,
+                                                        max_k=max_k,
+                                                        constraint=constraint,
+                                                        min_lift=min_lift,
+                                                        support_cache=support_cache)
+
+    @staticmethod
+    def __profile_transactions(transactions, min_sup):
+        """Statistics of transactions.
+
+        This method is intended to be private.
+
+        Args:
+            transactions （list of list of item):
+                Transaction database, or `EncodedTransactions`.
+            min_sup (float):
+                Minimum support for frequent itemset.
+
+        Returns:
+            dict:
+                'n_transactions', 'n_unique_transactions', 'n_items',
+                'avg_transaction_length', 'max_transaction_length',
+                'density' (average transaction length over number of items),
+                and 'n_frequent_items' (number of frequent 1-itemsets).
+        """
+
+        item_count = {}
+        unique_transactions = set()
+        n_item_occurrences = 0
+        max_transaction_length = 0
+        # Encoded transactions are already collapsed, profile them without decoding.
+        if isinstance(transactions, EncodedTransactions):
+            for transaction, count in transactions.encoded_transactions():
+                unique_transactions.add(tuple(transaction))
+                n_item_occurrences = n_item_occurrences + len(transaction) * count
+                max_transaction_length = max(max_transaction_length, len(transaction))
+                for item in transaction:
+                    item_count[item] = item_count.get(item, 0) + count
+        else:
+            for transaction in transactions:
+                unique_transactions.add(tuple(sorted(transaction)))
+                n_item_occurrences = n_item_occurrences + len(transaction)
+                max_transaction_length = max(max_transaction_length, len(transaction))
+                for item in transaction:
+                    item_count[item] = item_count.get(item, 0) + 1
+
+        n_transactions = len(transactions)
+        avg_transaction_length = n_item_occurrences / n_transactions if n_transactions else 0
+        return {
+            'n_transactions': n_transactions,
+            'n_unique_transactions': len(unique_transactions),
+            'n_items': len(item_count),
+            'avg_transaction_length': avg_transaction_length,
+            'max_transaction_length': max_transaction_length,
+            'density': avg_transaction_length / len(item_count) if item_count else 0,
+            'n_frequent_items': sum(1 for count in item_count.values()
+                                    if count / n_transactions >= min_sup),
+        }
+
+    def __select_engine(self, n_jobs):
+        """Select engine by statistics of transactions.
+
+        This method is intended to be private.
+
+        Args:
+            n_jobs (int):
+                Number of processes.
+
+        Returns:
+            tuple of str and str:
+                Engine name and reason of selection.
+        """
+
+        profile = self.__profile
+        vertical_bytes = profile['n_frequent_items'] * profile['n_unique_transactions'] / 8
+
+        if profile['n_frequent_items'] <= 1:
+            return ('apriori',
+                    'at most 1 frequent item, one horizontal pass is enough.')
+        if vertical_bytes <= AssociationRuleMining.MAX_VERTICAL_BYTES:
+            return ('eclat',
+                    'bitsets of {} frequent items over {} unique transactions take {:.0f} bytes.'
+                    .format(profile['n_frequent_items'],
+                            profile['n_unique_transactions'],
+                            vertical_bytes))
+        if n_jobs > 1:
+            return ('fp_growth',
+                    'n_jobs={} and bitsets are too large for parallel Eclat.'.format(n_jobs))
+        if profile['density'] >= AssociationRuleMining.MIN_TREE_DENSITY:
+            return ('fp_growth',
+                    'bitsets are too large, and density {:.4f} is high enough for fp tree.'
+                    .format(profile['density']))
+        return ('apriori',
+                'bitsets are too large, and density {:.4f} is too sparse for fp tree.'
+                .format(profile['density']))
+
+    def profile(self):
+        """Statistics of transactions used to select engine.
+
+        Returns:
+            dict:
+                See `__profile_transactions` for keys.
+        """
+
+        return dict(self.__profile)
+
+    def engine(self):
+        """Name of selected engine.
+
+        Returns:
+            str:
+                Key of `ENGINES`.
+        """
+
+        return self.__engine_name
+
+    def reason(self):
+        """Reason of engine selection.
+
+        Returns:
+            str:
+                Human readable reason.
+        """
+
+        return self.__reason
+
+    def support_count(self, itemset):
+        """Support count for the itemset.
+
+        Args:
+            itemset (list of item):
+                Item cannot be encoded form.
+
+        Returns:
+            int:
+                Support count for the given itemset.
+        """
+
+        return self.__engine.support_count(itemset)
+
+    def support(self, itemset):
+        """Support for the itemset.
+
+        Args:
+            itemset (list of item):
+                Item cannot be encoded form.
+
+        Returns:
+            float:
+                Support for the given itemset.
+        """
+
+        return self.__engine.support(itemset)
+
+    def confidence(self, itemset_1, itemset_2):
+        """Confidence of association rule `itemset_1` -> `itemset_2`.
+
+        Args:
+            itemset_1 (list of item):
+                Denominator of confidence formula.
+            itemset_2 (list of item):
+                Combine with `itemset_1` to form nominator of confidence formula.
+
+        Returns:
+            float:
+                Confidence of the given association rule.
+        """
+
+        return self.__engine.confidence(itemset_1, itemset_2)
+
+    def support_cache_stats(self):
+        """Statistics of support count cache.
+
+        Returns:
+            dict:
+                See `SupportCache.stats` for keys.
+        """
+
+        return self.__engine.support_cache_stats()
+
+    def frequent_k_itemset(self, k=1):
+        """Frequent k-itemset of the transactions.
+
+        Args:
+            k (int):
+                size of frequent itemset
+
+        Returns:
+            ItemsetView of k-itemset:
+                Itemsets in list are frequent k-itemset.
+        """
+
+        return self.__engine.frequent_k_itemset(k)
+
+    def frequent_itemset(self, len_descend=True):
+        """Frequent itemset of the transactions.
+
+        Args:
+            len_descend (bool):
+                Show frequent itemset list in descend length order.
+
+        Returns:
+            ItemsetView of frequent itemset:
+                All frequent itemsets of the transactions.
+        """
+
+        return self.__engine.frequent_itemset(len_descend)
+
+    def association_rules(self, measures=False):
+        """List all association rules of the transactions.
+
+        Args:
+            measures (bool):
+                Also return interestingness measures of each rule.
+
+        Returns:
+            list of dict:
+                Each dict has two keys,
+                'condition' stands occurence of itemset,
+                'prediction' stands cooccurence itemset.
+                If `measures` is set, each dict also has keys in `measure.MEASURES`.
+        """
+
+        return self.__engine.association_rules(measures)
+
+    def iter_association_rules(self, batch_size=RULE_BATCH_SIZE):
+        """Stream association rules with their measures.
+
+        Args:
+            batch_size (int):
+                Number of candidate rules measured together.
+
+        Yields:
+            dict:
+                Association rule as in `association_rules(measures=True)`.
+        """
+
+        yield from self.__engine.iter_association_rules(batch_size)
+
+    def trie(self):
+        """Frequent itemsets with support counts in a prefix trie.
+
+        Returns:
+            ItemsetTrie:
+                Trie for support, subset and superset queries of selected engine.
+        """
+
+        return self.__engine.trie()
+
+    def freeze(self):
+        """Immutable model of mining result for concurrent queries.
+
+        Returns:
+            FrozenModel:
+                Frequent itemsets, supports and association rules of selected engine.
+        """
+
+        return self.__engine.freeze()
+
+# Test section.
+if __name__ == '__main__':
+    import json
+    import os
+    # Load data.
+    DATA_PATH = os.path.dirname(os.path.abspath(__file__)) + '/data'
+    DATA_NAME = '/IBM.json'
+
+    with open(DATA_PATH + DATA_NAME, 'r') as f:
+        # Create instance.
+        ARM = AssociationRuleMining(transactions=json.loads(f.read()),
+                                    min_sup=0.2,
+                                    min_cof=0.5)
+
+        # Print why the engine is selected.
+        print('profile: {}'.format(ARM.profile()))
+        print('engine: {}, reason: {}'.format(ARM.engine(), ARM.reason()))
+
+        # Print support count for all frequent itemsets.
+        for fi in ARM.frequent_itemset():
+            print('support count: {}, itemset: {}'.format(ARM.support_count(fi), fi))
@@ -4,7 +4,15 @@ Use class AssociationRuleMining to generate association rules,
 see test section for code example.
 """
 
-from encoder import StringToIntegerEncoder, ListToIntegerEncoder
+import itertools
+import math
+
+from constraint import ItemConstraint
+from encoder import EncodedTransactions, StringToIntegerEncoder, ListToIntegerEncoder, ItemsetView
+from frozen import FrozenModel
+from itemset_trie import ItemsetTrie
+from measure import RULE_BATCH_SIZE, attach_measures, generate_rules, iter_rules, split_itemset
+from support_cache import SupportCache
 
 class AssociationRuleMining:
     """Use brutal force algorithm to generate association rule.
@@ -13,115 +21,71 @@ class AssociationRuleMining:
     generation process, can be consider as baseline for association rule generation.
     """
 
-    def __init__(self, transactions=None, min_sup=0.1, min_cof=0.1, max_k=0):
+    def __init__(self, transactions=None, min_sup=0.1, min_cof=0.1, max_k=0,
+                 constraint=None, min_lift=0,
+                 support_cache=None, max_subsets=1000000):
         """Initialize settings for association rule mining.
 
         Args:
             transactions （list of list of item):
-                Transaction database.
+                Transaction database, or `EncodedTransactions` to skip encoding.
             min_sup (float):
                 Minimum support for frequent itemset.
             min_cof (float):
                 Minimum confidence for association rule.
             max_k (int):
                 Maximum size for freuent itemset (k-itemset).
+            constraint (ItemConstraint):
+                Item and length constraints pushed into mining.
+            min_lift (float):
+                Minimum lift for association rule.
+            support_cache (SupportCache):
+                Cache of support counts, default to an unbounded cache.
+            max_subsets (int):
+                Maximum number of k-itemsets enumerated in a single transaction,
+                0 for no limit.
         """
 
         self.__min_sup = min_sup
         self.__min_cof = min_cof
-        self.__sup_count = {}
+        self.__min_lift = min_lift
+        self.__max_subsets = max_subsets
+        self.__sup_count = SupportCache() if support_cache is None else support_cache
         self.__frequent_k_itemset = {}
+        # Number of k-itemsets reaching minimum support, constraint is not considered.
+        self.__n_reached = {}
         self.__association_rules = []
+        self.__trie = None
+        self.__rule_measures = {}
         self.__item_encoder = StringToIntegerEncoder()
         self.__itemset_encoder = ListToIntegerEncoder()
         self.__transactions = transactions
 
-        # Encode transactions to speed up calculation.
-        self.__encoded_transactions = (self
-                                       .__item_encoder
-                                       .encode_from_list_of_string_list(transactions))
+        # Encode transactions to speed up calculation,
+        # identical transactions are collapsed and paired with their count.
+        # Transactions already encoded (such as by ingestion) are adopted as they are.
+        if isinstance(transactions, EncodedTransactions):
+            self.__item_encoder = transactions.item_encoder()
+            self.__encoded_transactions = transactions.encoded_transactions()
+        else:
+            self.__encoded_transactions = (self
+                                           .__item_encoder
+                                           .encode_from_list_of_string_list_with_count(transactions))
         self.__n_transactions = len(transactions)
+
+        # Push item constraints into mining by projecting transactions.
+        self.__constraint = constraint or ItemConstraint()
+        self.__encoded_constraint = self.__constraint.encode(self.__item_encoder)
+        self.__mining_transactions = self.__encoded_constraint.project(self.__encoded_transactions)
+
         self.__max_k = max_k
 
         # If max_k is not given or wrong, set to the largest transaction size.
         if self.__max_k <= 0:
-            for transaction in self.__transactions:
+            for transaction, _ in self.__encoded_transactions:
                 if self.__max_k < len(transaction):
                     self.__max_k = len(transaction)
 
-    @staticmethod
-    def __enumerate_k_itemset(transaction, k=0):
-        """Enumerate k-itemset in a transaction.
-
-        Using back tracking algorithm to enumerate all combination of k-itemset.
-        This method is intended to be private.
-
-        Args:
-            transaction (list of item):
-                Target to be enumerated,
-                item can be either encoded or decoded.
-            k (int):
-                Size of itemset.
-
-        Returns:
-            list of k-itemset:
-                All k-itemset will be in list form.
-        """
-
-        all_k_itemset = []
-
-        # Recursive end condition.
-        if k > len(transaction):
-            pass
-        elif k == 1:
-            for item in transaction:
-                all_k_itemset.append([item])
-        else:
-            for i in range(len(transaction)):
-                for k_1_itemset in (AssociationRuleMining
-                                    .__enumerate_k_itemset(transaction[i+1:], k-1)):
-                    k_itemset = [transaction[i]] + k_1_itemset
-                    all_k_itemset.append(k_itemset)
-        return all_k_itemset
-
-    @staticmethod
-    def __split_itemset(itemset):
-        """All possible way of spliting itemset into two smaller itemset.
-
-        Same problem as 2 equivalent class,
-        number of possible combination is Stiring number of second kind S(k, 2).
-        This method is intended to be private.
-
-        Args:
-            itemset (list of item):
-                Target itemset to be splited.
-
-        Returns:
-            list of tuple of list of itemset:
-                All possible combination of two smaller itemset.
-        """
-
-        # Recursive end condition.
-        if len(itemset) == 2:
-            return [([itemset[0]], [itemset[1]])]
-
-        all_split = []
-
-        # First way to split: 1-itemset & k-1-items
-        all_split.append(([itemset[0]], itemset[1:]))
-
-        for front, back in AssociationRuleMining.__split_itemset(itemset[1:]):
-            # Second way to split: 1-itemset + k-n-1-itemset & n-itemset
-            # Keep order by put 1-itemset at front.
-            new_split1 = ([itemset[0]]+front, back)
-
-            # Third way to split: k-n-1-itemset & 1-itemset + n-itemset
-            # Keep order by put 1-itemset at front.
-            new_split2 = (front, [itemset[0]]+back)
-            all_split.append(new_split1)
-            all_split.append(new_split2)
-        return all_split
-
     def support_count(self, itemset):
         """Support count for the itemset.
 
@@ -140,24 +104,29 @@ class AssociationRuleMining:
                 Support count for the given itemset.
         """
 
-        # Encode items in itemset.
-        itemset = self.__item_encoder.encode_from_string_list(itemset)
+        # Encode items in itemset without growing encoder,
+        # item never seen before is in no transaction.
+        itemset = self.__item_encoder.lookup_string_list(itemset)
+        if itemset is None:
+            return 0
 
-        # Encode itemset.
-        encoded_itemset = self.__itemset_encoder.encode_from_list(itemset)
+        # Sorted items are the key of support count cache, so evicted keys are freed.
+        key = tuple(itemset)
 
         # If already calculated before, skip the calculation process.
-        if encoded_itemset in self.__sup_count:
+        sup_count = self.__sup_count.get(key)
+        if sup_count is not None:
             pass
         # Else enumerate all transactions to do support count.
         else:
-            self.__sup_count[encoded_itemset] = 0
-            for transaction in self.__encoded_transactions:
+            sup_count = 0
+            for transaction, count in self.__encoded_transactions:
                 if all(map(lambda item: item in transaction, itemset)):
-                    self.__sup_count[encoded_itemset] = self.__sup_count[encoded_itemset] + 1
+                    sup_count = sup_count + count
+            self.__sup_count.put(key, sup_count)
 
         # Support count cached result.
-        return self.__sup_count[encoded_itemset]
+        return sup_count
 
     def support(self, itemset):
         """Support for the itemset.
@@ -196,6 +165,16 @@ class AssociationRuleMining:
 
         return self.support_count(itemset_1 + itemset_2) / self.support_count(itemset_1)
 
+    def support_cache_stats(self):
+        """Statistics of support count cache.
+
+        Returns:
+            dict:
+                See `SupportCache.stats` for keys.
+        """
+
+        return self.__sup_count.stats()
+
     def frequent_k_itemset(self, k=1):
         """Frequent k-itemset of the transactions.
 
@@ -207,12 +186,13 @@ class AssociationRuleMining:
                 size of frequent itemset
 
         Returns:
-            list of k-itemset:
+            ItemsetView of k-itemset:
                 Itemsets in list are frequent k-itemset.
 
         Raises:
             ValueError:
-                Valid range of k should be 0 < k <= self.max_k.
+                Valid range of k should be 0 < k <= self.max_k,
+                and no transaction should have more than `max_subsets` k-itemsets.
         """
 
         # Validation for k.
@@ -224,26 +204,41 @@ class AssociationRuleMining:
         # If already calculated before, skip the calculation process.
         if k in self.__frequent_k_itemset:
             pass
-        # Else enumerate all k-itemset in each transaction and calculate support.
+        # Else if no (k-1)-itemset reaches minimum support, no k-itemset does either.
+        elif self.__n_reached.get(k-1, 1) == 0:
+            self.__frequent_k_itemset[k] = set()
+            self.__n_reached[k] = 0
+        # Else count all k-itemsets of all transactions in a single pass.
         else:
+            k_itemset_count = {}
+            for transaction, count in self.__mining_transactions:
+                # Refuse to enumerate too many k-itemsets instead of running without limit.
+                if self.__max_subsets and math.comb(len(transaction), k) > self.__max_subsets:
+                    raise ValueError('Transaction with {} items has more than max_subsets={} '
+                                     '{}-itemsets.'.format(len(transaction), self.__max_subsets, k))
+
+                for k_itemset in itertools.combinations(transaction, k):
+                    k_itemset_count[k_itemset] = k_itemset_count.get(k_itemset, 0) + count
+
             self.__frequent_k_itemset[k] = set()
-            for transaction in self.__encoded_transactions:
-                for k_itemset in AssociationRuleMining.__enumerate_k_itemset(transaction, k):
-                    # Decode items in itemset because support function need items to be decoded.
-                    decoded_k_itemset = self.__item_encoder.decode_to_string_list(k_itemset)
-
-                    # If itemset satisfying minimum support, then it's a frequent itemset.
-                    if self.support(decoded_k_itemset) >= self.__min_sup:
-                        # Encode itemset to minimize memory usage.
-                        (self
-                         .__frequent_k_itemset[k]
-                         .add(self.__itemset_encoder.encode_from_list(k_itemset)))
-
-        # Frequent k-itemset cached result.
-        return [self
-                .__item_encoder
-                .decode_to_string_list(self.__itemset_encoder.decode_to_list(k_itemset))
-                for k_itemset in self.__frequent_k_itemset[k]]
+            self.__n_reached[k] = 0
+            for k_itemset, count in k_itemset_count.items():
+                if count / self.__n_transactions < self.__min_sup:
+                    continue
+                self.__n_reached[k] = self.__n_reached[k] + 1
+
+                # If itemset satisfying minimum support and constraint, then it's a frequent itemset.
+                if self.__encoded_constraint.satisfy(k_itemset):
+                    # Encode itemset to minimize memory usage.
+                    encoded_itemset = self.__itemset_encoder.encode_from_list(list(k_itemset))
+                    self.__frequent_k_itemset[k].add(encoded_itemset)
+                    # Support count of frequent itemset is never evicted.
+                    self.__sup_count.put(self.__itemset_encoder.decode_to_tuple(encoded_itemset), count, pin=True)
+
+        # Frequent k-itemset cached result, decoded only when touched.
+        return ItemsetView(self.__item_encoder,
+                           [self.__itemset_encoder.decode_to_tuple(k_itemset)
+                            for k_itemset in self.__frequent_k_itemset[k]])
 
     def frequent_itemset(self, len_descend=True):
         """Frequent itemset of the transactions.
@@ -256,53 +251,117 @@ class AssociationRuleMining:
                 Show frequent itemset list in descend length order.
 
         Returns:
-            list of frequent itemset:
+            ItemsetView of frequent itemset:
                 All frequent itemsets of the transactions.
         """
 
         f_itemset = []
         for k in range(self.__max_k):
-            f_itemset = f_itemset + self.frequent_k_itemset(k+1)
+            f_itemset.extend(self.frequent_k_itemset(k+1).encoded())
         f_itemset.sort(key=len, reverse=len_descend)
-        return f_itemset
+        return ItemsetView(self.__item_encoder, f_itemset)
 
-    def association_rules(self):
+    def association_rules(self, measures=False):
         """List all association rules of the transactions.
 
         Split frequent itemset into two part, and calculate confidence.
         Number of possible conbination of split is Stiring number of second kind.
+        Measures of all rules are calculated in bulk from cached support counts,
+        and rules with lift smaller than `min_lift` are never generated.
+
+        Args:
+            measures (bool):
+                Also return interestingness measures of each rule.
 
         Returns:
             list of dict:
                 Each dict has two keys,
                 'condition' stands occurence of itemset,
                 'prediction' stands cooccurence itemset.
+                If `measures` is set, each dict also has keys in `measure.MEASURES`.
         """
 
         # If already calculated before, skip the calculation process.
         if self.__association_rules:
             pass
-        # Else enumerate frequent itemset, split into two part and calculate confidence.
+        # Else enumerate frequent itemset, split into two part and calculate measures.
         else:
-            for f_itemset in self.frequent_itemset():
-                if len(f_itemset) >= 2:
-                    for front, back in AssociationRuleMining.__split_itemset(f_itemset):
-                        # If front -> back satisfying minimum confidence,
-                        # then it's an association rule.
-                        if self.confidence(front, back) >= self.__min_cof:
-                            (self
-                             .__association_rules
-                             .append({'condition': front, 'prediction': back}))
-                        # If back -> front satisfying minimum confidence,
-                        # then it's an association rule.
-                        if self.confidence(back, front) >= self.__min_cof:
-                            (self
-                             .__association_rules
-                             .append({'condition': back, 'prediction': front}))
+            self.__association_rules, self.__rule_measures = generate_rules(
+                self.trie(),
+                split_itemset,
+                self.support_count,
+                self.__constraint.allow_rule,
+                self.__n_transactions,
+                self.__min_cof,
+                self.__min_lift)
+
+        if measures:
+            return attach_measures(self.__association_rules, self.__rule_measures)
 
         # Association rule cached result.
         return self.__association_rules
 
+    def iter_association_rules(self, batch_size=RULE_BATCH_SIZE):
+        """Stream association rules with their measures.
+
+        Rules are generated batch by batch and are not cached,
+        so memory does not grow with number of rules.
+
+        Args:
+            batch_size (int):
+                Number of candidate rules measured together.
+
+        Yields:
+            dict:
+                Association rule as in `association_rules(measures=True)`.
+        """
+
+        for rules, measures in iter_rules(
+                self.trie(),
+                split_itemset,
+                self.support_count,
+                self.__constraint.allow_rule,
+                self.__n_transactions,
+                self.__min_cof,
+                self.__min_lift,
+                batch_size):
+            yield from attach_measures(rules, measures)
+
+    def trie(self):
+        """Frequent itemsets with support counts in a prefix trie.
+
+        Built once from `frequent_itemset()`, and shared by rule generation and `freeze()`.
+
+        Returns:
+            ItemsetTrie:
+                Trie for support, subset and superset queries of frequent itemsets.
+        """
+
+        # If already built before, skip the building process.
+        if self.__trie is None:
+            self.__trie = ItemsetTrie([(f_itemset, self.support_count(f_itemset))
+                                       for f_itemset in self.frequent_itemset()])
+
+        # Trie cached result.
+        return self.__trie
+
+    def freeze(self):
+        """Immutable model of mining result for concurrent queries.
+
+        Queries of frozen model never mutate caches or encoders,
+        so one frozen model can be shared by many threads.
+        Later changes of this object are not reflected in frozen model.
+
+        Returns:
+            FrozenModel:
+                Frequent itemsets, supports and association rules.
+        """
+
+        return FrozenModel(self.trie(),
+                           self.association_rules(measures=True),
+                           self.__n_transactions,
+                           self.support_count)
+
 # Test section.
 if __name__ == '__main__':
     import json
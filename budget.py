@@ -0,0 +1,220 @@
+"""Module of mining budget and checkpoint.
+
+MiningBudget stops mining cleanly when time or memory runs out.
+MiningCheckpoint records completed mining steps, so a stopped or killed job can resume.
+See test section for code example.
+"""
+
+import json
+import os
+import time
+
+def _memory_usage():
+    """Resident memory of current process.
+
+    Returns:
+        int:
+            Resident memory in bytes,
+            peak resident memory if current one is not available.
+    """
+
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class MiningBudget:
+    """Time and memory budget of mining.
+
+    Budget starts at the first check, and once exceeded it stays exceeded,
+    so every later mining step sees the same decision.
+    Memory is only measured every `check_interval` checks,
+    since reading memory usage is much slower than reading clock.
+    """
+
+    def __init__(self, time_limit=None, max_memory=None, check_interval=1000):
+        """Initialize budget.
+
+        Args:
+            time_limit (float):
+                Maximum mining time in seconds.
+            max_memory (int):
+                Maximum resident memory of process in bytes.
+            check_interval (int):
+                Measure memory every `check_interval` checks.
+        """
+
+        self.__time_limit = time_limit
+        self.__max_memory = max_memory
+        self.__check_interval = check_interval
+        self.__deadline = None
+        self.__n_checks = 0
+        self.__reason = None
+
+    def start(self):
+        """Start counting time, nothing happens if already started."""
+
+        if self.__deadline is None and self.__time_limit is not None:
+            self.__deadline = time.monotonic() + self.__time_limit
+
+    def remaining_time(self):
+        """Remaining time before deadline.
+
+        Returns:
+            float:
+                Remaining seconds (not less than 0), or None if there is no time limit.
+        """
+
+        if self.__time_limit is None:
+            return None
+        self.start()
+        return max(0, self.__deadline - time.monotonic())
+
+    def exceeded(self):
+        """Whether budget is exceeded.
+
+        Returns:
+            bool:
+                True if time or memory budget is exceeded.
+        """
+
+        if self.__reason is not None:
+            return True
+        self.start()
+
+        if self.__deadline is not None and time.monotonic() >= self.__deadline:
+            self.__reason = 'time limit of {} seconds is exceeded.'.format(self.__time_limit)
+        elif self.__max_memory is not None:
+            if self.__n_checks % self.__check_interval == 0:
+                memory = _memory_usage()
+                if memory > self.__max_memory:
+                    self.__reason = ('memory usage {} bytes exceeds {} bytes.'
+                                     .format(memory, self.__max_memory))
+            self.__n_checks = self.__n_checks + 1
+        return self.__reason is not None
+
+    def reason(self):
+        """Reason of exceeding budget.
+
+        Returns:
+            str:
+                Human readable reason, or None if budget is not exceeded.
+        """
+
+        return self.__reason
+
+class MiningCheckpoint:
+    """Append-only checkpoint of completed mining steps.
+
+    First line of checkpoint file is JSON of mining settings,
+    and each following line is JSON of one completed step.
+    Steps are appended and flushed to disk as soon as they complete,
+    so a killed job loses at most the step in progress.
+    A truncated last line (job killed while writing) is ignored.
+    """
+
+    def __init__(self, path, settings):
+        """Initialize checkpoint.
+
+        Args:
+            path (str):
+                Checkpoint file path.
+            settings (dict):
+                JSON serializable mining settings,
+                checkpoint is only resumed with the same settings.
+        """
+
+        self.__path = path
+        self.__settings = json.loads(json.dumps(settings))
+        self.__valid_size = None
+
+    def load(self):
+        """Load completed steps.
+
+        Returns:
+            list of dict:
+                Completed steps in completion order,
+                empty if checkpoint file does not exist.
+
+        Raises:
+            ValueError:
+                If checkpoint is created with different settings.
+        """
+
+        self.__valid_size = 0
+        if not os.path.exists(self.__path):
+            return []
+
+        steps = []
+        with open(self.__path, 'rb') as f:
+            for i, line in enumerate(f):
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    value = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    break
+                if i == 0:
+                    if value != self.__settings:
+                        raise ValueError('Checkpoint {} is created with different settings {}.'
+                                         .format(self.__path, value))
+                else:
+                    steps.append(value)
+                self.__valid_size = self.__valid_size + len(line)
+        return steps
+
+    def append(self, step):
+        """Append a completed step.
+
+        Args:
+            step (dict):
+                JSON serializable completed step.
+        """
+
+        if self.__valid_size is None:
+            self.load()
+
+        with open(self.__path, 'ab') as f:
+            # Drop truncated tail, then write settings if checkpoint is new.
+            f.truncate(self.__valid_size)
+            lines = b''
+            if self.__valid_size == 0:
+                lines = json.dumps(self.__settings).encode('utf-8') + b'\n'
+            lines = lines + json.dumps(step).encode('utf-8') + b'\n'
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+            self.__valid_size = self.__valid_size + len(lines)
+
+# Test section.
+if __name__ == '__main__':
+    import tempfile
+
+    MB = MiningBudget(time_limit=0)
+    assert MB.exceeded() and MB.reason() is not None, 'Bug in `MiningBudget.exceeded`.'
+    assert not MiningBudget().exceeded(), 'Bug in `MiningBudget.exceeded`.'
+    assert MiningBudget(max_memory=1).exceeded(), 'Bug in `MiningBudget.exceeded`.'
+
+    with tempfile.TemporaryDirectory() as TMP_DIR:
+        PATH = os.path.join(TMP_DIR, 'checkpoint.jsonl')
+        MC = MiningCheckpoint(PATH, {'min_sup': 0.2})
+        assert MC.load() == [], 'Bug in `MiningCheckpoint.load`.'
+        MC.append({'k': 1})
+        MC.append({'k': 2})
+
+        # Simulate a job killed while writing.
+        with open(PATH, 'ab') as f:
+            f.write(b'{"k": 3')
+        MC = MiningCheckpoint(PATH, {'min_sup': 0.2})
+        assert MC.load() == [{'k': 1}, {'k': 2}], 'Bug in `MiningCheckpoint.load`.'
+        MC.append({'k': 3})
+        assert MiningCheckpoint(PATH, {'min_sup': 0.2}).load() == [{'k': 1}, {'k': 2}, {'k': 3}], \
+            'Bug in `MiningCheckpoint.append`.'
+
+        try:
+            MiningCheckpoint(PATH, {'min_sup': 0.4}).load()
+            assert False, 'Bug in `MiningCheckpoint.load`.'
+        except ValueError:
+            pass
@@ -0,0 +1,281 @@
+"""Module for associative classification.
+
+Use class `AssociativeClassifier` to predict label of records
+with class association rules (CBA), see test section for code example.
+"""
+
+import numpy as np
+
+import auto
+from constraint import ItemConstraint
+
+class AssociativeClassifier:
+    """Classify records with class association rules (CBA).
+
+    Rules with label as prediction are mined by `auto.AssociationRuleMining`,
+    ranked by confidence, support and condition size,
+    and pruned by database coverage (CBA-CB M1):
+    a rule is kept only if it correctly classifies a not yet covered training record,
+    and rule list is cut where total training error is minimum.
+    Record is classified by the first matching rule, or default label if no rule matches.
+    Records and rule conditions are packed into bitsets of 64-bit words
+    over sorted vocabulary of condition items,
+    so a batch of records is matched against all rules with vectorized bitwise operations.
+    """
+
+    # Maximum memory (in bytes) of intermediate result when matching a batch of records.
+    MAX_MATCH_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, transactions=None, labels=None, min_sup=0.1, min_cof=0.5, max_k=0,
+                 engine=None, n_jobs=1, min_lift=0):
+        """Mine class association rules and build classifier.
+
+        Args:
+            transactions （list of list of item):
+                Training records.
+            labels (list of item):
+                Label of each training record, labels should not be used as items.
+            min_sup (float):
+                Minimum support for class association rule.
+            min_cof (float):
+                Minimum confidence for class association rule.
+            max_k (int):
+                Maximum size for freuent itemset (k-itemset), including label.
+            engine (str):
+                Override selected engine, must be a key of `auto.ENGINES`.
+            n_jobs (int):
+                Number of processes, only used by Eclat and FP-Growth.
+            min_lift (float):
+                Minimum lift for class association rule.
+
+        Raises:
+            ValueError:
+                If number of labels is different from number of transactions.
+        """
+
+        if len(transactions) != len(labels):
+            raise ValueError('labels should have the same length as transactions.')
+
+        # Labels are encoded by sorted vocabulary of labels.
+        self.__labels = sorted(set(labels))
+        self.__label_ids = {label: i for i, label in enumerate(self.__labels)}
+        encoded_labels = np.array([self.__label_ids[label] for label in labels], dtype=np.int64)
+
+        # Label is the only prediction of class association rules.
+        arm = auto.AssociationRuleMining(
+            transactions=[transaction + [label] for transaction, label in zip(transactions, labels)],
+            min_sup=min_sup,
+            min_cof=min_cof,
+            max_k=max_k,
+            engine=engine,
+            n_jobs=n_jobs,
+            constraint=ItemConstraint(
+                condition_items=set(item for transaction in transactions for item in transaction),
+                prediction_items=set(labels)),
+            min_lift=min_lift)
+        rules = [rule for rule in arm.association_rules(measures=True)
+                 if len(rule['prediction']) == 1]
+
+        # Rank rules, ties are broken by condition to make ranking deterministic.
+        rules.sort(key=lambda rule: (-rule['confidence'],
+                                     -rule['support'],
+                                     len(rule['condition']),
+                                     sorted(rule['condition'])))
+
+        self.__set_vocabulary(rules)
+        self.__rules, self.__default_label = self.__prune_rules(
+            rules, self.__bitsets(transactions), encoded_labels)
+
+        # Compile kept rules into bitsets over a smaller vocabulary.
+        self.__set_vocabulary(self.__rules)
+        self.__condition_bitsets = self.__bitsets([rule['condition'] for rule in self.__rules])
+        self.__rule_labels = [rule['prediction'][0] for rule in self.__rules]
+
+    def __set_vocabulary(self, rules):
+        """Set vocabulary of bitsets to condition items of rules.
+
+        This method is intended to be private.
+
+        Args:
+            rules (list of dict):
+                Class association rules.
+        """
+
+        vocabulary = sorted({item for rule in rules for item in rule['condition']})
+        self.__item_ids = {item: i for i, item in enumerate(vocabulary)}
+        self.__n_words = max(1, (len(vocabulary) + 63) // 64)
+
+    def __bitsets(self, transactions):
+        """Pack items of transactions into bitsets.
+
+        Items not in vocabulary cannot match any rule, so they are ignored.
+        This method is intended to be private.
+
+        Args:
+            transactions (list of list of item):
+                Target transactions.
+
+        Returns:
+            numpy.ndarray:
+                Array of uint64 with shape (number of transactions, number of words).
+        """
+
+        rows = []
+        columns = []
+        for row, transaction in enumerate(transactions):
+            for item in transaction:
+                if item in self.__item_ids:
+                    rows.append(row)
+                    columns.append(self.__item_ids[item])
+
+        # Set bits in words directly, without a dense array of bits.
+        columns = np.array(columns, dtype=np.int64)
+        bitsets = np.zeros((len(transactions), self.__n_words), dtype=np.uint64)
+        np.bitwise_or.at(bitsets,
+                         (np.array(rows, dtype=np.int64), columns >> 6),
+                         np.left_shift(np.uint64(1), (columns & 63).astype(np.uint64)))
+        return bitsets
+
+    def __prune_rules(self, rules, record_bitsets, encoded_labels):
+        """Prune ranked rules by database coverage.
+
+        This method is intended to be private.
+
+        Args:
+            rules (list of dict):
+                Ranked class association rules.
+            record_bitsets (numpy.ndarray):
+                Bitsets of training records.
+            encoded_labels (numpy.ndarray):
+                Encoded label of each training record.
+
+        Returns:
+            tuple of list of dict and item:
+                Kept rules in rank order, and default label.
+        """
+
+        # Majority label of records in mask, or of all records if mask is empty.
+        def majority(mask):
+            if not mask.any():
+                mask = np.ones(len(encoded_labels), dtype=bool)
+            return int(np.bincount(encoded_labels[mask], minlength=len(self.__labels)).argmax())
+
+        remaining = np.ones(len(encoded_labels), dtype=bool)
+        kept_rules = []
+        default_labels = [majority(remaining)]
+        total_errors = [int(np.count_nonzero(encoded_labels != default_labels[0]))]
+        rule_errors = 0
+
+        condition_bitsets = self.__bitsets([rule['condition'] for rule in rules])
+        for rule, condition_bitset in zip(rules, condition_bitsets):
+            if not remaining.any():
+                break
+
+            covered = remaining & np.all((record_bitsets & condition_bitset) == condition_bitset,
+                                         axis=1)
+            correct = covered & (encoded_labels == self.__label_ids[rule['prediction'][0]])
+            if not correct.any():
+                continue
+
+            # Keep rule, and remove records covered by it.
+            kept_rules.append(rule)
+            remaining = remaining & ~covered
+            rule_errors = rule_errors + int(np.count_nonzero(covered & ~correct))
+
+            default_labels.append(majority(remaining))
+            default_errors = int(np.count_nonzero(remaining
+                                                  & (encoded_labels != default_labels[-1])))
+            total_errors.append(rule_errors + default_errors)
+
+        # Cut rule list where total error is minimum.
+        n_rules = int(np.argmin(total_errors))
+        return kept_rules[:n_rules], self.__labels[default_labels[n_rules]]
+
+    def rules(self):
+        """Class association rules of classifier in rank order.
+
+        Returns:
+            list of dict:
+                Each dict has keys 'condition', 'prediction' (list of one label)
+                and keys in `measure.MEASURES`.
+        """
+
+        return [dict(rule) for rule in self.__rules]
+
+    def default_label(self):
+        """Label predicted when no rule matches.
+
+        Returns:
+            item:
+                Default label.
+        """
+
+        return self.__default_label
+
+    def match(self, records):
+        """Index of the first matching rule of each record.
+
+        Records are packed into bitsets and matched against bitsets of all rule conditions
+        batch by batch, batch size is chosen so that intermediate result fits in `MAX_MATCH_BYTES`.
+
+        Args:
+            records (list of list of item):
+                Target records.
+
+        Returns:
+            numpy.ndarray:
+                Array of int, index in `rules()` or -1 if no rule matches.
+        """
+
+        first_match = np.full(len(records), -1, dtype=np.int64)
+        n_rules = len(self.__rules)
+        if n_rules == 0:
+            return first_match
+
+        batch_size = max(1, AssociativeClassifier.MAX_MATCH_BYTES // (n_rules * self.__n_words * 8))
+        for start in range(0, len(records), batch_size):
+            batch = self.__bitsets(records[start:start+batch_size])
+            matched = np.all((batch[:, None, :] & self.__condition_bitsets[None, :, :])
+                             == self.__condition_bitsets[None, :, :], axis=2)
+            first_match[start:start+batch_size] = np.where(matched.any(axis=1),
+                                                           matched.argmax(axis=1), -1)
+        return first_match
+
+    def predict(self, records):
+        """Predict label of records.
+
+        Args:
+            records (list of list of item):
+                Target records.
+
+        Returns:
+            list of item:
+                Label of the first matching rule, or default label, of each record.
+        """
+
+        return [self.__rule_labels[i] if i >= 0 else self.__default_label
+                for i in self.match(records).tolist()]
+
+# Test section.
+if __name__ == '__main__':
+    TRANSACTIONS = [
+        ['sunny', 'hot', 'high'], ['sunny', 'hot', 'high'], ['overcast', 'hot', 'high'],
+        ['rain', 'mild', 'high'], ['rain', 'cool', 'normal'], ['rain', 'cool', 'normal'],
+        ['overcast', 'cool', 'normal'], ['sunny', 'mild', 'high'], ['sunny', 'cool', 'normal'],
+        ['rain', 'mild', 'normal'], ['sunny', 'mild', 'normal'], ['overcast', 'mild', 'high'],
+        ['overcast', 'hot', 'normal'], ['rain', 'mild', 'high'],
+    ]
+    LABELS = ['no', 'no', 'yes', 'yes', 'yes', 'no', 'yes',
+              'no', 'yes', 'yes', 'yes', 'yes', 'yes', 'no']
+
+    AC = AssociativeClassifier(transactions=TRANSACTIONS, labels=LABELS, min_sup=0.1, min_cof=0.6)
+
+    # Print ranked rules and default label.
+    for rule in AC.rules():
+        print('confidence: {:.4f}, support: {:.4f}, rule: {} -> {}'
+              .format(rule['confidence'], rule['support'], rule['condition'], rule['prediction']))
+    print('default label: {}'.format(AC.default_label()))
+
+    PREDICTIONS = AC.predict(TRANSACTIONS)
+    print('training accuracy: {:.4f}'
+          .format(sum(p == l for p, l in zip(PREDICTIONS, LABELS)) / len(LABELS)))
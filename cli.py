@@ -0,0 +1,233 @@
+"""Command line entry point of association rule mining.
+
+Mine frequent itemsets and association rules of a transaction file,
+and stream results as JSON lines or CSV.
+
+Example:
+    python -m cli data/IBM.txt --format ibm --min-sup 0.2 --min-cof 0.5
+"""
+
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+
+import auto
+import out_of_core
+from measure import MEASURES
+from reader import INPUT_FORMATS, TransactionReader
+
+OUTPUT_FORMATS = ('jsonl', 'csv')
+
+ENGINES = ('auto',) + tuple(auto.ENGINES) + ('out_of_core',)
+
+CSV_FIELDS = ('type', 'items', 'condition', 'prediction', 'support_count') + MEASURES
+
+class ResultWriter:
+    """Write frequent itemsets and association rules one by one."""
+
+    def __init__(self, stream, output_format='jsonl'):
+        """Initialize writer.
+
+        Args:
+            stream (file object):
+                Text stream to write.
+            output_format (str):
+                One of `OUTPUT_FORMATS`.
+
+        Raises:
+            ValueError:
+                If output format is unknown.
+        """
+
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError('output_format should be one of {}.'.format(', '.join(OUTPUT_FORMATS)))
+
+        self.__stream = stream
+        self.__csv_writer = None
+        if output_format == 'csv':
+            self.__csv_writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS)
+            self.__csv_writer.writeheader()
+
+    def __write(self, record):
+        """Write one record.
+
+        This method is intended to be private.
+
+        Args:
+            record (dict):
+                Record with keys in `CSV_FIELDS`.
+        """
+
+        if self.__csv_writer is None:
+            # Infinite conviction is not valid JSON, write null instead.
+            for key in MEASURES:
+                if key in record and not math.isfinite(record[key]):
+                    record[key] = None
+            self.__stream.write(json.dumps(record) + '\n')
+        else:
+            for key in ('items', 'condition', 'prediction'):
+                if key in record:
+                    record[key] = ' '.join(record[key])
+            self.__csv_writer.writerow(record)
+
+    def write_itemset(self, itemset, support_count, support):
+        """Write a frequent itemset.
+
+        Args:
+            itemset (list of item):
+                Frequent itemset.
+            support_count (int):
+                Support count of itemset.
+            support (float):
+                Support of itemset.
+        """
+
+        self.__write({'type': 'itemset',
+                      'items': itemset,
+                      'support_count': support_count,
+                      'support': support})
+
+    def write_rule(self, rule, support_count):
+        """Write an association rule.
+
+        Args:
+            rule (dict):
+                Association rule with keys in `measure.MEASURES`.
+            support_count (int):
+                Support count of condition and prediction together.
+        """
+
+        record = {'type': 'rule', 'support_count': support_count}
+        record.update(rule)
+        self.__write(record)
+
+def parse_args(argv=None):
+    """Parse command line arguments.
+
+    Args:
+        argv (list of str):
+            Command line arguments, default to `sys.argv[1:]`.
+
+    Returns:
+        argparse.Namespace:
+            Parsed arguments.
+    """
+
+    parser = argparse.ArgumentParser(prog='python -m cli',
+                                     description='Mine frequent itemsets and association rules.')
+    parser.add_argument('input', help='transaction file path')
+    parser.add_argument('--format', dest='input_format', choices=INPUT_FORMATS, default='basket',
+                        help='input format (default: basket)')
+    parser.add_argument('--engine', choices=ENGINES, default='auto',
+                        help='mining engine (default: auto)')
+    parser.add_argument('--min-sup', type=float, default=0.1,
+                        help='minimum support (default: 0.1)')
+    parser.add_argument('--min-cof', type=float, default=0.1,
+                        help='minimum confidence (default: 0.1)')
+    parser.add_argument('--min-lift', type=float, default=0,
+                        help='minimum lift (default: 0)')
+    parser.add_argument('--max-k', type=int, default=0,
+                        help='maximum itemset size, 0 for no limit (default: 0)')
+    parser.add_argument('--n-jobs', type=int, default=1,
+                        help='number of processes, only used by Eclat and FP-Growth (default: 1)')
+    parser.add_argument('--tmp-dir', default=None,
+                        help='directory of partition files, only used by out_of_core')
+    parser.add_argument('--output', default='-',
+                        help='output file path, - for stdout (default: -)')
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default='jsonl',
+                        help='output format (default: jsonl)')
+    parser.add_argument('--no-rules', action='store_true',
+                        help='only output frequent itemsets')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Run mining job and write results.
+
+    Frequent itemsets are written level by level,
+    and association rules are written batch by batch as soon as they are generated,
+    so no full list of results is built.
+    A summary is printed to stderr at the end.
+
+    Args:
+        argv (list of str):
+            Command line arguments, default to `sys.argv[1:]`.
+
+    Returns:
+        dict:
+            Summary of mining job.
+    """
+
+    args = parse_args(argv)
+    summary = {'engine': args.engine}
+    start_time = time.perf_counter()
+
+    reader = TransactionReader(args.input, args.input_format)
+    if args.engine == 'out_of_core':
+        arm = out_of_core.AssociationRuleMining(transactions=reader,
+                                                min_sup=args.min_sup,
+                                                min_cof=args.min_cof,
+                                                max_k=args.max_k,
+                                                min_lift=args.min_lift,
+                                                tmp_dir=args.tmp_dir)
+    else:
+        arm = auto.AssociationRuleMining(transactions=list(reader),
+                                         min_sup=args.min_sup,
+                                         min_cof=args.min_cof,
+                                         max_k=args.max_k,
+                                         engine=None if args.engine == 'auto' else args.engine,
+                                         n_jobs=args.n_jobs,
+                                         min_lift=args.min_lift)
+        summary['engine'] = arm.engine()
+        summary['reason'] = arm.reason()
+    summary['load_seconds'] = time.perf_counter() - start_time
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        writer = ResultWriter(output, args.output_format)
+
+        phase_time = time.perf_counter()
+        summary['n_frequent_itemsets'] = 0
+        k = 1
+        while args.max_k <= 0 or k <= args.max_k:
+            try:
+                k_itemsets = arm.frequent_k_itemset(k)
+            except ValueError:
+                # k is greater than length of the longest transaction.
+                break
+            # No frequent k-itemset, so no frequent (k+1)-itemset.
+            if not k_itemsets:
+                break
+            for f_itemset in k_itemsets:
+                writer.write_itemset(f_itemset, arm.support_count(f_itemset), arm.support(f_itemset))
+            summary['n_frequent_itemsets'] = summary['n_frequent_itemsets'] + len(k_itemsets)
+            k = k + 1
+        summary['itemset_seconds'] = time.perf_counter() - phase_time
+
+        if not args.no_rules:
+            phase_time = time.perf_counter()
+            summary['n_association_rules'] = 0
+            for rule in arm.iter_association_rules():
+                writer.write_rule(rule, arm.support_count(rule['condition'] + rule['prediction']))
+                summary['n_association_rules'] = summary['n_association_rules'] + 1
+            summary['rule_seconds'] = time.perf_counter() - phase_time
+        output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    summary['total_seconds'] = time.perf_counter() - start_time
+    summary['support_cache'] = arm.support_cache_stats()
+    try:
+        import resource
+        summary['peak_memory_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        pass
+
+    sys.stderr.write(json.dumps(summary) + '\n')
+    return summary
+
+if __name__ == '__main__':
+    main()
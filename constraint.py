@@ -0,0 +1,226 @@
+"""Module of mining constraint.
+
+ItemConstraint restricts items and size of frequent itemsets and association rules.
+See test section for code example.
+"""
+
+class ItemConstraint:
+    """Item and length constraints of frequent itemsets and association rules.
+
+    Constraints are pushed into mining by projecting transactions:
+    transactions without all required items are dropped,
+    and excluded items (or items not allowed in any side of rule) are removed.
+    Support count of an itemset in projected transactions is exact
+    if the itemset contains all required items.
+    """
+
+    def __init__(self, required_items=None, excluded_items=None,
+                 condition_items=None, prediction_items=None, min_k=1):
+        """Initialize constraint.
+
+        Args:
+            required_items (list of item):
+                Frequent itemset must contain all required items.
+            excluded_items (list of item):
+                Frequent itemset must not contain any excluded item.
+            condition_items (list of item):
+                If given, condition of association rule only contains these items.
+            prediction_items (list of item):
+                If given, prediction of association rule only contains these items.
+            min_k (int):
+                Minimum size for frequent itemset (k-itemset).
+        """
+
+        self.__required_items = set(required_items or [])
+        self.__excluded_items = set(excluded_items or [])
+        self.__condition_items = None if condition_items is None else set(condition_items)
+        self.__prediction_items = None if prediction_items is None else set(prediction_items)
+        self.__min_k = min_k
+
+        # Items allowed in frequent itemset.
+        # Only restricted when both sides of association rule are restricted.
+        if self.__condition_items is None or self.__prediction_items is None:
+            self.__allowed_items = None
+        else:
+            self.__allowed_items = (self.__condition_items
+                                    | self.__prediction_items
+                                    | self.__required_items)
+
+    def encode(self, item_encoder):
+        """Encode items of constraint.
+
+        Args:
+            item_encoder (StringToIntegerEncoder):
+                Encoder used by mining engine.
+
+        Returns:
+            ItemConstraint:
+                Constraint with encoded items.
+        """
+
+        def encode_items(items):
+            if items is None:
+                return None
+            return [item_encoder.encode_from_string(item) for item in items]
+
+        return ItemConstraint(required_items=encode_items(self.__required_items),
+                              excluded_items=encode_items(self.__excluded_items),
+                              condition_items=encode_items(self.__condition_items),
+                              prediction_items=encode_items(self.__prediction_items),
+                              min_k=self.__min_k)
+
+    def settings(self):
+        """JSON serializable settings of constraint.
+
+        Returns:
+            dict:
+                Sorted items of each constraint, and `min_k`.
+        """
+
+        def sorted_items(items):
+            if items is None:
+                return None
+            return sorted(items)
+
+        return {'required_items': sorted_items(self.__required_items),
+                'excluded_items': sorted_items(self.__excluded_items),
+                'condition_items': sorted_items(self.__condition_items),
+                'prediction_items': sorted_items(self.__prediction_items),
+                'min_k': self.__min_k}
+
+    def is_empty(self):
+        """Whether constraint restricts nothing.
+
+        Returns:
+            bool:
+                True if no item constraint and no length constraint.
+        """
+
+        return (not self.__required_items
+                and not self.__excluded_items
+                and self.__condition_items is None
+                and self.__prediction_items is None
+                and self.__min_k <= 1)
+
+    def project(self, transactions):
+        """Project transactions with item constraints.
+
+        Args:
+            transactions (list of tuple of list of item and int):
+                Transactions paired with count.
+
+        Returns:
+            list of tuple of list of item and int:
+                Projected transactions paired with count.
+                Same object is returned if there is no item constraint.
+        """
+
+        if (not self.__required_items
+                and not self.__excluded_items
+                and self.__allowed_items is None):
+            return transactions
+
+        projected_transactions = []
+        for transaction, count in transactions:
+            if not all(map(lambda item: item in transaction, self.__required_items)):
+                continue
+            transaction = [item for item in transaction if self.allow_item(item)]
+            if transaction:
+                projected_transactions.append((transaction, count))
+        return projected_transactions
+
+    def required_itemset(self):
+        """Required items of frequent itemset.
+
+        Returns:
+            list of item:
+                Sorted required items.
+        """
+
+        return sorted(self.__required_items)
+
+    def allow_item(self, item):
+        """Whether item can be in frequent itemset.
+
+        Args:
+            item (item):
+                Target item.
+
+        Returns:
+            bool:
+                True if item is not excluded and allowed in some side of association rule.
+        """
+
+        return (item not in self.__excluded_items
+                and (self.__allowed_items is None or item in self.__allowed_items))
+
+    def contain_required(self, itemset):
+        """Whether itemset contains all required items.
+
+        Args:
+            itemset (list of item):
+                Target itemset.
+
+        Returns:
+            bool:
+                True if itemset contains all required items.
+        """
+
+        return all(map(lambda item: item in itemset, self.__required_items))
+
+    def satisfy(self, itemset):
+        """Whether itemset satisfies constraint.
+
+        Args:
+            itemset (list of item):
+                Target itemset.
+
+        Returns:
+            bool:
+                True if itemset satisfies all item and length constraints.
+        """
+
+        return (len(itemset) >= self.__min_k
+                and self.contain_required(itemset)
+                and all(map(self.allow_item, itemset)))
+
+    def allow_rule(self, condition, prediction):
+        """Whether association rule `condition` -> `prediction` satisfies constraint.
+
+        Args:
+            condition (list of item):
+                Condition of association rule.
+            prediction (list of item):
+                Prediction of association rule.
+
+        Returns:
+            bool:
+                True if both sides only contain allowed items.
+        """
+
+        return ((self.__condition_items is None
+                 or all(map(lambda item: item in self.__condition_items, condition)))
+                and (self.__prediction_items is None
+                     or all(map(lambda item: item in self.__prediction_items, prediction))))
+
+# Test section.
+if __name__ == '__main__':
+    TRANSACTIONS = [
+        (['a', 'b', 'c'], 1),
+        (['a', 'c'], 2),
+        (['b', 'd'], 1),
+    ]
+
+    IC = ItemConstraint(required_items=['a'], excluded_items=['b'])
+    assert IC.project(TRANSACTIONS) == [(['a', 'c'], 1), (['a', 'c'], 2)], \
+        'Bug in `ItemConstraint.project`.'
+    assert IC.satisfy(['a', 'c']) and not IC.satisfy(['c']) and not IC.satisfy(['a', 'b']), \
+        'Bug in `ItemConstraint.satisfy`.'
+
+    IC = ItemConstraint(condition_items=['a', 'b'], prediction_items=['c'], min_k=2)
+    assert IC.project(TRANSACTIONS) == [(['a', 'b', 'c'], 1), (['a', 'c'], 2), (['b'], 1)], \
+        'Bug in `ItemConstraint.project`.'
+    assert not IC.satisfy(['a']), \
+        'Bug in `ItemConstraint.satisfy`.'
+    assert IC.allow_rule(['a', 'b'], ['c']) and not IC.allow_rule(['c'], ['a']), \
+        'Bug in `ItemConstraint.allow_rule`.'
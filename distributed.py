@@ -0,0 +1,708 @@
+"""Module for association rules generation over transactions spread across machines.
+
+Use class `CountWorker` to serve a shard of transactions,
+and class `AssociationRuleMining` to coordinate workers and generate association rules,
+see test section for code example.
+"""
+
+import json
+import socket
+import struct
+import time
+
+from encoder import StringToIntegerEncoder, ListToIntegerEncoder, ItemsetView
+from frozen import FrozenModel
+from itemset_trie import ItemsetTrie
+from measure import RULE_BATCH_SIZE, attach_measures, generate_rules, iter_rules, split_itemset
+from support_cache import SupportCache
+
+# Every message is a JSON object prefixed with its length as little-endian unsigned 64-bit integer.
+HEADER = struct.Struct('<Q')
+
+def _send_message(sock, message):
+    """Send a message.
+
+    Args:
+        sock (socket.socket):
+            Connected socket.
+        message (dict):
+            JSON serializable message.
+    """
+
+    payload = json.dumps(message).encode('utf-8')
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+def _receive_exactly(sock, size):
+    """Receive exactly `size` bytes.
+
+    Args:
+        sock (socket.socket):
+            Connected socket.
+        size (int):
+            Number of bytes.
+
+    Returns:
+        bytes:
+            Received bytes, or None if connection is closed before any byte is received.
+
+    Raises:
+        ConnectionError:
+            If connection is closed in the middle.
+    """
+
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = sock.recv(min(remaining, 1024 * 1024))
+        if not chunk:
+            if remaining == size:
+                return None
+            raise ConnectionError('Connection is closed in the middle of a message.')
+        chunks.append(chunk)
+        remaining = remaining - len(chunk)
+    return b''.join(chunks)
+
+def _receive_message(sock):
+    """Receive a message.
+
+    Args:
+        sock (socket.socket):
+            Connected socket.
+
+    Returns:
+        dict:
+            Received message, or None if connection is closed.
+    """
+
+    header = _receive_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    payload = _receive_exactly(sock, HEADER.unpack(header)[0])
+    if payload is None:
+        raise ConnectionError('Connection is closed in the middle of a message.')
+    return json.loads(payload.decode('utf-8'))
+
+def _socket_family(address):
+    """Socket family of address.
+
+    Args:
+        address (str or tuple of str and int):
+            Unix socket path, or (host, port) of TCP.
+
+    Returns:
+        int:
+            `socket.AF_UNIX` or `socket.AF_INET`.
+    """
+
+    return socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+
+class CountWorker:
+    """Count support of itemsets over a shard of transactions.
+
+    Transactions are kept as vertical bitsets (one bitset of transaction ids per item),
+    so support count of a candidate is a weighted popcount of and-ed bitsets.
+    Worker answers requests of one coordinator at a time:
+        'summary': number of transactions, longest transaction and support count of items.
+        'count': support counts of a list of itemsets.
+        'shutdown': stop serving.
+    """
+
+    def __init__(self, transactions=None):
+        """Encode shard of transactions.
+
+        Args:
+            transactions （list of list of item):
+                Shard of transaction database.
+        """
+
+        self.__item_encoder = StringToIntegerEncoder()
+        self.__n_transactions = len(transactions)
+        self.__max_length = max([len(transaction) for transaction in transactions], default=0)
+
+        # Identical transactions are collapsed, and transactions with the same count
+        # get consecutive ids, so weighted popcount only needs one shift and mask for each count.
+        encoded_transactions = (self
+                                .__item_encoder
+                                .encode_from_list_of_string_list_with_count(transactions))
+        encoded_transactions.sort(key=lambda pair: pair[1])
+        self.__n_unique_transactions = len(encoded_transactions)
+        self.__count_ranges = []
+        for tid, (_, count) in enumerate(encoded_transactions):
+            if self.__count_ranges and self.__count_ranges[-1][0] == count:
+                self.__count_ranges[-1][2] = self.__count_ranges[-1][2] + 1
+            else:
+                self.__count_ranges.append([count, tid, 1])
+        self.__count_ranges = [(count, start, (1 << length) - 1)
+                               for count, start, length in self.__count_ranges]
+
+        # Build vertical representation.
+        self.__tid_bitset = {}
+        for tid, (transaction, _) in enumerate(encoded_transactions):
+            for item in transaction:
+                self.__tid_bitset[item] = self.__tid_bitset.get(item, 0) | (1 << tid)
+
+    def __bitset_count(self, bitset):
+        """Weighted popcount of transaction bitset.
+
+        This method is intended to be private.
+
+        Args:
+            bitset (int):
+                Bitset of transaction ids.
+
+        Returns:
+            int:
+                Number of transactions in bitset, counting duplicated transactions.
+        """
+
+        return sum(count * ((bitset >> start) & mask).bit_count()
+                   for count, start, mask in self.__count_ranges)
+
+    def summary(self):
+        """Summary of shard.
+
+        Returns:
+            dict:
+                'n_transactions', 'max_length' (longest transaction)
+                and 'item_count' (support count of each item).
+        """
+
+        return {'n_transactions': self.__n_transactions,
+                'max_length': self.__max_length,
+                'item_count': {self.__item_encoder.decode_to_string(item): self.__bitset_count(bitset)
+                               for item, bitset in self.__tid_bitset.items()}}
+
+    def count(self, itemsets):
+        """Support counts of itemsets in shard.
+
+        Args:
+            itemsets (list of list of item):
+                Target itemsets.
+
+        Returns:
+            list of int:
+                Support count of each itemset.
+        """
+
+        all_transactions = (1 << self.__n_unique_transactions) - 1
+        counts = []
+        for itemset in itemsets:
+            bitset = all_transactions
+            # Item never seen before is in no transaction.
+            items = self.__item_encoder.lookup_string_list(itemset)
+            if items is None:
+                bitset = 0
+            for item in items or []:
+                bitset = bitset & self.__tid_bitset.get(item, 0)
+                if not bitset:
+                    break
+            counts.append(self.__bitset_count(bitset))
+        return counts
+
+    def serve(self, address):
+        """Answer requests of coordinators until shutdown.
+
+        Args:
+            address (str or tuple of str and int):
+                Unix socket path, or (host, port) of TCP to listen on.
+        """
+
+        with socket.socket(_socket_family(address), socket.SOCK_STREAM) as server:
+            if not isinstance(address, str):
+                server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind(address)
+            server.listen()
+
+            shutdown = False
+            while not shutdown:
+                connection, _ = server.accept()
+                with connection:
+                    while True:
+                        request = _receive_message(connection)
+                        if request is None:
+                            break
+                        if request['op'] == 'shutdown':
+                            shutdown = True
+                            break
+                        try:
+                            if request['op'] == 'summary':
+                                response = self.summary()
+                            elif request['op'] == 'count':
+                                response = {'counts': self.count(request['itemsets'])}
+                            else:
+                                response = {'error': 'Unknown op {}.'.format(request['op'])}
+                        except Exception as error:
+                            response = {'error': repr(error)}
+                        _send_message(connection, response)
+
+def serve(transactions, address):
+    """Serve a shard of transactions, target of worker process.
+
+    Args:
+        transactions （list of list of item):
+            Shard of transaction database.
+        address (str or tuple of str and int):
+            Unix socket path, or (host, port) of TCP to listen on.
+    """
+
+    CountWorker(transactions).serve(address)
+
+class AssociationRuleMining:
+    """Generate association rule with count distribution over worker processes or machines.
+
+    Each worker holds a shard of transactions.
+    For each level, coordinator generates candidates with Apriori algorithm,
+    broadcasts them to all workers, and sums support counts counted locally by workers.
+    Result is the same as `apriori.AssociationRuleMining` over all shards.
+    """
+
+    def __init__(self, workers=None, min_sup=0.1, min_cof=0.1, max_k=0, min_lift=0,
+                 support_cache=None, connect_timeout=10):
+        """Connect to workers and initialize settings for association rule mining.
+
+        Args:
+            workers (list of str or tuple of str and int):
+                Addresses of workers, Unix socket path or (host, port) of TCP.
+            min_sup (float):
+                Minimum support for frequent itemset.
+            min_cof (float):
+                Minimum confidence for association rule.
+            max_k (int):
+                Maximum size for freuent itemset (k-itemset).
+            min_lift (float):
+                Minimum lift for association rule.
+            support_cache (SupportCache):
+                Cache of support counts, default to an unbounded cache.
+            connect_timeout (float):
+                Seconds to keep retrying connection to a worker which is not listening yet.
+
+        Raises:
+            ConnectionError:
+                If a worker cannot be connected before timeout.
+        """
+
+        self.__min_sup = min_sup
+        self.__min_cof = min_cof
+        self.__min_lift = min_lift
+        self.__sup_count = SupportCache() if support_cache is None else support_cache
+        self.__frequent_k_itemset = {}
+        self.__association_rules = []
+        self.__trie = None
+        self.__rule_measures = {}
+        self.__item_encoder = StringToIntegerEncoder()
+        self.__itemset_encoder = ListToIntegerEncoder()
+
+        self.__connections = [AssociationRuleMining.__connect(address, connect_timeout)
+                              for address in workers]
+
+        # Reduce summaries of shards.
+        summaries = self.__broadcast({'op': 'summary'})
+        self.__n_transactions = sum(summary['n_transactions'] for summary in summaries)
+        self.__item_count = {}
+        for summary in summaries:
+            for item, count in summary['item_count'].items():
+                self.__item_count[item] = self.__item_count.get(item, 0) + count
+
+        self.__max_k = max_k
+        if self.__max_k <= 0:
+            self.__max_k = max([summary['max_length'] for summary in summaries], default=0)
+
+    @staticmethod
+    def __connect(address, timeout):
+        """Connect to worker, retry until worker is listening.
+
+        This method is intended to be private.
+
+        Args:
+            address (str or tuple of str and int):
+                Unix socket path, or (host, port) of TCP.
+            timeout (float):
+                Seconds to keep retrying.
+
+        Returns:
+            socket.socket:
+                Connected socket.
+
+        Raises:
+            ConnectionError:
+                If worker cannot be connected before timeout.
+        """
+
+        deadline = time.monotonic() + timeout
+        while True:
+            sock = socket.socket(_socket_family(address), socket.SOCK_STREAM)
+            try:
+                sock.connect(address)
+                return sock
+            except (ConnectionRefusedError, FileNotFoundError):
+                sock.close()
+                if time.monotonic() >= deadline:
+                    raise ConnectionError('Worker {} cannot be connected.'.format(address))
+                time.sleep(0.05)
+
+    def __broadcast(self, request):
+        """Send request to all workers, then gather their responses.
+
+        Requests are sent before any response is received, so workers run concurrently.
+        This method is intended to be private.
+
+        Args:
+            request (dict):
+                JSON serializable request.
+
+        Returns:
+            list of dict:
+                Response of each worker.
+
+        Raises:
+            RuntimeError:
+                If a worker fails to answer request.
+        """
+
+        for connection in self.__connections:
+            _send_message(connection, request)
+
+        responses = []
+        for connection in self.__connections:
+            response = _receive_message(connection)
+            if response is None:
+                raise RuntimeError('Worker closed connection.')
+            if 'error' in response:
+                raise RuntimeError('Worker failed: {}'.format(response['error']))
+            responses.append(response)
+        return responses
+
+    def __count(self, itemsets):
+        """Support counts of itemsets over all shards.
+
+        This method is intended to be private.
+
+        Args:
+            itemsets (list of list of item):
+                Target itemsets.
+
+        Returns:
+            list of int:
+                Support count of each itemset.
+        """
+
+        if not itemsets:
+            return []
+        counts = [0] * len(itemsets)
+        for response in self.__broadcast({'op': 'count', 'itemsets': itemsets}):
+            counts = [count + shard_count for count, shard_count in zip(counts, response['counts'])]
+        return counts
+
+    def close(self, shutdown=False):
+        """Disconnect from workers.
+
+        Args:
+            shutdown (bool):
+                Also ask workers to stop serving.
+        """
+
+        for connection in self.__connections:
+            if shutdown:
+                _send_message(connection, {'op': 'shutdown'})
+            connection.close()
+        self.__connections = []
+
+    def support_count(self, itemset):
+        """Support count for the itemset.
+
+        Support count of frequent itemset is cached by mining,
+        other itemsets are counted by workers.
+
+        Args:
+            itemset (list of item):
+                Item cannot be encoded form.
+
+        Returns:
+            int:
+                Support count for the given itemset.
+        """
+
+        # Encode items in itemset without growing encoder,
+        # itemset with an item which is not frequent is counted by workers without caching.
+        encoded_items = self.__item_encoder.lookup_string_list(itemset)
+        if encoded_items is None:
+            return self.__count([list(itemset)])[0]
+
+        # Sorted items are the key of support count cache, so evicted keys are freed.
+        key = tuple(encoded_items)
+
+        # If already calculated before, skip the calculation process.
+        sup_count = self.__sup_count.get(key)
+        if sup_count is not None:
+            pass
+        # Else ask workers to count.
+        else:
+            sup_count = self.__count([self.__item_encoder.decode_to_string_list(encoded_items)])[0]
+            self.__sup_count.put(key, sup_count)
+
+        # Support count cached result.
+        return sup_count
+
+    def support(self, itemset):
+        """Support for the itemset.
+
+        Args:
+            itemset (list of item):
+                Item cannot be encoded form.
+
+        Returns:
+            float:
+                Support for the given itemset.
+        """
+
+        return self.support_count(itemset) / self.__n_transactions
+
+    def confidence(self, itemset_1, itemset_2):
+        """Confidence of association rule `itemset_1` -> `itemset_2`.
+
+        Args:
+            itemset_1 (list of item):
+                Denominator of confidence formula.
+            itemset_2 (list of item):
+                Combine with `itemset_1` to form nominator of confidence formula.
+
+        Returns:
+            float:
+                Confidence of the given association rule.
+        """
+
+        return self.support_count(itemset_1 + itemset_2) / self.support_count(itemset_1)
+
+    def support_cache_stats(self):
+        """Statistics of support count cache.
+
+        Returns:
+            dict:
+                See `SupportCache.stats` for keys.
+        """
+
+        return self.__sup_count.stats()
+
+    def frequent_k_itemset(self, k=1):
+        """Frequent k-itemset of the transactions.
+
+        Candidates are joined from frequent k-1-itemsets on coordinator,
+        candidates with an infrequent k-1-subset are pruned before broadcast.
+
+        Args:
+            k (int):
+                size of frequent itemset
+
+        Returns:
+            ItemsetView of k-itemset:
+                Itemsets in list are frequent k-itemset.
+
+        Raises:
+            ValueError:
+                Valid range of k should be 0 < k <= self.max_k.
+        """
+
+        # Validation for k.
+        if k <= 0:
+            raise ValueError('k should be greater than 0.')
+        if k > self.__max_k:
+            raise ValueError('k should be smaller than or equal to max_k={}.'.format(self.__max_k))
+
+        # If already calculated before, skip the calculation process.
+        if k in self.__frequent_k_itemset:
+            pass
+        # Else if k is 1, item counts are already reduced from summaries.
+        elif k == 1:
+            self.__frequent_k_itemset[1] = set()
+            for item, count in self.__item_count.items():
+                if count / self.__n_transactions >= self.__min_sup:
+                    encoded_itemset = self.__itemset_encoder.encode_from_list(
+                        self.__item_encoder.encode_from_string_list([item]))
+                    self.__frequent_k_itemset[1].add(encoded_itemset)
+                    self.__sup_count.put(self.__itemset_encoder.decode_to_tuple(encoded_itemset), count, pin=True)
+        # Else generate candidates, and count them on workers.
+        else:
+            self.frequent_k_itemset(k-1)
+            frequent_k_1_itemset = sorted(self.__itemset_encoder.decode_to_list(k_1_itemset)
+                                          for k_1_itemset in self.__frequent_k_itemset[k-1])
+            frequent_k_1_set = set(map(tuple, frequent_k_1_itemset))
+
+            # Join k-1-itemsets sharing the first k-2 items, then prune by k-1-subsets.
+            candidates = []
+            for i, k_1_itemset_1 in enumerate(frequent_k_1_itemset):
+                for k_1_itemset_2 in frequent_k_1_itemset[i+1:]:
+                    if k_1_itemset_1[:-1] != k_1_itemset_2[:-1]:
+                        break
+                    candidate = k_1_itemset_1 + k_1_itemset_2[-1:]
+                    if all(tuple(candidate[:j] + candidate[j+1:]) in frequent_k_1_set
+                           for j in range(k-2)):
+                        candidates.append(candidate)
+
+            counts = self.__count([self.__item_encoder.decode_to_string_list(candidate)
+                                   for candidate in candidates])
+
+            self.__frequent_k_itemset[k] = set()
+            for candidate, count in zip(candidates, counts):
+                if count / self.__n_transactions >= self.__min_sup:
+                    encoded_itemset = self.__itemset_encoder.encode_from_list(candidate)
+                    self.__frequent_k_itemset[k].add(encoded_itemset)
+                    # Support count of frequent itemset is never evicted.
+                    self.__sup_count.put(self.__itemset_encoder.decode_to_tuple(encoded_itemset), count, pin=True)
+
+        # Frequent k-itemset cached result, decoded only when touched.
+        return ItemsetView(self.__item_encoder,
+                           [self.__itemset_encoder.decode_to_tuple(k_itemset)
+                            for k_itemset in self.__frequent_k_itemset[k]])
+
+    def frequent_itemset(self, len_descend=True):
+        """Frequent itemset of the transactions.
+
+        Calculate frequent k-itemset, k=1, ..., self.max_k,
+        and combine result to form frequent itemset.
+
+        Args:
+            len_descend (bool):
+                Show frequent itemset list in descend length order.
+
+        Returns:
+            ItemsetView of frequent itemset:
+                All frequent itemsets of the transactions.
+        """
+
+        f_itemset = []
+        for k in range(self.__max_k):
+            f_itemset.extend(self.frequent_k_itemset(k+1).encoded())
+        f_itemset.sort(key=len, reverse=len_descend)
+        return ItemsetView(self.__item_encoder, f_itemset)
+
+    def association_rules(self, measures=False):
+        """List all association rules of the transactions.
+
+        Split frequent itemset into two part, and calculate confidence.
+        Number of possible conbination of split is Stiring number of second kind.
+        Measures of all rules are calculated in bulk from cached support counts,
+        and rules with lift smaller than `min_lift` are never generated.
+
+        Args:
+            measures (bool):
+                Also return interestingness measures of each rule.
+
+        Returns:
+            list of dict:
+                Each dict has two keys,
+                'condition' stands occurence of itemset,
+                'prediction' stands cooccurence itemset.
+                If `measures` is set, each dict also has keys in `measure.MEASURES`.
+        """
+
+        # If already calculated before, skip the calculation process.
+        if self.__association_rules:
+            pass
+        # Else enumerate frequent itemset, split into two part and calculate measures.
+        else:
+            self.__association_rules, self.__rule_measures = generate_rules(
+                self.trie(),
+                split_itemset,
+                self.support_count,
+                lambda condition, prediction: True,
+                self.__n_transactions,
+                self.__min_cof,
+                self.__min_lift)
+
+        if measures:
+            return attach_measures(self.__association_rules, self.__rule_measures)
+
+        # Association rule cached result.
+        return self.__association_rules
+
+    def iter_association_rules(self, batch_size=RULE_BATCH_SIZE):
+        """Stream association rules with their measures.
+
+        Rules are generated batch by batch and are not cached,
+        so memory does not grow with number of rules.
+
+        Args:
+            batch_size (int):
+                Number of candidate rules measured together.
+
+        Yields:
+            dict:
+                Association rule as in `association_rules(measures=True)`.
+        """
+
+        for rules, measures in iter_rules(
+                self.trie(),
+                split_itemset,
+                self.support_count,
+                lambda condition, prediction: True,
+                self.__n_transactions,
+                self.__min_cof,
+                self.__min_lift,
+                batch_size):
+            yield from attach_measures(rules, measures)
+
+    def trie(self):
+        """Frequent itemsets with support counts in a prefix trie.
+
+        Built once from `frequent_itemset()`, and shared by rule generation and `freeze()`.
+
+        Returns:
+            ItemsetTrie:
+                Trie for support, subset and superset queries of frequent itemsets.
+        """
+
+        # If already built before, skip the building process.
+        if self.__trie is None:
+            self.__trie = ItemsetTrie([(f_itemset, self.support_count(f_itemset))
+                                       for f_itemset in self.frequent_itemset()])
+
+        # Trie cached result.
+        return self.__trie
+
+    def freeze(self):
+        """Immutable model of mining result for concurrent queries.
+
+        Queries of frozen model never mutate caches or encoders,
+        so one frozen model can be shared by many threads.
+        Later changes of this object are not reflected in frozen model.
+
+        Returns:
+            FrozenModel:
+                Frequent itemsets, supports and association rules.
+        """
+
+        return FrozenModel(self.trie(),
+                           self.association_rules(measures=True),
+                           self.__n_transactions,
+                           self.support_count)
+
+# Test section.
+if __name__ == '__main__':
+    import multiprocessing
+    import os
+    import tempfile
+    # Load data.
+    DATA_PATH = os.path.dirname(os.path.abspath(__file__)) + '/data'
+    DATA_NAME = '/IBM.json'
+
+    with open(DATA_PATH + DATA_NAME, 'r') as f:
+        TRANSACTIONS = json.loads(f.read())
+
+    with tempfile.TemporaryDirectory() as TMP_DIR:
+        # Start one local worker process for each shard.
+        ADDRESSES = [os.path.join(TMP_DIR, 'worker{}.sock'.format(i)) for i in range(3)]
+        PROCESSES = [multiprocessing.Process(target=serve, args=(TRANSACTIONS[i::3], address))
+                     for i, address in enumerate(ADDRESSES)]
+        for process in PROCESSES:
+            process.start()
+
+        # Create instance.
+        ARM = AssociationRuleMining(workers=ADDRESSES, min_sup=0.2, min_cof=0.5)
+
+        # Print support count for all frequent itemsets.
+        for fi in ARM.frequent_itemset():
+            print('support count: {}, itemset: {}'.format(ARM.support_count(fi), fi))
+
+        ARM.close(shutdown=True)
+        for process in PROCESSES:
+            process.join()
@@ -0,0 +1,616 @@
+"""Module for association rules generation.
+
+Use class `AssociationRuleMining` to generate association rules,
+see test section for code example.
+"""
+
+import multiprocessing
+
+from constraint import ItemConstraint
+from encoder import EncodedTransactions, StringToIntegerEncoder, ListToIntegerEncoder, ItemsetView
+from frozen import FrozenModel
+from itemset_trie import ItemsetTrie
+from measure import RULE_BATCH_SIZE, attach_measures, generate_rules, iter_rules, split_itemset
+from shared_index import SharedIndex
+from support_cache import SupportCache
+
+# Shared index attached by each worker process of parallel Eclat.
+_SHARED_INDEX = None
+
+def _attach_index(descriptor):
+    """Attach shared index, initializer of worker process of parallel Eclat.
+
+    Args:
+        descriptor (dict):
+            Returned by `SharedIndex.descriptor()`.
+    """
+
+    global _SHARED_INDEX
+    _SHARED_INDEX = SharedIndex.attach(descriptor)
+
+def _extend_equivalence_class(bitset, items, min_sup, n_transactions):
+    """Join bitset with bitsets of items, and keep frequent ones.
+
+    Args:
+        bitset (numpy.ndarray):
+            Bitset of prefix.
+        items (list of tuple of int and numpy.ndarray and int):
+            Items after prefix, with their bitsets and support counts.
+        min_sup (float):
+            Minimum support for frequent itemset.
+        n_transactions (int):
+            Number of transactions.
+
+    Returns:
+        list of tuple of int and numpy.ndarray and int:
+            Items extending prefix to a frequent itemset,
+            bitset and support count of the extended itemset.
+    """
+
+    next_equivalence_class = []
+    for next_item, next_bitset, _ in items:
+        join_bitset = bitset & next_bitset
+        join_count = _SHARED_INDEX.count(join_bitset)
+        if join_count / n_transactions >= min_sup:
+            next_equivalence_class.append((next_item, join_bitset, join_count))
+    return next_equivalence_class
+
+def _search_equivalence_class(prefix, equivalence_class, settings, result):
+    """Depth first search on prefix equivalence class with shared bitsets.
+
+    Same search as `AssociationRuleMining.__eclat`, but all itemsets are kept in result,
+    constraint is checked by caller.
+
+    Args:
+        prefix (list of int):
+            Encoded itemset shared by all itemsets in equivalence class.
+        equivalence_class (list of tuple of int and numpy.ndarray and int):
+            Item which extends prefix to a frequent itemset,
+            bitset and support count of the extended itemset.
+        settings (tuple):
+            Required itemset, minimum support, number of transactions and max_k.
+        result (list of tuple of list of int and int):
+            Frequent itemsets (with required items) paired with support count.
+    """
+
+    required_itemset, min_sup, n_transactions, max_k = settings
+    for i, (item, bitset, count) in enumerate(equivalence_class):
+        itemset = sorted(prefix + [item] + required_itemset)
+        result.append((itemset, count))
+        if len(itemset) >= max_k:
+            continue
+        next_equivalence_class = _extend_equivalence_class(bitset, equivalence_class[i+1:],
+                                                           min_sup, n_transactions)
+        if next_equivalence_class:
+            _search_equivalence_class(prefix + [item], next_equivalence_class, settings, result)
+
+def _mine_equivalence_class(args):
+    """Mine frequent itemsets whose smallest searched item is the first given item.
+
+    Worker of parallel Eclat, bitsets are read from shared index without copying.
+
+    Args:
+        args (tuple):
+            Row of bitset of the first searched item in shared index,
+            items of top level equivalence class from the first searched item,
+            their support counts, required itemset, minimum support,
+            number of transactions and max_k.
+
+    Returns:
+        list of tuple of list of int and int:
+            Frequent itemsets (with required items) paired with support count.
+    """
+
+    row, items, counts, required_itemset, min_sup, n_transactions, max_k = args
+    settings = (required_itemset, min_sup, n_transactions, max_k)
+
+    # Shared bitsets are already restricted to transactions with required items.
+    equivalence_class = [(item, _SHARED_INDEX.bitset(row + i), count)
+                         for i, (item, count) in enumerate(zip(items, counts))]
+
+    # Only the first item is searched, later items are given to other tasks.
+    item, bitset, count = equivalence_class[0]
+    result = [(sorted([item] + required_itemset), count)]
+    if len(result[0][0]) < max_k:
+        next_equivalence_class = _extend_equivalence_class(bitset, equivalence_class[1:],
+                                                           min_sup, n_transactions)
+        _search_equivalence_class([item], next_equivalence_class, settings, result)
+    return result
+
+class AssociationRuleMining:
+    """Generate association rule with Eclat algorithm.
+
+    This class use vertical representation of transactions:
+    each item is mapped into a bitset of transactions containing it,
+    and support count of itemset is the popcount of bitwise and of its items' bitsets.
+    Frequent itemsets are generated by depth first search on prefix equivalence classes.
+    """
+
+    def __init__(self, transactions=None, min_sup=0.1, min_cof=0.1, max_k=0,
+                 constraint=None, min_lift=0,
+                 support_cache=None, n_jobs=1):
+        """Initialize settings for association rule mining.
+
+        Args:
+            transactions （list of list of item):
+                Transaction database, or `EncodedTransactions` to skip encoding.
+            min_sup (float):
+                Minimum support for frequent itemset.
+            min_cof (float):
+                Minimum confidence for association rule.
+            max_k (int):
+                Maximum size for freuent itemset (k-itemset).
+            constraint (ItemConstraint):
+                Item and length constraints pushed into mining.
+            min_lift (float):
+                Minimum lift for association rule.
+            support_cache (SupportCache):
+                Cache of support counts, default to an unbounded cache.
+            n_jobs (int):
+                Number of processes for parallel Eclat,
+                mine in single process if not greater than 1.
+        """
+
+        self.__min_sup = min_sup
+        self.__min_cof = min_cof
+        self.__min_lift = min_lift
+        self.__n_jobs = n_jobs
+        self.__sup_count = SupportCache() if support_cache is None else support_cache
+        self.__frequent_k_itemset = {}
+        self.__association_rules = []
+        self.__trie = None
+        self.__rule_measures = {}
+        self.__item_encoder = StringToIntegerEncoder()
+        self.__itemset_encoder = ListToIntegerEncoder()
+        self.__transactions = transactions
+
+        # Encode transactions to speed up calculation,
+        # identical transactions are collapsed and paired with their count.
+        # Transactions already encoded (such as by ingestion) are adopted as they are.
+        if isinstance(transactions, EncodedTransactions):
+            self.__item_encoder = transactions.item_encoder()
+            self.__encoded_transactions = transactions.encoded_transactions()
+        else:
+            self.__encoded_transactions = (self
+                                           .__item_encoder
+                                           .encode_from_list_of_string_list_with_count(transactions))
+        self.__n_transactions = len(transactions)
+
+        # Push item constraints into mining by starting search from required items.
+        self.__constraint = constraint or ItemConstraint()
+        self.__encoded_constraint = self.__constraint.encode(self.__item_encoder)
+
+        self.__max_k = max_k
+        if self.__max_k <= 0:
+            for transaction, _ in self.__encoded_transactions:
+                if self.__max_k < len(transaction):
+                    self.__max_k = len(transaction)
+
+        # Give transactions with the same count consecutive ids,
+        # so weighted popcount only needs one shift and mask for each distinct count.
+        self.__encoded_transactions.sort(key=lambda pair: pair[1])
+        self.__count_ranges = []
+        for tid, (_, count) in enumerate(self.__encoded_transactions):
+            if self.__count_ranges and self.__count_ranges[-1][0] == count:
+                self.__count_ranges[-1][2] = self.__count_ranges[-1][2] + 1
+            else:
+                self.__count_ranges.append([count, tid, 1])
+        self.__count_ranges = [(count, start, (1 << length) - 1)
+                               for count, start, length in self.__count_ranges]
+
+        # Build vertical representation of frequent items only,
+        # since no frequent itemset contains an infrequent item.
+        item_count = {}
+        for transaction, count in self.__encoded_transactions:
+            for item in transaction:
+                item_count[item] = item_count.get(item, 0) + count
+        self.__tid_bitset = {item: 0 for item, count in item_count.items()
+                             if count / self.__n_transactions >= self.__min_sup}
+        for tid, (transaction, _) in enumerate(self.__encoded_transactions):
+            for item in transaction:
+                if item in self.__tid_bitset:
+                    self.__tid_bitset[item] = self.__tid_bitset[item] | (1 << tid)
+
+    def __bitset_count(self, bitset):
+        """Weighted popcount of transaction bitset.
+
+        This method is intended to be private.
+
+        Args:
+            bitset (int):
+                Bitset of transaction ids.
+
+        Returns:
+            int:
+                Number of transactions in bitset, counting duplicated transactions.
+        """
+
+        return sum(count * ((bitset >> start) & mask).bit_count()
+                   for count, start, mask in self.__count_ranges)
+
+    def support_count(self, itemset):
+        """Support count for the itemset.
+
+        The input itemset will first be encoded element-wised (encode each item),
+        then be encoded list-wised (encode the encoded itemset).
+        Using bitwise and of items' bitsets to count support,
+        itemset with an infrequent item (which has no bitset) is counted by scanning transactions.
+        If itemset is already encoded before input,
+        it will be given a zero support count as return.
+
+        Args:
+            itemset (list of item):
+                Item cannot be encoded form.
+
+        Returns:
+            int:
+                Support count for the given itemset.
+        """
+
+        # Encode items in itemset without growing encoder,
+        # item never seen before is in no transaction.
+        itemset = self.__item_encoder.lookup_string_list(itemset)
+        if itemset is None:
+            return 0
+
+        # Sorted items are the key of support count cache, so evicted keys are freed.
+        key = tuple(itemset)
+
+        # If already calculated before, skip the calculation process.
+        sup_count = self.__sup_count.get(key)
+        if sup_count is not None:
+            pass
+        # Else if all items are frequent, intersect bitsets of all items.
+        elif all(item in self.__tid_bitset for item in itemset):
+            bitset = (1 << len(self.__encoded_transactions)) - 1
+            for item in itemset:
+                bitset = bitset & self.__tid_bitset[item]
+            sup_count = self.__bitset_count(bitset)
+            self.__sup_count.put(key, sup_count)
+        # Else count transactions containing itemset.
+        else:
+            itemset = set(itemset)
+            sup_count = sum(count for transaction, count in self.__encoded_transactions
+                            if itemset.issubset(transaction))
+            self.__sup_count.put(key, sup_count)
+
+        # Support count cached result.
+        return sup_count
+
+    def support(self, itemset):
+        """Support for the itemset.
+
+        Calculate the ratio of itemset appeared in all transaction.
+        If itemset is already encoded before input,
+        it will be given a zero support as return.
+
+        Args:
+            itemset (list of item):
+                Item cannot be encoded form.
+
+        Returns:
+            int:
+                Support for the given itemset.
+        """
+
+        return self.support_count(itemset) / self.__n_transactions
+
+    def confidence(self, itemset_1, itemset_2):
+        """Confidence of association rule `itemset_1` -> `itemset_2`.
+
+        If `itemset_1` or `itemset_2` is already encoded before input,
+        it will be given a zero confidence as return.
+
+        Args:
+            itemset_1 (list of item):
+                Denominator of confidence formula.
+            itemset_2 (list of item):
+                Combine with `itemset_1` to form nominator of confidence formula.
+
+        Returns:
+            float:
+                Confidence of the given association rule.
+        """
+
+        return self.support_count(itemset_1 + itemset_2) / self.support_count(itemset_1)
+
+    def __eclat(self, prefix, equivalence_class):
+        """Depth first search on prefix equivalence class.
+
+        Required items of constraint are not in prefix,
+        but their bitsets are already and-ed into bitsets of equivalence class.
+        This method is intended to be private.
+
+        Args:
+            prefix (list of int):
+                Encoded itemset shared by all itemsets in equivalence class.
+            equivalence_class (list of tuple of int and int and int):
+                Item which extends prefix to a frequent itemset,
+                bitset and support count of the extended itemset.
+        """
+
+        required_itemset = self.__encoded_constraint.required_itemset()
+        for i, (item, bitset, count) in enumerate(equivalence_class):
+            itemset = sorted(prefix + [item] + required_itemset)
+            if self.__encoded_constraint.satisfy(itemset):
+                encoded_itemset = self.__itemset_encoder.encode_from_list(itemset)
+                self.__frequent_k_itemset[len(itemset)].add(encoded_itemset)
+                self.__sup_count.put(self.__itemset_encoder.decode_to_tuple(encoded_itemset), count, pin=True)
+
+            if len(itemset) >= self.__max_k:
+                continue
+
+            # Extend itemset with items after it.
+            next_equivalence_class = []
+            for next_item, next_bitset, _ in equivalence_class[i+1:]:
+                join_bitset = bitset & next_bitset
+                join_count = self.__bitset_count(join_bitset)
+                if join_count / self.__n_transactions >= self.__min_sup:
+                    next_equivalence_class.append((next_item, join_bitset, join_count))
+            if next_equivalence_class:
+                self.__eclat(prefix + [item], next_equivalence_class)
+
+    def __parallel_eclat(self, required_itemset, equivalence_class):
+        """Parallel Eclat over top level equivalence class.
+
+        Each task searches itemsets whose smallest searched item is one item of the class,
+        so results of all tasks are disjoint.
+        Transactions and bitsets of items in the class are put into a `SharedIndex` once,
+        one row per item in class order, and every worker process attaches to it
+        instead of receiving a pickled copy, so tasks only carry item ids and rows.
+        This method is intended to be private.
+
+        Args:
+            required_itemset (list of int):
+                Encoded required items of constraint.
+            equivalence_class (list of tuple of int and int and int):
+                Frequent items with their bitsets and support counts.
+        """
+
+        items = [item for item, _, _ in equivalence_class]
+        counts = [count for _, _, count in equivalence_class]
+        bitsets = [bitset for _, bitset, _ in equivalence_class]
+        with SharedIndex(self.__encoded_transactions, bitsets) as index:
+            with multiprocessing.Pool(self.__n_jobs,
+                                      initializer=_attach_index,
+                                      initargs=(index.descriptor(),)) as pool:
+                results = pool.imap_unordered(_mine_equivalence_class,
+                                              [(i,
+                                                items[i:],
+                                                counts[i:],
+                                                required_itemset,
+                                                self.__min_sup,
+                                                self.__n_transactions,
+                                                self.__max_k)
+                                               for i in range(len(items))])
+                for result in results:
+                    for itemset, count in result:
+                        if self.__encoded_constraint.satisfy(itemset):
+                            encoded_itemset = self.__itemset_encoder.encode_from_list(itemset)
+                            self.__frequent_k_itemset[len(itemset)].add(encoded_itemset)
+                            self.__sup_count.put(self.__itemset_encoder.decode_to_tuple(encoded_itemset), count, pin=True)
+
+    def support_cache_stats(self):
+        """Statistics of support count cache.
+
+        Returns:
+            dict:
+                See `SupportCache.stats` for keys.
+        """
+
+        return self.__sup_count.stats()
+
+    def frequent_k_itemset(self, k=1):
+        """Frequent k-itemset of the transactions.
+
+        If support of an k-itemset is greater than minimum support threshold,
+        it will be in the list of frequent k-itemset.
+        All frequent itemsets are generated at first call.
+
+        Args:
+            k (int):
+                size of frequent itemset
+
+        Returns:
+            ItemsetView of k-itemset:
+                Itemsets in list are frequent k-itemset.
+
+        Raises:
+            ValueError:
+                Valid range of k should be 0 < k <= self.max_k.
+        """
+
+        # Validation for k.
+        if k <= 0:
+            raise ValueError('k should be greater than 0.')
+        if k > self.__max_k:
+            raise ValueError('k should be smaller than or equal to max_k={}.'.format(self.__max_k))
+
+        # If already calculated before, skip the calculation process.
+        if k in self.__frequent_k_itemset:
+            pass
+        # Else search all frequent itemsets from frequent 1-itemset.
+        else:
+            for i in range(self.__max_k):
+                self.__frequent_k_itemset[i+1] = set()
+
+            # Push required items by starting search from their transactions.
+            required_itemset = self.__encoded_constraint.required_itemset()
+            required_bitset = (1 << len(self.__encoded_transactions)) - 1
+            for item in required_itemset:
+                required_bitset = required_bitset & self.__tid_bitset.get(item, 0)
+            required_count = self.__bitset_count(required_bitset)
+            if (required_itemset
+                    and len(required_itemset) <= self.__max_k
+                    and required_count / self.__n_transactions >= self.__min_sup
+                    and self.__encoded_constraint.satisfy(required_itemset)):
+                encoded_itemset = self.__itemset_encoder.encode_from_list(required_itemset)
+                self.__frequent_k_itemset[len(required_itemset)].add(encoded_itemset)
+                self.__sup_count.put(self.__itemset_encoder.decode_to_tuple(encoded_itemset), required_count, pin=True)
+
+            # Excluded items are never searched.
+            equivalence_class = []
+            for item in sorted(self.__tid_bitset):
+                if item in required_itemset or not self.__encoded_constraint.allow_item(item):
+                    continue
+                bitset = self.__tid_bitset[item] & required_bitset
+                count = self.__bitset_count(bitset)
+                if count / self.__n_transactions >= self.__min_sup:
+                    equivalence_class.append((item, bitset, count))
+            if len(required_itemset) < self.__max_k:
+                if self.__n_jobs > 1 and len(equivalence_class) > 1:
+                    self.__parallel_eclat(required_itemset, equivalence_class)
+                else:
+                    self.__eclat([], equivalence_class)
+
+        # Frequent k-itemset cached result, decoded only when touched.
+        return ItemsetView(self.__item_encoder,
+                           [self.__itemset_encoder.decode_to_tuple(k_itemset)
+                            for k_itemset in self.__frequent_k_itemset[k]])
+
+    def frequent_itemset(self, len_descend=True):
+        """Frequent itemset of the transactions.
+
+        Calculate frequent k-itemset, k=1, ..., self.max_k,
+        and combine result to form frequent itemset.
+
+        Args:
+            len_descend (bool):
+                Show frequent itemset list in descend length order.
+
+        Returns:
+            ItemsetView of frequent itemset:
+                All frequent itemsets of the transactions.
+        """
+
+        f_itemset = []
+        for k in range(self.__max_k):
+            f_itemset.extend(self.frequent_k_itemset(k+1).encoded())
+        f_itemset.sort(key=len, reverse=len_descend)
+        return ItemsetView(self.__item_encoder, f_itemset)
+
+    def association_rules(self, measures=False):
+        """List all association rules of the transactions.
+
+        Split frequent itemset into two part, and calculate confidence.
+        Number of possible conbination of split is Stiring number of second kind.
+        Measures of all rules are calculated in bulk from cached support counts,
+        and rules with lift smaller than `min_lift` are never generated.
+
+        Args:
+            measures (bool):
+                Also return interestingness measures of each rule.
+
+        Returns:
+            list of dict:
+                Each dict has two keys,
+                'condition' stands occurence of itemset,
+                'prediction' stands cooccurence itemset.
+                If `measures` is set, each dict also has keys in `measure.MEASURES`.
+        """
+
+        # If already calculated before, skip the calculation process.
+        if self.__association_rules:
+            pass
+        # Else enumerate frequent itemset, split into two part and calculate measures.
+        else:
+            self.__association_rules, self.__rule_measures = generate_rules(
+                self.trie(),
+                split_itemset,
+                self.support_count,
+                self.__constraint.allow_rule,
+                self.__n_transactions,
+                self.__min_cof,
+                self.__min_lift)
+
+        if measures:
+            return attach_measures(self.__association_rules, self.__rule_measures)
+
+        # Association rule cached result.
+        return self.__association_rules
+
+    def iter_association_rules(self, batch_size=RULE_BATCH_SIZE):
+        """Stream association rules with their measures.
+
+        Rules are generated batch by batch and are not cached,
+        so memory does not grow with number of rules.
+
+        Args:
+            batch_size (int):
+                Number of candidate rules measured together.
+
+        Yields:
+            dict:
+                Association rule as in `association_rules(measures=True)`.
+        """
+
+        for rules, measures in iter_rules(
+                self.trie(),
+                split_itemset,
+                self.support_count,
+                self.__constraint.allow_rule,
+                self.__n_transactions,
+                self.__min_cof,
+                self.__min_lift,
+                batch_size):
+            yield from attach_measures(rules, measures)
+
+    def trie(self):
+        """Frequent itemsets with support counts in a prefix trie.
+
+        Built once from `frequent_itemset()`, and shared by rule generation and `freeze()`.
+
+        Returns:
+            ItemsetTrie:
+                Trie for support, subset and superset queries of frequent itemsets.
+        """
+
+        # If already built before, skip the building process.
+        if self.__trie is None:
+            self.__trie = ItemsetTrie([(f_itemset, self.support_count(f_itemset))
+                                       for f_itemset in self.frequent_itemset()])
+
+        # Trie cached result.
+        return self.__trie
+
+    def freeze(self):
+        """Immutable model of mining result for concurrent queries.
+
+        Queries of frozen model never mutate caches or encoders,
+        so one frozen model can be shared by many threads.
+        Later changes of this object are not reflected in frozen model.
+
+        Returns:
+            FrozenModel:
+                Frequent itemsets, supports and association rules.
+        """
+
+        return FrozenModel(self.trie(),
+                           self.association_rules(measures=True),
+                           self.__n_transactions,
+                           self.support_count)
+
+# Test section.
+if __name__ == '__main__':
+    import json
+    import os
+    # Load data.
+    DATA_PATH = os.path.dirname(os.path.abspath(__file__)) + '/data'
+    DATA_NAME = '/example.json'
+
+    with open(DATA_PATH + DATA_NAME, 'r') as f:
+        # Create instance.
+        ARM = AssociationRuleMining(transactions=json.loads(f.read()),
+                                    min_sup=0.6,
+                                    min_cof=0.5)
+
+        # Print support count for all frequent itemsets.
+        for fi in ARM.frequent_itemset():
+            print('support count: {}, itemset: {}'.format(ARM.support_count(fi), fi))
+
+        # Print confidence for all association rules.
+        for rule in ARM.association_rules():
+            print('confidence: {:.4f}, rule: {} -> {}'
+                  .format(ARM.confidence(rule['condition'], rule['prediction']),
+                          ''.join(rule['condition']),
+                          ''.join(rule['prediction'])))
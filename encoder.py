@@ -2,10 +2,11 @@
 
 StringToIntegerEncoder encode string into integer.
 ListToIntegerEncoder encode list into integer.
+ItemsetView shows encoded itemsets as read-only list of decoded itemsets.
 See test section for code example.
 """
 
-import json
+import collections.abc
 
 class StringToIntegerEncoder:
     """Encode string into integer. """
@@ -61,6 +62,19 @@ class StringToIntegerEncoder:
             raise ValueError('Integer {} is not encoded before.'.format(integer))
         return self.__decode_table[integer]
 
+    def retain(self, integers):
+        """Forget strings whose integers are not given.
+
+        Integers are never reused, so remaining strings keep their integers.
+
+        Args:
+            integers (set of int):
+                Integers to keep.
+        """
+
+        for integer in [integer for integer in self.__decode_table if integer not in integers]:
+            del self.__encode_table[self.__decode_table.pop(integer)]
+
     def encode_from_string_list(self, string_list):
         """Encode list of strings into list of integers.
 
@@ -79,6 +93,28 @@ class StringToIntegerEncoder:
         integer_list.sort()
         return integer_list
 
+    def lookup_string_list(self, string_list):
+        """Encode list of strings without encoding unseen strings.
+
+        Queries use it so that encoder does not grow with ad-hoc itemsets.
+
+        Args:
+            string_list (list of str):
+                Target list of string to encode.
+
+        Returns:
+            list of int:
+                Encoded list of integers in ascending order,
+                or None if any string is not seen before.
+        """
+
+        try:
+            integer_list = [self.__encode_table[string] for string in string_list]
+        except (KeyError, TypeError):
+            return None
+        integer_list.sort()
+        return integer_list
+
     def decode_to_string_list(self, integer_list):
         """Decode list of integers into list of string.
 
@@ -114,6 +150,28 @@ class StringToIntegerEncoder:
 
         return [self.encode_from_string_list(string_list) for string_list in list_of_string_list]
 
+    def encode_from_list_of_string_list_with_count(self, list_of_string_list):
+        """Encode list of list of strings and collapse identical encoded lists.
+
+        Identical lists (after sorting encoded integers) are stored only once,
+        paired with number of times it appeared.
+        Collapsed result keeps the order of first appearance.
+
+        Args:
+            list_of_string_list (list of list of str):
+                Target list of list of string to encode.
+
+        Returns:
+            list of tuple of list of int and int:
+                Encoded list of integers paired with its count.
+        """
+
+        counter = {}
+        for string_list in list_of_string_list:
+            integer_tuple = tuple(self.encode_from_string_list(string_list))
+            counter[integer_tuple] = counter.get(integer_tuple, 0) + 1
+        return [(list(integer_tuple), count) for integer_tuple, count in counter.items()]
+
     def decode_to_list_of_string_list(self, list_of_integer_list):
         """Decode list of list of integers into list of list of string.
 
@@ -137,14 +195,77 @@ class StringToIntegerEncoder:
         except:
             raise ValueError('Some part of integer_list are not encoded before.')
 
+class EncodedTransactions:
+    """Transactions already encoded by a `StringToIntegerEncoder`.
+
+    Mining engines adopt encoder and encoded transactions instead of encoding again,
+    and iterating yields decoded transactions for any other consumer.
+    """
+
+    def __init__(self, item_encoder, encoded_transactions, item_count=None):
+        """Initialize encoded transactions.
+
+        Args:
+            item_encoder (StringToIntegerEncoder):
+                Encoder of all items in transactions.
+            encoded_transactions (list of tuple of list of int and int):
+                Sorted encoded transactions paired with count, identical ones are collapsed.
+            item_count (dict of int to int):
+                Number of occurrences of each encoded item, if already counted.
+        """
+
+        self.__item_encoder = item_encoder
+        self.__encoded_transactions = encoded_transactions
+        self.__item_count = item_count
+        self.__n_transactions = sum(count for _, count in encoded_transactions)
+
+    def __len__(self):
+        return self.__n_transactions
+
+    def __iter__(self):
+        for integer_list, count in self.__encoded_transactions:
+            string_list = self.__item_encoder.decode_to_string_list(integer_list)
+            for _ in range(count):
+                yield list(string_list)
+
+    def item_encoder(self):
+        """Encoder of items, shared with mining engines adopting transactions.
+
+        Returns:
+            StringToIntegerEncoder:
+                Encoder of all items in transactions.
+        """
+
+        return self.__item_encoder
+
+    def encoded_transactions(self):
+        """Encoded transactions paired with count.
+
+        Returns:
+            list of tuple of list of int and int:
+                Shallow copy of encoded transactions.
+        """
+
+        return list(self.__encoded_transactions)
+
+    def item_count(self):
+        """Number of occurrences of each encoded item.
+
+        Returns:
+            dict of int to int:
+                Copy of item counts, or None if not counted.
+        """
+
+        return None if self.__item_count is None else dict(self.__item_count)
+
 class ListToIntegerEncoder:
     """Encode list into integer."""
 
     def __init__(self):
         """Use dict object to hash list.
 
-        `__encode_table` will hash list into integer.
-        `__decode_table` will hash integer into list.
+        `__encode_table` will hash tuple of list into integer.
+        `__decode_table` will hash integer into tuple of list.
         `__code` stands for current hash integer range.
         """
         self.__encode_table = {}
@@ -154,11 +275,11 @@ class ListToIntegerEncoder:
     def encode_from_list(self, target_list):
         """Encode list into integer.
 
-        Using `json.dumps` to convert list into string, then hash string into integer.
+        Convert list into tuple, then hash tuple into integer.
         If `target_list` is not seen before, use `__code` to represent `target_list`.
 
         Args:
-            target_list (list):
+            target_list (list of int):
                 Target list to encode.
 
         Returns:
@@ -166,12 +287,26 @@ class ListToIntegerEncoder:
                 Encoded integer.
         """
 
-        json_string = json.dumps(target_list)
-        if json_string not in self.__encode_table:
-            self.__encode_table[json_string] = self.__code
-            self.__decode_table[self.__code] = json_string
+        target_tuple = tuple(target_list)
+        if target_tuple not in self.__encode_table:
+            self.__encode_table[target_tuple] = self.__code
+            self.__decode_table[self.__code] = target_tuple
             self.__code = self.__code + 1
-        return self.__encode_table[json_string]
+        return self.__encode_table[target_tuple]
+
+    def lookup_list(self, target_list):
+        """Encode list into integer without encoding unseen list.
+
+        Args:
+            target_list (list of int):
+                Target list to encode.
+
+        Returns:
+            int:
+                Encoded integer, or None if `target_list` is not seen before.
+        """
+
+        return self.__encode_table.get(tuple(target_list))
 
     def decode_to_list(self, integer):
         """Decode integer into list.
@@ -189,10 +324,97 @@ class ListToIntegerEncoder:
                 If integer is not seen before.
         """
 
-        try:
-            return json.loads(self.__decode_table[integer])
-        except:
+        return list(self.decode_to_tuple(integer))
+
+    def decode_to_tuple(self, integer):
+        """Decode integer into tuple without copying.
+
+        Args:
+            integer (int):
+                Target integer to decode.
+
+        Returns:
+            tuple:
+                Decoded tuple.
+
+        Raises:
+            ValueError:
+                If integer is not seen before.
+        """
+
+        if integer not in self.__decode_table:
             raise ValueError('Integer {} is not encoded before.'.format(integer))
+        return self.__decode_table[integer]
+
+class ItemsetView(collections.abc.Sequence):
+    """Read-only list of itemsets, kept encoded and decoded only when touched.
+
+    Indexing or iterating decodes itemsets one by one into new lists of items,
+    so mutating a decoded itemset never changes the view.
+    Callers which do not need items can read item ids with `encoded()`,
+    and decode them later with `item_encoder()`.
+    View compares equal to list of the same decoded itemsets,
+    and adding a list to view gives a list.
+    """
+
+    def __init__(self, item_encoder, encoded_itemsets):
+        """Initialize view of encoded itemsets.
+
+        Args:
+            item_encoder (StringToIntegerEncoder):
+                Encoder of items in itemsets.
+            encoded_itemsets (list of tuple of int):
+                Item ids of each itemset.
+        """
+
+        self.__item_encoder = item_encoder
+        self.__encoded_itemsets = tuple(encoded_itemsets)
+
+    def __len__(self):
+        return len(self.__encoded_itemsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ItemsetView(self.__item_encoder, self.__encoded_itemsets[index])
+        return self.__item_encoder.decode_to_string_list(self.__encoded_itemsets[index])
+
+    def __eq__(self, other):
+        if isinstance(other, ItemsetView):
+            other = list(other)
+        if not isinstance(other, list):
+            return NotImplemented
+        return list(self) == other
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def encoded(self):
+        """Item ids of each itemset, without decoding.
+
+        Returns:
+            tuple of tuple of int:
+                Item ids of each itemset, in the same order as view.
+        """
+
+        return self.__encoded_itemsets
+
+    def item_encoder(self):
+        """Encoder of items in itemsets.
+
+        Returns:
+            StringToIntegerEncoder:
+                Encoder decoding item ids of `encoded()`.
+        """
+
+        return self.__item_encoder
 
 # Test section.
 if __name__ == '__main__':
@@ -224,6 +446,20 @@ if __name__ == '__main__':
     for result, answer in zip(STIE.decode_to_list_of_string_list(DECODED_SOURCE), DECODED_ANSWER):
         assert result == answer, 'Bug in `StringToIntegerEncoder.decode_to_list_of_string_list`.'
 
+    ENCODED_SOURCE = [
+        ['a', 'b'],
+        ['b', 'a'],
+        ['c'],
+        ['a', 'b'],
+    ]
+    ENCODED_ANSWER = [
+        ([0, 1], 3),
+        ([2], 1),
+    ]
+    STIE = StringToIntegerEncoder()
+    assert STIE.encode_from_list_of_string_list_with_count(ENCODED_SOURCE) == ENCODED_ANSWER, \
+        'Bug in `StringToIntegerEncoder.encode_from_list_of_string_list_with_count`.'
+
     ENCODED_SOURCE = [
         ['0', '1'],
         ['0', '1'],
@@ -259,3 +495,11 @@ if __name__ == '__main__':
     for source, answer in zip(DECODED_SOURCE, DECODED_ANSWER):
         assert LTIE.decode_to_list(source) == answer, \
             'Bug in `ListToIntegerEncoder.decode_to_list`.'
+
+    STIE = StringToIntegerEncoder()
+    VIEW = ItemsetView(STIE, [tuple(STIE.encode_from_string_list(itemset))
+                              for itemset in [['a', 'b'], ['c']]])
+    assert VIEW == [['a', 'b'], ['c']] and VIEW[-1:] == [['c']] and ['c'] in VIEW, \
+        'Bug in `ItemsetView`.'
+    assert VIEW.encoded() == ((0, 1), (2,)) and VIEW + [['d']] == [['a', 'b'], ['c'], ['d']], \
+        'Bug in `ItemsetView`.'
@@ -4,7 +4,197 @@ Use class `AssociationRuleMining` to generate association rules,
 see test section for code example.
 """
 
-from encoder import StringToIntegerEncoder, ListToIntegerEncoder
+import multiprocessing
+
+import numpy as np
+
+from budget import MiningCheckpoint
+from constraint import ItemConstraint
+from encoder import EncodedTransactions, StringToIntegerEncoder, ListToIntegerEncoder, ItemsetView
+from frozen import FrozenModel
+from itemset_trie import ItemsetTrie
+from measure import RULE_BATCH_SIZE, attach_measures, generate_rules, iter_rules, split_itemset
+from shared_index import SharedIndex
+from support_cache import SupportCache
+
+# Shared index attached by each worker process of parallel FP-Growth.
+_SHARED_INDEX = None
+
+def _attach_index(descriptor):
+    """Attach shared index, initializer of worker process of parallel FP-Growth.
+
+    Args:
+        descriptor (dict):
+            Returned by `SharedIndex.descriptor()`.
+    """
+
+    global _SHARED_INDEX
+    _SHARED_INDEX = SharedIndex.attach(descriptor)
+
+def _build_fp_tree(pattern_base, min_count, f_rank=None, stop=None):
+    """Build fp tree from weighted transactions.
+
+    Infrequent items are removed, and items in each transaction are sorted
+    by descending support count, then by ascending item code.
+
+    Args:
+        pattern_base (list of tuple of list of int and int):
+            Encoded transactions paired with count.
+        min_count (float):
+            Minimum support count for frequent item.
+        f_rank (dict):
+            If given, sort items by this rank instead of support count.
+        stop (callable):
+            If given, checked for every transaction,
+            building stops once it returns True and fp tree is incomplete.
+
+    Returns:
+        tuple of dict and dict:
+            Header table maps item into list of tree nodes,
+            and item support count of frequent items.
+    """
+
+    item_count = {}
+    for transaction, count in pattern_base:
+        if stop is not None and stop():
+            return {}, {}
+        for item in transaction:
+            item_count[item] = item_count.get(item, 0) + count
+    item_count = {item: count for item, count in item_count.items() if count >= min_count}
+
+    header_table = {}
+    root = {'item': None, 'value': 0, 'child': {}, 'parent': None}
+    for transaction, count in pattern_base:
+        if stop is not None and stop():
+            return {}, {}
+        transaction = [item for item in transaction if item in item_count]
+        if f_rank is None:
+            transaction.sort(key=lambda item: (-item_count[item], item))
+        else:
+            transaction.sort(key=f_rank.get)
+        current_node = root
+        for item in transaction:
+            if item not in current_node['child']:
+                current_node['child'][item] = {'item': item,
+                                               'value': 0,
+                                               'child': {},
+                                               'parent': current_node}
+                header_table.setdefault(item, []).append(current_node['child'][item])
+            current_node = current_node['child'][item]
+            current_node['value'] = current_node['value'] + count
+    return header_table, item_count
+
+def _mine_fp_tree(header_table, item_count, suffix, min_count, max_k, items, result,
+                  stop=None, step=None):
+    """Mine frequent itemsets by growing suffix with conditional fp trees.
+
+    Itemsets grown from each item of an unconditioned fp tree are collected apart,
+    so an item unfinished when `stop` returns True is dropped as a whole.
+
+    Args:
+        header_table (dict):
+            Header table of fp tree, maps item into list of tree nodes.
+        item_count (dict):
+            Support count of frequent items in fp tree.
+        suffix (list of int):
+            Encoded itemset which fp tree is conditioned on.
+        min_count (float):
+            Minimum support count for frequent itemset.
+        max_k (int):
+            Maximum size for freuent itemset (k-itemset).
+        items (iterable of int):
+            Only grow suffix with these items.
+        result (dict):
+            Map frequent itemset (sorted tuple of int) into support count.
+        stop (callable):
+            If given, checked for every item and every transaction of conditional fp tree,
+            mining stops once it returns True.
+        step (callable):
+            If given and `suffix` is empty, called with item and its frequent itemsets
+            once item is finished, instead of adding them to `result`.
+    """
+
+    for item in items:
+        if item not in header_table:
+            continue
+        if stop is not None and stop():
+            return
+        item_result = result if suffix else {}
+        itemset = [item] + suffix
+        item_result[tuple(sorted(itemset))] = item_count[item]
+
+        if len(itemset) < max_k:
+            # Conditional pattern base of item: prefix paths of all item nodes.
+            conditional_pattern_base = []
+            for node in header_table[item]:
+                path = []
+                parent_node = node['parent']
+                while parent_node['item'] is not None:
+                    path.append(parent_node['item'])
+                    parent_node = parent_node['parent']
+                if path:
+                    conditional_pattern_base.append((path, node['value']))
+
+            conditional_header_table, conditional_item_count = _build_fp_tree(conditional_pattern_base,
+                                                                              min_count,
+                                                                              stop=stop)
+            if conditional_header_table:
+                _mine_fp_tree(conditional_header_table,
+                              conditional_item_count,
+                              itemset,
+                              min_count,
+                              max_k,
+                              list(conditional_header_table),
+                              item_result,
+                              stop)
+
+        # Keep itemsets of finished item only.
+        if suffix:
+            continue
+        if stop is not None and stop():
+            return
+        if step is None:
+            result.update(item_result)
+        else:
+            step(item, item_result)
+
+def _mine_group(args):
+    """Mine frequent itemsets of one item group.
+
+    Worker of parallel FP-Growth. Only itemsets whose least frequent item
+    belongs to the group are mined, so results of all groups are disjoint.
+    Group-dependent transactions are sliced from transactions in shared index,
+    which only keep frequent items in F-list order,
+    each transaction only keeps its prefix ending at the last item of the group,
+    whose length is given by parent in array 'group_ends'.
+
+    Args:
+        args (tuple):
+            Group, group items, F-list rank, minimum support count and max_k.
+
+    Returns:
+        dict:
+            Map frequent itemset (sorted tuple of int) into support count.
+    """
+
+    group, group_items, f_rank, min_count, max_k = args
+
+    # Only transactions containing items of the group are visited.
+    items = _SHARED_INDEX.array('items')
+    offsets = _SHARED_INDEX.array('offsets')
+    counts = _SHARED_INDEX.array('counts')
+    ends = _SHARED_INDEX.array('group_ends')[:, group]
+    tids = np.flatnonzero(ends)
+    pattern_base = [(items[start:start+end].tolist(), count)
+                    for start, end, count in zip(offsets[tids].tolist(),
+                                                  ends[tids].tolist(),
+                                                  counts[tids].tolist())]
+
+    # Keep F-list order, so prefix of group item contains all items before it.
+    header_table, item_count = _build_fp_tree(pattern_base, min_count, f_rank)
+    result = {}
+    _mine_fp_tree(header_table, item_count, [], min_count, max_k, group_items, result)
+    return result
 
 class AssociationRuleMining:
     """Generate association rule with FP-Growth algorithm.
@@ -13,112 +203,93 @@ class AssociationRuleMining:
     thus speed up association rule generation.
     """
 
-    def __init__(self, transactions=None, min_sup=0.1, min_cof=0.1, max_k=0):
+    def __init__(self, transactions=None, min_sup=0.1, min_cof=0.1, max_k=0,
+                 n_jobs=1, constraint=None, min_lift=0,
+                 support_cache=None, budget=None, checkpoint=None):
         """Initialize settings for association rule mining.
 
         Args:
             transactions （list of list of item):
-                Transaction database.
+                Transaction database, or `EncodedTransactions` to skip encoding.
             min_sup (float):
                 Minimum support for frequent itemset.
             min_cof (float):
                 Minimum confidence for association rule.
             max_k (int):
                 Maximum size for freuent itemset (k-itemset).
+            n_jobs (int):
+                Number of processes for parallel FP-Growth,
+                mine in single process if not greater than 1.
+            constraint (ItemConstraint):
+                Item and length constraints pushed into mining.
+            min_lift (float):
+                Minimum lift for association rule.
+            support_cache (SupportCache):
+                Cache of support counts, default to an unbounded cache.
+            budget (MiningBudget):
+                If exceeded, mining stops and only itemsets of completed
+                header items (or item groups in parallel mode) are kept.
+            checkpoint (str):
+                Path of checkpoint file, completed header items (or item groups)
+                are appended to it, and restored from it if it exists.
+
+        Raises:
+            ValueError:
+                If checkpoint is created with different settings.
         """
 
         self.__min_sup = min_sup
         self.__min_cof = min_cof
-        self.__sup_count = {}
+        self.__min_lift = min_lift
+        self.__n_jobs = n_jobs
+        self.__sup_count = SupportCache() if support_cache is None else support_cache
         self.__fp_tree = {}
         self.__frequent_k_itemset = {}
         self.__association_rules = []
+        self.__trie = None
+        self.__rule_measures = {}
         self.__item_encoder = StringToIntegerEncoder()
         self.__itemset_encoder = ListToIntegerEncoder()
         self.__transactions = transactions
 
-        # Encode transactions to speed up calculation.
-        self.__encoded_transactions = (self
-                                       .__item_encoder
-                                       .encode_from_list_of_string_list(transactions))
+        # Encode transactions to speed up calculation,
+        # identical transactions are collapsed and paired with their count.
+        # Transactions already encoded (such as by ingestion) are adopted as they are.
+        if isinstance(transactions, EncodedTransactions):
+            self.__item_encoder = transactions.item_encoder()
+            self.__encoded_transactions = transactions.encoded_transactions()
+        else:
+            self.__encoded_transactions = (self
+                                           .__item_encoder
+                                           .encode_from_list_of_string_list_with_count(transactions))
         self.__n_transactions = len(transactions)
+
+        # Push item constraints into mining by projecting transactions.
+        self.__constraint = constraint or ItemConstraint()
+        self.__encoded_constraint = self.__constraint.encode(self.__item_encoder)
+        self.__mining_transactions = self.__encoded_constraint.project(self.__encoded_transactions)
+
         self.__max_k = max_k
         if self.__max_k <= 0:
-            for transaction in self.__transactions:
+            for transaction, _ in self.__encoded_transactions:
                 if self.__max_k < len(transaction):
                     self.__max_k = len(transaction)
 
-    @staticmethod
-    def __enumerate_k_itemset(transaction, k=0):
-        """Enumerate k-itemset in a transaction.
-
-        Using back tracking algorithm to enumerate all combination of k-itemset.
-        This method is intended to be private.
-
-        Args:
-            transaction (list of item):
-                Target to be enumerated,
-                item can be either encoded or decoded.
-            k (int):
-                Size of itemset.
-
-        Returns:
-            list of k-itemset:
-                All k-itemset will be in list form.
-        """
-
-        all_k_itemset = []
-
-        # Recursive end condition.
-        if k > len(transaction):
-            pass
-        elif k == 1:
-            for item in transaction:
-                all_k_itemset.append([item])
-        else:
-            for i in range(len(transaction)):
-                for k_1_itemset in (AssociationRuleMining
-                                    .__enumerate_k_itemset(transaction[i+1:], k-1)):
-                    k_itemset = [transaction[i]] + k_1_itemset
-                    all_k_itemset.append(k_itemset)
-        return all_k_itemset
-
-    @staticmethod
-    def __split_itemset(itemset):
-        """All possible way of spliting itemset into two smaller itemset.
-
-        Same problem as 2 equivalent class,
-        number of possible combination is Stiring number of second kind S(k, 2).
-        This method is intended to be private.
-
-        Args:
-            itemset (list of item):
-                Target itemset to be splited.
-
-        Returns:
-            list of tuple of list of itemset:
-                All possible combination of two smaller itemset.
-        """
-
-        # Recursive end condition.
-        if len(itemset) == 2:
-            return [([itemset[0]], [itemset[1]])]
-
-        all_split = []
-
-        # First way to split: 1-itemset & k-1-items
-        all_split.append(([itemset[0]], itemset[1:]))
-        for front, back in AssociationRuleMining.__split_itemset(itemset[1:]):
-            # Second way to split: 1-itemset + k-n-1-itemset & n-itemset
-            # Keep order by put 1-itemset at front.
-            new_split1 = ([itemset[0]]+front, back)
-
-            # Third way to split: k-n-1-itemset & 1-itemset + n-itemset
-            # Keep order by put 1-itemset at front.
-            new_split2 = (front, [itemset[0]]+back)
-            all_split.append(new_split1)
-            all_split.append(new_split2)
-        return all_split
+        # Stop mining if budget is exceeded, and resume completed steps from checkpoint.
+        self.__budget = budget
+        self.__partial = False
+        self.__checkpoint = None
+        if checkpoint is not None:
+            self.__checkpoint = MiningCheckpoint(checkpoint, {
+                'engine': 'fp_growth',
+                'min_sup': min_sup,
+                'max_k': self.__max_k,
+                'n_jobs': max(n_jobs, 1),
+                'n_transactions': self.__n_transactions,
+                'n_item_occurrences': sum(len(transaction) * count
+                                          for transaction, count in self.__encoded_transactions),
+                'constraint': self.__constraint.settings(),
+            })
 
     def support_count(self, itemset):
         """Support count for the itemset.
@@ -138,24 +309,29 @@ class AssociationRuleMining:
                 Support count for the given itemset.
         """
 
-        # Encode items in itemset.
-        itemset = self.__item_encoder.encode_from_string_list(itemset)
+        # Encode items in itemset without growing encoder,
+        # item never seen before is in no transaction.
+        itemset = self.__item_encoder.lookup_string_list(itemset)
+        if itemset is None:
+            return 0
 
-        # Encode itemset.
-        encoded_itemset = self.__itemset_encoder.encode_from_list(itemset)
+        # Sorted items are the key of support count cache, so evicted keys are freed.
+        key = tuple(itemset)
 
         # If already calculated before, skip the calculation process.
-        if encoded_itemset in self.__sup_count:
+        sup_count = self.__sup_count.get(key)
+        if sup_count is not None:
             pass
         # Else enumerate all transactions to do support count.
         else:
-            self.__sup_count[encoded_itemset] = 0
-            for transaction in self.__encoded_transactions:
+            sup_count = 0
+            for transaction, count in self.__encoded_transactions:
                 if all(map(lambda item: item in transaction, itemset)):
-                    self.__sup_count[encoded_itemset] = self.__sup_count[encoded_itemset] + 1
+                    sup_count = sup_count + count
+            self.__sup_count.put(key, sup_count)
 
         # Support count cached result.
-        return self.__sup_count[encoded_itemset]
+        return sup_count
 
     def support(self, itemset):
         """Support for the itemset.
@@ -194,85 +370,238 @@ class AssociationRuleMining:
 
         return self.support_count(itemset_1 + itemset_2) / self.support_count(itemset_1)
 
+    def __parallel_fp_growth(self):
+        """Parallel FP-Growth with item-group sharding.
+
+        Frequent items are sorted by descending support count (F-list),
+        and partitioned into `n_jobs` groups with balanced support count,
+        so heavy items are spread over different groups.
+        Each transaction sends to a group only its prefix ending at the last item of that group,
+        then each process builds and mines fp tree of its own group.
+        Transactions (frequent items in F-list order) are put into a `SharedIndex` once,
+        with length of prefix of each transaction for each group,
+        and every worker process attaches to it and slices its own group-dependent transactions,
+        instead of receiving a pickled copy.
+        This method is intended to be private.
+        """
+
+        min_count = self.__min_sup * self.__n_transactions
+
+        # Build F-list.
+        item_count = {}
+        for transaction, count in self.__mining_transactions:
+            for item in transaction:
+                item_count[item] = item_count.get(item, 0) + count
+        f_list = [item for item, count in item_count.items() if count >= min_count]
+        f_list.sort(key=lambda item: (-item_count[item], item))
+        f_rank = {item: rank for rank, item in enumerate(f_list)}
+
+        # Assign heaviest item to the lightest group.
+        group_items = [[] for _ in range(self.__n_jobs)]
+        group_load = [0] * self.__n_jobs
+        item_group = {}
+        for item in f_list:
+            group = group_load.index(min(group_load))
+            group_items[group].append(item)
+            group_load[group] = group_load[group] + item_count[item]
+            item_group[item] = group
+
+        # Skip groups restored from checkpoint.
+        done_steps = self.__restore_checkpoint()
+        groups = [group for group in range(self.__n_jobs) if ('group', group) not in done_steps]
+
+        # Scan transactions once for all groups, 0 if transaction has no item of group.
+        ranked_transactions = []
+        group_ends = np.zeros((len(self.__mining_transactions), self.__n_jobs), dtype=np.int64)
+        for tid, (transaction, count) in enumerate(self.__mining_transactions):
+            transaction = sorted((item for item in transaction if item in f_rank), key=f_rank.get)
+            for i, item in enumerate(transaction):
+                group_ends[tid, item_group[item]] = i + 1
+            ranked_transactions.append((transaction, count))
+
+        with SharedIndex(ranked_transactions, arrays={'group_ends': group_ends}) as index, \
+                multiprocessing.Pool(self.__n_jobs,
+                                     initializer=_attach_index,
+                                     initargs=(index.descriptor(),)) as pool:
+            results = pool.imap(_mine_group,
+                                [(group,
+                                  group_items[group],
+                                  f_rank,
+                                  min_count,
+                                  self.__max_k)
+                                 for group in groups])
+
+            # Merge result, itemsets of different groups are disjoint.
+            # Unfinished groups are terminated if budget is exceeded.
+            for group in groups:
+                if self.__stop_mining():
+                    break
+                try:
+                    result = results.next(None if self.__budget is None
+                                          else self.__budget.remaining_time())
+                except multiprocessing.TimeoutError:
+                    self.__partial = True
+                    break
+
+                self.__add_itemsets('group', group, result)
+
+    def __add_itemsets(self, unit, key, result):
+        """Keep frequent itemsets of a completed header item or item group.
+
+        Itemsets satisfying constraint are encoded, their support counts are pinned,
+        and the step is appended to checkpoint.
+        This method is intended to be private.
+
+        Args:
+            unit (str):
+                'item' for header item, 'group' for item group.
+            key (int):
+                Encoded header item or group id.
+            result (dict):
+                Map frequent itemset (sorted tuple of int) into support count.
+        """
+
+        itemsets = []
+        for itemset, count in result.items():
+            if not self.__encoded_constraint.satisfy(itemset):
+                continue
+            encoded_itemset = self.__itemset_encoder.encode_from_list(itemset)
+            self.__frequent_k_itemset[len(itemset)].add(encoded_itemset)
+            self.__sup_count.put(itemset, count, pin=True)
+            itemsets.append(list(itemset))
+        self.__save_checkpoint(unit, key, itemsets)
+
+    def __stop_mining(self):
+        """Whether mining should stop.
+
+        This method is intended to be private.
+
+        Returns:
+            bool:
+                True if budget is exceeded now or before.
+        """
+
+        if not self.__partial and self.__budget is not None and self.__budget.exceeded():
+            self.__partial = True
+        return self.__partial
+
+    def __save_checkpoint(self, unit, key, itemsets):
+        """Append frequent itemsets of a completed header item or item group to checkpoint.
+
+        This method is intended to be private.
+
+        Args:
+            unit (str):
+                'item' for header item, 'group' for item group.
+            key (int):
+                Encoded header item or group id.
+            itemsets (list of list of int):
+                Encoded frequent itemsets found in this step.
+        """
+
+        if self.__checkpoint is None:
+            return
+
+        if unit == 'item':
+            key = self.__item_encoder.decode_to_string(key)
+        self.__checkpoint.append({
+            unit: key,
+            'itemsets': [[self.__item_encoder.decode_to_string_list(itemset),
+                          self.__sup_count.get(tuple(itemset))]
+                         for itemset in itemsets],
+        })
+
+    def __restore_checkpoint(self):
+        """Restore frequent itemsets of completed steps from checkpoint.
+
+        This method is intended to be private.
+
+        Returns:
+            set of tuple of str and int:
+                Completed steps, ('item', encoded header item) or ('group', group id).
+        """
+
+        done_steps = set()
+        if self.__checkpoint is None:
+            return done_steps
+
+        for step in self.__checkpoint.load():
+            if 'item' in step:
+                done_steps.add(('item', self.__item_encoder.encode_from_string(step['item'])))
+            else:
+                done_steps.add(('group', step['group']))
+            for itemset, count in step['itemsets']:
+                itemset = self.__item_encoder.encode_from_string_list(itemset)
+                encoded_itemset = self.__itemset_encoder.encode_from_list(itemset)
+                self.__frequent_k_itemset[len(itemset)].add(encoded_itemset)
+                if count is not None:
+                    self.__sup_count.put(self.__itemset_encoder.decode_to_tuple(encoded_itemset), count, pin=True)
+        return done_steps
+
+    def is_partial(self):
+        """Whether mining is stopped by budget.
+
+        Returns:
+            bool:
+                True if frequent itemsets only contain steps completed before budget is exceeded.
+        """
+
+        return self.__partial
+
     def construct_fp_tree(self):
         """Construct fp tree.
 
         This function also construct frequent k-itemsets
         and support count for each frequent k-itemsets.
+        If `n_jobs` is greater than 1, use parallel FP-Growth instead.
+        Budget is checked for every transaction while building fp trees,
+        and for every item while mining them.
+        If budget is exceeded before fp tree is complete, no header item is mined.
         """
 
-        # If fp tree is already contructed.
-        if self.__fp_tree:
+        # If fp tree is already contructed, or mining is stopped by budget.
+        if self.__fp_tree or self.__partial:
             pass
+        # Else if parallel mode is used, mine item groups in different processes.
+        elif self.__n_jobs > 1:
+            if not self.__frequent_k_itemset:
+                for i in range(self.__max_k):
+                    self.__frequent_k_itemset[i+1] = set()
+                self.__parallel_fp_growth()
         # Else construct fp tree.
         else:
             for i in range(self.__max_k):
                 self.__frequent_k_itemset[i+1] = set()
+            done_steps = self.__restore_checkpoint()
+
+            # Build fp tree, it is only kept when complete.
+            header_table, item_count = _build_fp_tree(self.__mining_transactions,
+                                                      self.__min_sup * self.__n_transactions,
+                                                      stop=self.__stop_mining)
+            if self.__partial:
+                return
+            self.__fp_tree = header_table
+
+            # Perform fp-growth, skip header items restored from checkpoint.
+            _mine_fp_tree(header_table,
+                          item_count,
+                          [],
+                          self.__min_sup * self.__n_transactions,
+                          self.__max_k,
+                          [item for item in header_table if ('item', item) not in done_steps],
+                          {},
+                          stop=self.__stop_mining,
+                          step=lambda item, result: self.__add_itemsets('item', item, result))
+
+    def support_cache_stats(self):
+        """Statistics of support count cache.
 
-            # Convert to new transactions and filter elements which are not frequent 1-itemset.
-            new_transactions = []
-            for transaction in self.__encoded_transactions:
-                new_transaction = []
-                for item in transaction:
-                    decoded_1_itemset = [self.__item_encoder.decode_to_string(item)]
-                    if self.support(decoded_1_itemset) >= self.__min_sup:
-                        new_transaction.append(item)
-                if new_transaction:
-                    new_transaction.sort()
-                    new_transaction.sort(key=lambda item:
-                                         self.support_count([self
-                                                             .__item_encoder
-                                                             .decode_to_string(item)]),
-                                         reverse=True)
-                    new_transactions.append(new_transaction)
-
-            # Construct fp tree and header table.
-            header_table = {}
-            thread_table = {}
-            for transaction in new_transactions:
-                current_node = self.__fp_tree
-                parent_node = ''
-                for item in transaction:
-                    if item not in current_node:
-                        current_node[item] = {'value': 1, 'child': {}, 'parent': parent_node}
-                        if item not in header_table:
-                            header_table[item] = current_node[item]
-
-                        if item in thread_table:
-                            thread_table[item]['next'] = current_node[item]
-                        thread_table[item] = current_node[item]
-                    else:
-                        current_node[item]['value'] = current_node[item]['value'] + 1
-                    parent_node = parent_node + ' ' + str(item)
-                    current_node = current_node[item]['child']
-
-            # Perform fp-growth.
-            for item, head_node in header_table.items():
-                counter = {}
-
-                # Build sub pattern tree.
-                while True:
-                    if head_node['parent']:
-                        parents = list(map(int, head_node['parent'][1:].split(' ')))
-                        for k in range(len(parents)):
-                            for k_itemset in AssociationRuleMining.__enumerate_k_itemset(parents, k+1):
-                                encoded_k_1_itemset = self.__itemset_encoder.encode_from_list(k_itemset + [item])
-                                if encoded_k_1_itemset in counter:
-                                    counter[encoded_k_1_itemset] = counter[encoded_k_1_itemset] + head_node['value']
-                                else:
-                                    counter[encoded_k_1_itemset] = head_node['value']
-
-                    if 'next' in head_node:
-                        head_node = head_node['next']
-                    else:
-                        break
-
-                self.__frequent_k_itemset[1].add(self.__itemset_encoder.encode_from_list([item]))
-
-                for encoded_itemset, count in counter.items():
-                    if count >= self.__min_sup * self.__n_transactions:
-                        self.__frequent_k_itemset[len(self.__itemset_encoder.decode_to_list(encoded_itemset))].add(encoded_itemset)
-                        self.__sup_count[encoded_itemset] = count
+        Returns:
+            dict:
+                See `SupportCache.stats` for keys.
+        """
+
+        return self.__sup_count.stats()
 
     def frequent_k_itemset(self, k=1):
         """Frequent k-itemset of the transactions.
@@ -286,7 +615,7 @@ class AssociationRuleMining:
                 size of frequent itemset
 
         Returns:
-            list of k-itemset:
+            ItemsetView of k-itemset:
                 Itemsets in list are frequent k-itemset.
 
         Raises:
@@ -307,11 +636,10 @@ class AssociationRuleMining:
         else:
             self.construct_fp_tree()
 
-        # Frequent k-itemset cached result.
-        return [self
-                .__item_encoder
-                .decode_to_string_list(self.__itemset_encoder.decode_to_list(k_itemset))
-                for k_itemset in self.__frequent_k_itemset[k]]
+        # Frequent k-itemset cached result, decoded only when touched.
+        return ItemsetView(self.__item_encoder,
+                           [self.__itemset_encoder.decode_to_tuple(k_itemset)
+                            for k_itemset in self.__frequent_k_itemset[k]])
 
     def frequent_itemset(self, len_descend=True):
         """Frequent itemset of the transactions.
@@ -324,53 +652,117 @@ class AssociationRuleMining:
                 Show frequent itemset list in descend length order.
 
         Returns:
-            list of frequent itemset:
+            ItemsetView of frequent itemset:
                 All frequent itemsets of the transactions.
         """
 
         f_itemset = []
         for k in range(self.__max_k):
-            f_itemset = f_itemset + self.frequent_k_itemset(k+1)
+            f_itemset.extend(self.frequent_k_itemset(k+1).encoded())
         f_itemset.sort(key=len, reverse=len_descend)
-        return f_itemset
+        return ItemsetView(self.__item_encoder, f_itemset)
 
-    def association_rules(self):
+    def association_rules(self, measures=False):
         """List all association rules of the transactions.
 
         Split frequent itemset into two part, and calculate confidence.
         Number of possible conbination of split is Stiring number of second kind.
+        Measures of all rules are calculated in bulk from cached support counts,
+        and rules with lift smaller than `min_lift` are never generated.
+
+        Args:
+            measures (bool):
+                Also return interestingness measures of each rule.
 
         Returns:
             list of dict:
                 Each dict has two keys,
                 'condition' stands occurence of itemset,
                 'prediction' stands cooccurence itemset.
+                If `measures` is set, each dict also has keys in `measure.MEASURES`.
         """
 
         # If already calculated before, skip the calculation process.
         if self.__association_rules:
             pass
-        # Else enumerate frequent itemset, split into two part and calculate confidence.
+        # Else enumerate frequent itemset, split into two part and calculate measures.
         else:
-            for f_itemset in self.frequent_itemset():
-                if len(f_itemset) >= 2:
-                    for front, back in AssociationRuleMining.__split_itemset(f_itemset):
-                        # If front -> back satisfying minimum confidence,
-                        # then it's an association rule.
-                        if self.confidence(front, back) >= self.__min_cof:
-                            (self
-                             .__association_rules
-                             .append({'condition': front, 'prediction': back}))
-                        # If back -> front satisfying minimum confidence,
-                        # then it's an association rule.
-                        if self.confidence(back, front) >= self.__min_cof:
-                            (self
-                             .__association_rules
-                             .append({'condition': back, 'prediction': front}))
+            self.__association_rules, self.__rule_measures = generate_rules(
+                self.trie(),
+                split_itemset,
+                self.support_count,
+                self.__constraint.allow_rule,
+                self.__n_transactions,
+                self.__min_cof,
+                self.__min_lift)
+
+        if measures:
+            return attach_measures(self.__association_rules, self.__rule_measures)
 
         # Association rule cached result.
         return self.__association_rules
 
+    def iter_association_rules(self, batch_size=RULE_BATCH_SIZE):
+        """Stream association rules with their measures.
+
+        Rules are generated batch by batch and are not cached,
+        so memory does not grow with number of rules.
+
+        Args:
+            batch_size (int):
+                Number of candidate rules measured together.
+
+        Yields:
+            dict:
+                Association rule as in `association_rules(measures=True)`.
+        """
+
+        for rules, measures in iter_rules(
+                self.trie(),
+                split_itemset,
+                self.support_count,
+                self.__constraint.allow_rule,
+                self.__n_transactions,
+                self.__min_cof,
+                self.__min_lift,
+                batch_size):
+            yield from attach_measures(rules, measures)
+
+    def trie(self):
+        """Frequent itemsets with support counts in a prefix trie.
+
+        Built once from `frequent_itemset()`, and shared by rule generation and `freeze()`.
+
+        Returns:
+            ItemsetTrie:
+                Trie for support, subset and superset queries of frequent itemsets.
+        """
+
+        # If already built before, skip the building process.
+        if self.__trie is None:
+            self.__trie = ItemsetTrie([(f_itemset, self.support_count(f_itemset))
+                                       for f_itemset in self.frequent_itemset()])
+
+        # Trie cached result.
+        return self.__trie
+
+    def freeze(self):
+        """Immutable model of mining result for concurrent queries.
+
+        Queries of frozen model never mutate caches or encoders,
+        so one frozen model can be shared by many threads.
+        Later changes of this object are not reflected in frozen model.
+
+        Returns:
+            FrozenModel:
+                Frequent itemsets, supports and association rules.
+        """
+
+        return FrozenModel(self.trie(),
+                           self.association_rules(measures=True),
+                           self.__n_transactions,
+                           self.support_count)
+
 # Test section.
 if __name__ == '__main__':
     import json
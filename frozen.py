@@ -0,0 +1,457 @@
+"""Module of frozen mining result.
+
+FrozenModel is an immutable snapshot of frequent itemsets and association rules,
+which can be shared by many threads, saved into a compact binary file,
+and loaded back with memory mapping.
+Use `freeze()` of any engine to create one, see test section for code example.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+from itemset_trie import ARRAY_DTYPES as TRIE_ARRAY_DTYPES, ItemsetTrie
+from measure import MEASURES
+
+# File signature and version of saved model.
+MAGIC = b'ARMFROZ3'
+
+# Byte alignment of arrays in saved model.
+ALIGNMENT = 64
+
+# Prefix of arrays of trie of rule itemsets which are not in trie of frequent itemsets.
+RULE_TRIE_PREFIX = 'rule_'
+
+# Dtype of every array in saved model, all little endian.
+ARRAY_DTYPES = {
+    **TRIE_ARRAY_DTYPES,
+    **{RULE_TRIE_PREFIX + name: dtype for name, dtype in TRIE_ARRAY_DTYPES.items()},
+    'condition_items': '<u4',
+    'condition_offsets': '<i8',
+    'prediction_items': '<u4',
+    'prediction_offsets': '<i8',
+    'rule_measures': '<f8',
+}
+
+def _pack(list_of_item_ids):
+    """Pack list of item ids into flat items and offsets.
+
+    Args:
+        list_of_item_ids (list of tuple of int):
+            Item ids of each itemset.
+
+    Returns:
+        tuple of array and array:
+            Item ids of i-th itemset are `items[offsets[i]:offsets[i+1]]`.
+    """
+
+    offsets = np.zeros(len(list_of_item_ids) + 1, dtype=ARRAY_DTYPES['condition_offsets'])
+    np.cumsum([len(item_ids) for item_ids in list_of_item_ids], out=offsets[1:])
+    items = np.fromiter((item_id for item_ids in list_of_item_ids for item_id in item_ids),
+                        dtype=ARRAY_DTYPES['condition_items'],
+                        count=int(offsets[-1]))
+    return items, offsets
+
+class FrozenModel:
+    """Immutable model of frequent itemsets, supports and association rules.
+
+    Frequent itemsets are kept in an `ItemsetTrie`, whose flat arrays are saved with the model,
+    so no lookup table is built when model is loaded.
+    Items of rules are encoded by item ids of trie,
+    and rules are packed as flat arrays of sorted item ids with offsets.
+    Conditions and predictions of rules which are not in trie
+    (such as itemsets filtered out by constraint) are kept in a second trie with their counts,
+    so support and confidence of every rule are exact.
+    Queries never write any state, so no lock is needed for concurrent queries.
+    Itemsets which are neither frequent nor part of a rule
+    (including itemsets with unknown items) have zero support count.
+    """
+
+    def __init__(self, frequent_itemsets, association_rules, n_transactions, support_count=None):
+        """Freeze mining result.
+
+        Args:
+            frequent_itemsets (ItemsetTrie or list of tuple of list of item and int):
+                Trie of frequent itemsets, or frequent itemsets paired with support count.
+            association_rules (list of dict):
+                Association rules with keys in `measure.MEASURES`.
+            n_transactions (int):
+                Number of transactions.
+            support_count (callable):
+                Support count of condition or prediction of rule which is not in trie.
+
+        Raises:
+            ValueError:
+                If condition or prediction of rule is not in trie and `support_count` is not given.
+        """
+
+        if isinstance(frequent_itemsets, ItemsetTrie):
+            trie = frequent_itemsets
+        else:
+            trie = ItemsetTrie(frequent_itemsets)
+        vocabulary = trie.vocabulary()
+        item_ids = {item: i for i, item in enumerate(vocabulary)}
+
+        rule_itemsets = {}
+        for rule in association_rules:
+            for itemset in (rule['condition'], rule['prediction']):
+                key = frozenset(itemset)
+                if key in rule_itemsets or trie.get(itemset) is not None:
+                    continue
+                if support_count is None:
+                    raise ValueError('Support count of {} is not given.'.format(list(itemset)))
+                rule_itemsets[key] = support_count(list(itemset))
+        rule_trie = ItemsetTrie([(list(itemset), count) for itemset, count in rule_itemsets.items()])
+
+        def encode(itemset):
+            return tuple(sorted(item_ids[item] for item in itemset))
+
+        condition_items, condition_offsets = _pack([encode(rule['condition'])
+                                                    for rule in association_rules])
+        prediction_items, prediction_offsets = _pack([encode(rule['prediction'])
+                                                      for rule in association_rules])
+        rule_measures = np.array([[rule[name] for name in MEASURES] for rule in association_rules],
+                                 dtype=ARRAY_DTYPES['rule_measures']).reshape(-1, len(MEASURES))
+
+        self.__set_state(vocabulary, rule_trie.vocabulary(), n_transactions, {
+            **trie.arrays(),
+            **{RULE_TRIE_PREFIX + name: array for name, array in rule_trie.arrays().items()},
+            'condition_items': condition_items,
+            'condition_offsets': condition_offsets,
+            'prediction_items': prediction_items,
+            'prediction_offsets': prediction_offsets,
+            'rule_measures': rule_measures,
+        })
+
+    def __set_state(self, vocabulary, rule_vocabulary, n_transactions, arrays):
+        """Set vocabulary and arrays of model.
+
+        This method is intended to be private.
+
+        Args:
+            vocabulary (list of item):
+                Items in item id order of trie.
+            rule_vocabulary (list of item):
+                Items in item id order of trie of rule itemsets.
+            n_transactions (int):
+                Number of transactions.
+            arrays (dict):
+                Map each name in `ARRAY_DTYPES` into array.
+        """
+
+        self.__trie = ItemsetTrie.from_arrays(vocabulary, {name: arrays[name]
+                                                           for name in TRIE_ARRAY_DTYPES})
+        self.__rule_trie = ItemsetTrie.from_arrays(rule_vocabulary,
+                                                   {name: arrays[RULE_TRIE_PREFIX + name]
+                                                    for name in TRIE_ARRAY_DTYPES})
+        self.__vocabulary = self.__trie.vocabulary()
+        self.__n_transactions = n_transactions
+        self.__arrays = arrays
+        for array in arrays.values():
+            if isinstance(array, np.ndarray) and not isinstance(array, np.memmap):
+                array.setflags(write=False)
+
+    def __decode(self, items, offsets, i):
+        """Decode i-th packed itemset.
+
+        This method is intended to be private.
+
+        Args:
+            items (array of int):
+                Flat item ids.
+            offsets (array of int):
+                Offsets of itemsets in `items`.
+            i (int):
+                Index of itemset.
+
+        Returns:
+            list of item:
+                Decoded itemset.
+        """
+
+        return [self.__vocabulary[item_id]
+                for item_id in items[offsets[i]:offsets[i+1]].tolist()]
+
+    def save(self, path):
+        """Save model into compact binary file.
+
+        File starts with `MAGIC`, then length of JSON header (8 bytes, little endian),
+        JSON header (vocabularies, number of transactions, measure names and array layout),
+        and raw arrays aligned to `ALIGNMENT` bytes.
+
+        Args:
+            path (str):
+                Target file path.
+        """
+
+        layout = {}
+        offset = 0
+        for name, array in self.__arrays.items():
+            layout[name] = {'shape': list(array.shape), 'offset': offset}
+            offset = offset + -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+        header = json.dumps({
+            'vocabulary': list(self.__vocabulary),
+            'rule_vocabulary': list(self.__rule_trie.vocabulary()),
+            'n_transactions': self.__n_transactions,
+            'measures': list(MEASURES),
+            'arrays': layout,
+        }).encode('utf-8')
+        data_offset = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+        with open(path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<Q', len(header)))
+            f.write(header)
+            for name, array in self.__arrays.items():
+                f.write(b'\0' * (data_offset + layout[name]['offset'] - f.tell()))
+                f.write(np.ascontiguousarray(array, dtype=ARRAY_DTYPES[name]).tobytes())
+
+    @staticmethod
+    def load(path, mmap=True):
+        """Load model saved by `save()`.
+
+        Args:
+            path (str):
+                Source file path.
+            mmap (bool):
+                Memory map arrays instead of reading them,
+                so loading time does not depend on number of itemsets and rules.
+
+        Returns:
+            FrozenModel:
+                Loaded model.
+
+        Raises:
+            ValueError:
+                If file is not a saved model.
+        """
+
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError('{} is not a saved FrozenModel.'.format(path))
+            header_length, = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(header_length).decode('utf-8'))
+            data_offset = -(-(len(MAGIC) + 8 + header_length) // ALIGNMENT) * ALIGNMENT
+
+            if tuple(header['measures']) != MEASURES:
+                raise ValueError('Measures of {} are not {}.'.format(path, ', '.join(MEASURES)))
+
+            arrays = {}
+            for name, dtype in ARRAY_DTYPES.items():
+                shape = tuple(header['arrays'][name]['shape'])
+                offset = data_offset + header['arrays'][name]['offset']
+                if not mmap or int(np.prod(shape)) == 0:
+                    f.seek(offset)
+                    arrays[name] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+                else:
+                    arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+        model = FrozenModel.__new__(FrozenModel)
+        model.__set_state(header['vocabulary'], header['rule_vocabulary'], header['n_transactions'],
+                          arrays)
+        return model
+
+    def vocabulary(self):
+        """Items of frequent itemsets.
+
+        Returns:
+            tuple of item:
+                Items in descending support count order.
+        """
+
+        return self.__vocabulary
+
+    def trie(self):
+        """Trie of frequent itemsets, for subset and superset queries.
+
+        Returns:
+            ItemsetTrie:
+                Trie sharing arrays (memory mapped if loaded so) with model.
+        """
+
+        return self.__trie
+
+    def n_transactions(self):
+        """Number of mined transactions.
+
+        Returns:
+            int:
+                Number of mined transactions.
+        """
+
+        return self.__n_transactions
+
+    def support_count(self, itemset):
+        """Support count for the itemset.
+
+        Args:
+            itemset (list of item):
+                Target itemset.
+
+        Returns:
+            int:
+                Support count for the given itemset,
+                0 if itemset is neither frequent nor part of a rule.
+        """
+
+        count = self.__trie.get(itemset)
+        if count is None:
+            return self.__rule_trie.support_count(itemset)
+        return count
+
+    def support(self, itemset):
+        """Support for the itemset.
+
+        Args:
+            itemset (list of item):
+                Target itemset.
+
+        Returns:
+            float:
+                Support for the given itemset,
+                0 if itemset is neither frequent nor part of a rule.
+        """
+
+        if not self.__n_transactions:
+            return 0
+        return self.support_count(itemset) / self.__n_transactions
+
+    def confidence(self, itemset_1, itemset_2):
+        """Confidence of association rule `itemset_1` -> `itemset_2`.
+
+        Args:
+            itemset_1 (list of item):
+                Denominator of confidence formula.
+            itemset_2 (list of item):
+                Combine with `itemset_1` to form nominator of confidence formula.
+
+        Returns:
+            float:
+                Confidence of the given association rule,
+                0 if `itemset_1` is neither frequent nor part of a rule.
+        """
+
+        count = self.support_count(itemset_1)
+        if not count:
+            return 0
+        return self.support_count(list(itemset_1) + list(itemset_2)) / count
+
+    def frequent_k_itemset(self, k=1):
+        """Frequent k-itemset.
+
+        Args:
+            k (int):
+                size of frequent itemset
+
+        Returns:
+            list of k-itemset:
+                Itemsets in list are frequent k-itemset.
+        """
+
+        return [itemset for itemset, _ in self.__trie.itemsets(k)]
+
+    def frequent_itemset(self, len_descend=True):
+        """All frequent itemsets.
+
+        Args:
+            len_descend (bool):
+                Show frequent itemset list in descend length order.
+
+        Returns:
+            list of frequent itemset:
+                All frequent itemsets.
+        """
+
+        f_itemset = [itemset for itemset, _ in self.__trie.itemsets()]
+        f_itemset.sort(key=len, reverse=len_descend)
+        return f_itemset
+
+    def association_rules(self, measures=False):
+        """List all association rules.
+
+        Args:
+            measures (bool):
+                Also return interestingness measures of each rule.
+
+        Returns:
+            list of dict:
+                Each dict has two keys,
+                'condition' stands occurence of itemset,
+                'prediction' stands cooccurence itemset.
+                If `measures` is set, each dict also has keys in `measure.MEASURES`.
+        """
+
+        condition_items = self.__arrays['condition_items']
+        condition_offsets = self.__arrays['condition_offsets']
+        prediction_items = self.__arrays['prediction_items']
+        prediction_offsets = self.__arrays['prediction_offsets']
+        rule_measures = self.__arrays['rule_measures'].tolist() if measures else None
+
+        rules = []
+        for i in range(len(condition_offsets) - 1):
+            rule = {'condition': self.__decode(condition_items, condition_offsets, i),
+                    'prediction': self.__decode(prediction_items, prediction_offsets, i)}
+            if measures:
+                rule.update(zip(MEASURES, rule_measures[i]))
+            rules.append(rule)
+        return rules
+
+# Test section.
+if __name__ == '__main__':
+    import os
+    import tempfile
+    import threading
+
+    FM = FrozenModel(frequent_itemsets=[(['a'], 3), (['b'], 2), (['a', 'b'], 2)],
+                     association_rules=[{'condition': ['b'], 'prediction': ['a'],
+                                         'support': 0.5, 'confidence': 1.0, 'lift': 4 / 3,
+                                         'leverage': 0.125, 'conviction': float('inf'),
+                                         'jaccard': 2 / 3, 'kulczynski': 5 / 6}],
+                     n_transactions=4)
+
+    assert FM.support_count(['b', 'a']) == 2, 'Bug in `FrozenModel.support_count`.'
+    assert FM.support_count(['a', 'z']) == 0, 'Bug in `FrozenModel.support_count`.'
+    assert FM.vocabulary() == ('a', 'b'), 'Bug in `FrozenModel.vocabulary`.'
+    assert FM.confidence(['b'], ['a']) == 1.0, 'Bug in `FrozenModel.confidence`.'
+    assert FM.association_rules() == [{'condition': ['b'], 'prediction': ['a']}], \
+        'Bug in `FrozenModel.association_rules`.'
+
+    # Condition filtered out from frequent itemsets keeps its count.
+    CONSTRAINED = FrozenModel(frequent_itemsets=[(['a', 'b'], 2)],
+                              association_rules=[{'condition': ['b'], 'prediction': ['a'],
+                                                  'support': 0.5, 'confidence': 1.0,
+                                                  'lift': 4 / 3, 'leverage': 0.125,
+                                                  'conviction': float('inf'),
+                                                  'jaccard': 2 / 3, 'kulczynski': 5 / 6}],
+                              n_transactions=4,
+                              support_count=lambda itemset: {'a': 3, 'b': 2}[itemset[0]])
+    assert CONSTRAINED.confidence(['b'], ['a']) == 1.0 and CONSTRAINED.support_count(['a']) == 3, \
+        'Bug in `FrozenModel.confidence`.'
+
+    # Concurrent queries see the same answers and never grow vocabulary.
+    RESULTS = []
+    def query():
+        RESULTS.append([FM.support_count(['a']), FM.support_count(['unknown'])])
+    THREADS = [threading.Thread(target=query) for _ in range(8)]
+    for thread in THREADS:
+        thread.start()
+    for thread in THREADS:
+        thread.join()
+    assert RESULTS == [[3, 0]] * 8 and FM.vocabulary() == ('a', 'b'), \
+        'Bug in `FrozenModel` concurrent queries.'
+
+    # Saved model gives the same answers.
+    with tempfile.TemporaryDirectory() as TMP_DIR:
+        PATH = os.path.join(TMP_DIR, 'model.bin')
+        FM.save(PATH)
+        for MMAP in [True, False]:
+            LOADED = FrozenModel.load(PATH, mmap=MMAP)
+            assert LOADED.frequent_itemset() == FM.frequent_itemset(), \
+                'Bug in `FrozenModel.load`.'
+            assert LOADED.association_rules(measures=True) == FM.association_rules(measures=True), \
+                'Bug in `FrozenModel.load`.'
+            assert LOADED.support_count(['a', 'b']) == 2 and LOADED.n_transactions() == 4, \
+                'Bug in `FrozenModel.load`.'
+            del LOADED
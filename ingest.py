@@ -0,0 +1,181 @@
+"""Module for parallel ingestion of transaction shards.
+
+Use function `ingest` to parse and encode many (optionally gzip compressed) transaction files
+in worker processes, and get `EncodedTransactions` ready for mining engines,
+see test section for code example.
+"""
+
+import multiprocessing
+import os
+import queue
+
+from reader import TransactionReader
+from encoder import EncodedTransactions, StringToIntegerEncoder
+
+def _parse_shards(tasks, results, input_format, chunk_size):
+    """Parse and encode shards from task queue, target of ingestion process.
+
+    Each shard is encoded with its own local vocabulary,
+    and sent in chunks together with items newly added to local vocabulary.
+    Putting into the bounded result queue blocks while consumer is behind.
+
+    Args:
+        tasks (multiprocessing.Queue):
+            Queue of (shard index, path), None to stop.
+        results (multiprocessing.Queue):
+            Bounded queue of ('chunk', shard index, new items, encoded transactions),
+            ('done', shard index) or ('error', shard index, message).
+        input_format (str):
+            One of `reader.INPUT_FORMATS`.
+        chunk_size (int):
+            Number of transactions in each chunk.
+    """
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        shard, path = task
+
+        try:
+            vocabulary = {}
+            new_items = []
+            chunk = []
+            for transaction in TransactionReader(path, input_format):
+                encoded_transaction = []
+                for item in transaction:
+                    if item not in vocabulary:
+                        vocabulary[item] = len(vocabulary)
+                        new_items.append(item)
+                    encoded_transaction.append(vocabulary[item])
+                chunk.append(encoded_transaction)
+                if len(chunk) >= chunk_size:
+                    results.put(('chunk', shard, new_items, chunk))
+                    new_items = []
+                    chunk = []
+            if chunk or new_items:
+                results.put(('chunk', shard, new_items, chunk))
+            results.put(('done', shard))
+        except Exception as error:
+            results.put(('error', shard, repr(error)))
+
+def ingest(paths, input_format='basket', n_jobs=None, chunk_size=10000, max_queue_chunks=16):
+    """Parse and encode transaction files in parallel.
+
+    Worker processes parse and encode shards with local vocabularies,
+    while this process merges local vocabularies into a global `StringToIntegerEncoder`,
+    collapses identical transactions and counts items (the first counting pass of mining),
+    so parsing, encoding and counting overlap.
+    Chunks are passed through a bounded queue,
+    so at most `max_queue_chunks` chunks wait in memory if merging is slower than parsing.
+
+    Args:
+        paths (list of str):
+            Transaction files, file ending with '.gz' is decompressed while reading.
+        input_format (str):
+            One of `reader.INPUT_FORMATS`.
+        n_jobs (int):
+            Number of worker processes, default to number of CPUs.
+        chunk_size (int):
+            Number of transactions in each chunk.
+        max_queue_chunks (int):
+            Maximum number of chunks waiting in queue.
+
+    Returns:
+        EncodedTransactions:
+            Encoded transactions of all files with item counts.
+
+    Raises:
+        ValueError:
+            If input format is unknown, or a file cannot be parsed.
+    """
+
+    # Fail early on unknown format, instead of in every worker.
+    TransactionReader(os.devnull, input_format)
+
+    n_jobs = max(1, min(n_jobs or os.cpu_count() or 1, len(paths)))
+    tasks = multiprocessing.Queue()
+    for shard, path in enumerate(paths):
+        tasks.put((shard, path))
+    for _ in range(n_jobs):
+        tasks.put(None)
+    results = multiprocessing.Queue(max_queue_chunks)
+
+    processes = [multiprocessing.Process(target=_parse_shards,
+                                         args=(tasks, results, input_format, chunk_size),
+                                         daemon=True)
+                 for _ in range(n_jobs)]
+    for process in processes:
+        process.start()
+
+    item_encoder = StringToIntegerEncoder()
+    # Map local item ids of each shard into global item ids.
+    local_to_global = [[] for _ in paths]
+    transaction_count = {}
+    item_count = {}
+    n_done = 0
+    try:
+        while n_done < len(paths):
+            try:
+                message = results.get(timeout=1)
+            except queue.Empty:
+                if any(process.exitcode not in (None, 0) for process in processes):
+                    raise ValueError('Ingestion process exited unexpectedly.')
+                continue
+
+            if message[0] == 'error':
+                raise ValueError('{} cannot be ingested: {}'.format(paths[message[1]], message[2]))
+            if message[0] == 'done':
+                n_done = n_done + 1
+                continue
+
+            _, shard, new_items, chunk = message
+            mapping = local_to_global[shard]
+            mapping.extend(item_encoder.encode_from_string(item) for item in new_items)
+            for local_transaction in chunk:
+                transaction = tuple(sorted(mapping[item] for item in local_transaction))
+                transaction_count[transaction] = transaction_count.get(transaction, 0) + 1
+                for item in transaction:
+                    item_count[item] = item_count.get(item, 0) + 1
+    finally:
+        for process in processes:
+            if process.is_alive() and n_done < len(paths):
+                process.terminate()
+            process.join()
+
+    return EncodedTransactions(item_encoder,
+                               [(list(transaction), count)
+                                for transaction, count in transaction_count.items()],
+                               item_count)
+
+# Test section.
+if __name__ == '__main__':
+    import gzip
+    import json
+    import tempfile
+
+    import apriori
+    # Load data.
+    DATA_PATH = os.path.dirname(os.path.abspath(__file__)) + '/data'
+    DATA_NAME = '/IBM.json'
+
+    with open(DATA_PATH + DATA_NAME, 'r') as f:
+        TRANSACTIONS = json.loads(f.read())
+
+    with tempfile.TemporaryDirectory() as TMP_DIR:
+        # Split transactions into gzip compressed daily basket files.
+        PATHS = []
+        for DAY in range(4):
+            PATHS.append(os.path.join(TMP_DIR, 'day{}.txt.gz'.format(DAY)))
+            with gzip.open(PATHS[-1], 'wt') as f:
+                for transaction in TRANSACTIONS[DAY::4]:
+                    f.write(' '.join(transaction) + '\n')
+
+        # Create instance with ingested transactions.
+        ARM = apriori.AssociationRuleMining(transactions=ingest(PATHS, chunk_size=2),
+                                            min_sup=0.2,
+                                            min_cof=0.5)
+
+        # Print support count for all frequent itemsets.
+        for fi in ARM.frequent_itemset():
+            print('support count: {}, itemset: {}'.format(ARM.support_count(fi), fi))
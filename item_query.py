@@ -0,0 +1,398 @@
+"""Module for on-demand mining around target items.
+
+Use class `ItemQuery` to get frequent itemsets and association rules containing a target itemset,
+without mining the whole transaction database, see test section for code example.
+"""
+
+import collections
+
+from encoder import EncodedTransactions, StringToIntegerEncoder, ListToIntegerEncoder, ItemsetView
+from fp_growth import _build_fp_tree, _mine_fp_tree
+from itemset_trie import ItemsetTrie
+from measure import attach_measures, generate_rules, split_itemset
+from support_cache import SupportCache
+
+class ItemQuery:
+    """Mine frequent itemsets and association rules containing target items on demand.
+
+    One fp tree of all items reaching `min_sup` is built up front, no itemset is mined.
+    For a target itemset, its projected transactions are rebuilt from the fp tree:
+    paths through nodes of the target item with the fewest nodes,
+    from root down to every node of their subtrees where some transactions end,
+    are kept if they contain all target items.
+    Conditional fp tree of the target is built from projected transactions (target removed),
+    and only this subspace is mined by FP-Growth.
+    Conditional fp trees are kept in a least recently used (LRU) cache,
+    so repeated queries of the same target skip projection.
+    Support count of any itemset is counted on the fp tree
+    from nodes of its least frequent item.
+    """
+
+    def __init__(self, transactions=None, min_sup=0.01, max_k=0, max_trees=128,
+                 support_cache=None):
+        """Build fp tree for queries.
+
+        Args:
+            transactions （list of list of item):
+                Transaction database, or `EncodedTransactions` to skip encoding.
+            min_sup (float):
+                Smallest minimum support of queries,
+                items with smaller support are dropped from fp tree.
+            max_k (int):
+                Maximum size for freuent itemset (k-itemset).
+            max_trees (int):
+                Maximum number of cached conditional fp trees, None for unbounded.
+            support_cache (SupportCache):
+                Cache of support counts, default to an unbounded cache.
+
+        Raises:
+            ValueError:
+                If `max_trees` is negative.
+        """
+
+        if max_trees is not None and max_trees < 0:
+            raise ValueError('max_trees should be greater than or equal to 0.')
+
+        self.__min_sup = min_sup
+        self.__max_trees = max_trees
+        self.__sup_count = SupportCache() if support_cache is None else support_cache
+        self.__item_encoder = StringToIntegerEncoder()
+        self.__itemset_encoder = ListToIntegerEncoder()
+
+        # Encode transactions to speed up calculation,
+        # identical transactions are collapsed and paired with their count.
+        if isinstance(transactions, EncodedTransactions):
+            self.__item_encoder = transactions.item_encoder()
+            encoded_transactions = transactions.encoded_transactions()
+        else:
+            encoded_transactions = (self
+                                    .__item_encoder
+                                    .encode_from_list_of_string_list_with_count(transactions))
+        self.__n_transactions = len(transactions)
+
+        self.__max_k = max_k
+        if self.__max_k <= 0:
+            for transaction, _ in encoded_transactions:
+                if self.__max_k < len(transaction):
+                    self.__max_k = len(transaction)
+
+        # Items in each path are sorted by descending support count, then by ascending item code.
+        self.__header_table, self.__item_count = _build_fp_tree(encoded_transactions,
+                                                                min_sup * self.__n_transactions)
+
+        # Map encoded target into conditional fp tree, in least recently used order.
+        self.__trees = collections.OrderedDict()
+        self.__tree_hits = 0
+        self.__tree_misses = 0
+        self.__tree_evictions = 0
+
+    def __encode_target(self, itemset):
+        """Encode target itemset.
+
+        This method is intended to be private.
+
+        Args:
+            itemset (list of item):
+                Target itemset.
+
+        Returns:
+            tuple of int:
+                Sorted distinct encoded items,
+                or None if any item is not in fp tree.
+
+        Raises:
+            ValueError:
+                If target is empty.
+        """
+
+        if not itemset:
+            raise ValueError('target should contain at least one item.')
+        target = self.__item_encoder.lookup_string_list(set(itemset))
+        if target is None or any(item not in self.__header_table for item in target):
+            return None
+        return tuple(target)
+
+    def __projection(self, target):
+        """Projected transactions of target rebuilt from fp tree.
+
+        Every transaction containing target passes through a node of each target item,
+        so only nodes of the target item with the fewest nodes are visited.
+        This method is intended to be private.
+
+        Args:
+            target (tuple of int):
+                Encoded target itemset.
+
+        Returns:
+            list of tuple of list of int and int:
+                Transactions containing target (target items removed) paired with count.
+        """
+
+        pivot = min(target, key=lambda item: len(self.__header_table[item]))
+        target_items = set(target)
+
+        projection = []
+        for node in self.__header_table[pivot]:
+            prefix = []
+            parent_node = node['parent']
+            while parent_node['item'] is not None:
+                prefix.append(parent_node['item'])
+                parent_node = parent_node['parent']
+            prefix.reverse()
+
+            # Transactions through node end at node or somewhere in its subtree.
+            stack = [(node, prefix)]
+            while stack:
+                current_node, path = stack.pop()
+                path = path + [current_node['item']]
+                n_ended = current_node['value'] - sum(child['value']
+                                                      for child in current_node['child'].values())
+                if n_ended > 0 and target_items.issubset(path):
+                    projection.append(([item for item in path if item not in target_items],
+                                       n_ended))
+                for child in current_node['child'].values():
+                    stack.append((child, path))
+        return projection
+
+    def __conditional_tree(self, target):
+        """Conditional fp tree of target, from cache if possible.
+
+        This method is intended to be private.
+
+        Args:
+            target (tuple of int):
+                Encoded target itemset.
+
+        Returns:
+            tuple of dict and dict and int:
+                Header table and item support count of conditional fp tree,
+                and support count of target.
+        """
+
+        if target in self.__trees:
+            self.__tree_hits = self.__tree_hits + 1
+            self.__trees.move_to_end(target)
+            return self.__trees[target]
+
+        self.__tree_misses = self.__tree_misses + 1
+        projection = self.__projection(target)
+        header_table, item_count = _build_fp_tree(projection, self.__min_sup * self.__n_transactions)
+        tree = (header_table, item_count, sum(count for _, count in projection))
+
+        self.__trees[target] = tree
+        while self.__max_trees is not None and len(self.__trees) > self.__max_trees:
+            self.__trees.popitem(last=False)
+            self.__tree_evictions = self.__tree_evictions + 1
+        return tree
+
+    def support_count(self, itemset):
+        """Support count for the itemset.
+
+        Paths of fp tree are in the same item order,
+        so every transaction containing itemset passes through a node of
+        its least frequent item, with all other items above the node.
+
+        Args:
+            itemset (list of item):
+                Target itemset.
+
+        Returns:
+            int:
+                Support count for the given itemset,
+                0 if any item has support smaller than `min_sup`.
+        """
+
+        # Encode items in itemset without growing encoder,
+        # item never seen before is in no transaction.
+        itemset = self.__item_encoder.lookup_string_list(itemset)
+        if itemset is None:
+            return 0
+
+        # Sorted items are the key of support count cache, so evicted keys are freed.
+        key = tuple(itemset)
+
+        # If already calculated before, skip the calculation process.
+        sup_count = self.__sup_count.get(key)
+        if sup_count is not None:
+            pass
+        elif not itemset:
+            sup_count = self.__n_transactions
+        elif any(item not in self.__header_table for item in itemset):
+            sup_count = 0
+        # Else sum counts of nodes of the least frequent item having other items above.
+        else:
+            last_item = max(itemset, key=lambda item: (-self.__item_count[item], item))
+            other_items = set(itemset) - {last_item}
+            sup_count = 0
+            for node in self.__header_table[last_item]:
+                n_found = 0
+                parent_node = node['parent']
+                while parent_node['item'] is not None and n_found < len(other_items):
+                    if parent_node['item'] in other_items:
+                        n_found = n_found + 1
+                    parent_node = parent_node['parent']
+                if n_found == len(other_items):
+                    sup_count = sup_count + node['value']
+        self.__sup_count.put(key, sup_count)
+
+        # Support count cached result.
+        return sup_count
+
+    def support(self, itemset):
+        """Support for the itemset.
+
+        Args:
+            itemset (list of item):
+                Target itemset.
+
+        Returns:
+            float:
+                Support for the given itemset.
+        """
+
+        return self.support_count(itemset) / self.__n_transactions
+
+    def frequent_itemset(self, target, min_sup=None, len_descend=True):
+        """Frequent itemsets containing target itemset.
+
+        Args:
+            target (list of item):
+                Items which all frequent itemsets contain.
+            min_sup (float):
+                Minimum support for frequent itemset, default to `min_sup` of fp tree.
+            len_descend (bool):
+                Show frequent itemset list in descend length order.
+
+        Returns:
+            ItemsetView of frequent itemset:
+                All frequent itemsets containing target, including target itself.
+
+        Raises:
+            ValueError:
+                If target is empty, or `min_sup` is smaller than `min_sup` of fp tree.
+        """
+
+        if min_sup is None:
+            min_sup = self.__min_sup
+        if min_sup < self.__min_sup:
+            raise ValueError('min_sup should be greater than or equal to {}.'.format(self.__min_sup))
+
+        encoded_target = self.__encode_target(target)
+        if encoded_target is None:
+            return ItemsetView(self.__item_encoder, [])
+
+        header_table, item_count, target_count = self.__conditional_tree(encoded_target)
+        if target_count / self.__n_transactions < min_sup:
+            return ItemsetView(self.__item_encoder, [])
+
+        # Grow target with frequent items of its conditional fp tree.
+        min_count = min_sup * self.__n_transactions
+        result = {encoded_target: target_count}
+        if len(encoded_target) < self.__max_k:
+            _mine_fp_tree(header_table,
+                          item_count,
+                          list(encoded_target),
+                          min_count,
+                          self.__max_k,
+                          [item for item in header_table if item_count[item] >= min_count],
+                          result)
+
+        for itemset, count in result.items():
+            self.__sup_count.put(itemset, count)
+
+        f_itemset = list(result)
+        f_itemset.sort(key=len, reverse=len_descend)
+        return ItemsetView(self.__item_encoder, f_itemset)
+
+    def association_rules(self, target, min_sup=None, min_cof=0.1, min_lift=0, measures=False):
+        """Association rules whose condition contains target itemset.
+
+        Args:
+            target (list of item):
+                Items which condition of all association rules contain.
+            min_sup (float):
+                Minimum support for frequent itemset, default to `min_sup` of fp tree.
+            min_cof (float):
+                Minimum confidence for association rule.
+            min_lift (float):
+                Minimum lift for association rule.
+            measures (bool):
+                Also return interestingness measures of each rule.
+
+        Returns:
+            list of dict:
+                Each dict has two keys,
+                'condition' stands occurence of itemset,
+                'prediction' stands cooccurence itemset.
+                If `measures` is set, each dict also has keys in `measure.MEASURES`.
+
+        Raises:
+            ValueError:
+                If target is empty, or `min_sup` is smaller than `min_sup` of fp tree.
+        """
+
+        trie = ItemsetTrie([(f_itemset, self.support_count(f_itemset))
+                            for f_itemset in self.frequent_itemset(target, min_sup)])
+        target_items = set(target)
+        rules, rule_measures = generate_rules(
+            trie,
+            split_itemset,
+            self.support_count,
+            lambda condition, prediction: target_items.issubset(condition),
+            self.__n_transactions,
+            min_cof,
+            min_lift)
+
+        if measures:
+            return attach_measures(rules, rule_measures)
+        return rules
+
+    def support_cache_stats(self):
+        """Statistics of support count cache.
+
+        Returns:
+            dict:
+                See `SupportCache.stats` for keys.
+        """
+
+        return self.__sup_count.stats()
+
+    def tree_cache_stats(self):
+        """Statistics of conditional fp tree cache.
+
+        Returns:
+            dict:
+                'hits', 'misses', 'evictions', 'n_entries',
+                'max_size' (None if unbounded) and 'hit_rate'.
+        """
+
+        n_lookups = self.__tree_hits + self.__tree_misses
+        return {
+            'hits': self.__tree_hits,
+            'misses': self.__tree_misses,
+            'evictions': self.__tree_evictions,
+            'n_entries': len(self.__trees),
+            'max_size': self.__max_trees,
+            'hit_rate': self.__tree_hits / n_lookups if n_lookups else 0,
+        }
+
+# Test section.
+if __name__ == '__main__':
+    import json
+    import os
+    # Load data.
+    DATA_PATH = os.path.dirname(os.path.abspath(__file__)) + '/data'
+    DATA_NAME = '/example.json'
+
+    with open(DATA_PATH + DATA_NAME, 'r') as f:
+        # Create instance, nothing is mined yet.
+        IQ = ItemQuery(transactions=json.loads(f.read()), min_sup=0.2, max_trees=8)
+
+    # What goes with 'c'?
+    TARGET = ['c']
+    for fi in IQ.frequent_itemset(TARGET, min_sup=0.4):
+        print('support count: {}, itemset: {}'.format(IQ.support_count(fi), fi))
+    for rule in IQ.association_rules(TARGET, min_sup=0.4, min_cof=0.5, measures=True):
+        print('confidence: {:.4f}, rule: {} -> {}'
+              .format(rule['confidence'], rule['condition'], rule['prediction']))
+    print(IQ.tree_cache_stats())
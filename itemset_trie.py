@@ -0,0 +1,378 @@
+"""Module of frequent itemset trie.
+
+ItemsetTrie stores frequent itemsets with support counts in a prefix trie
+over frequency ordered item ids, and answers support, subset and superset queries
+without scanning all itemsets.
+See test section for code example.
+"""
+
+import numpy as np
+
+# Dtype of every array of trie, all little endian.
+ARRAY_DTYPES = {
+    'node_items': '<u4',
+    'node_counts': '<i8',
+    'node_parents': '<i8',
+    'node_ends': '<i8',
+    'node_depths': '<u4',
+    'item_nodes': '<i8',
+    'item_node_offsets': '<i8',
+}
+
+class ItemsetTrie:
+    """Prefix trie (set enumeration tree) of frequent itemsets with support counts.
+
+    Items are ranked by support count in descending order (ties broken by item),
+    and each itemset is a path of ascending item ids from root.
+    Nodes are stored in preorder as flat arrays,
+    so subtree of node `i` is nodes `i` to `node_ends[i] - 1`.
+    Nodes of each item are also listed in preorder (like node links of fp tree).
+    Child of node with given item is the last node of that item in subtree of node,
+    since children are in ascending item order and items only ascend along paths,
+    so it is found by binary search.
+    Nodes which are only prefix of longer itemsets have support count -1.
+    Queries never write any state, so trie can be shared by many threads.
+    """
+
+    def __init__(self, frequent_itemsets):
+        """Build trie of frequent itemsets.
+
+        Args:
+            frequent_itemsets (list of tuple of list of item and int):
+                Frequent itemsets paired with support count.
+        """
+
+        # Support count of item is at least support count of any itemset containing it.
+        item_count = {}
+        for itemset, count in frequent_itemsets:
+            for item in itemset:
+                item_count[item] = max(item_count.get(item, count), count)
+        vocabulary = sorted(item_count, key=lambda item: (-item_count[item], item))
+        item_ids = {item: i for i, item in enumerate(vocabulary)}
+
+        # Node is [support count, map child item id into child node].
+        root = [-1, {}]
+        for itemset, count in frequent_itemsets:
+            node = root
+            for item_id in sorted(item_ids[item] for item in itemset):
+                node = node[1].setdefault(item_id, [-1, {}])
+            node[0] = count
+
+        # Flatten nodes in preorder.
+        node_items = []
+        node_counts = []
+        node_parents = []
+        node_depths = []
+        stack = [(0, root, -1, 0)]
+        while stack:
+            item_id, node, parent, depth = stack.pop()
+            node_id = len(node_items)
+            node_items.append(item_id)
+            node_counts.append(node[0])
+            node_parents.append(parent)
+            node_depths.append(depth)
+            for child_item_id in sorted(node[1], reverse=True):
+                stack.append((child_item_id, node[1][child_item_id], node_id, depth + 1))
+
+        # Children are after parent in preorder, so sizes are accumulated backward.
+        subtree_sizes = [1] * len(node_items)
+        for node_id in range(len(node_items) - 1, 0, -1):
+            subtree_sizes[node_parents[node_id]] += subtree_sizes[node_id]
+
+        node_items = np.array(node_items, dtype=ARRAY_DTYPES['node_items'])
+        item_node_offsets = np.zeros(len(vocabulary) + 1, dtype=ARRAY_DTYPES['item_node_offsets'])
+        np.cumsum(np.bincount(node_items[1:], minlength=len(vocabulary)), out=item_node_offsets[1:])
+
+        self.__set_state(vocabulary, {
+            'node_items': node_items,
+            'node_counts': np.array(node_counts, dtype=ARRAY_DTYPES['node_counts']),
+            'node_parents': np.array(node_parents, dtype=ARRAY_DTYPES['node_parents']),
+            'node_ends': (np.arange(len(node_items)) + subtree_sizes)
+                         .astype(ARRAY_DTYPES['node_ends']),
+            'node_depths': np.array(node_depths, dtype=ARRAY_DTYPES['node_depths']),
+            # Stable sort keeps preorder of nodes of each item, root is excluded.
+            'item_nodes': (np.argsort(node_items[1:], kind='stable') + 1)
+                          .astype(ARRAY_DTYPES['item_nodes']),
+            'item_node_offsets': item_node_offsets,
+        })
+
+    def __set_state(self, vocabulary, arrays):
+        """Set vocabulary and arrays of trie.
+
+        This method is intended to be private.
+
+        Args:
+            vocabulary (list of item):
+                Items in ascending item id order.
+            arrays (dict):
+                Map each name in `ARRAY_DTYPES` into array.
+        """
+
+        self.__vocabulary = tuple(vocabulary)
+        self.__item_ids = {item: i for i, item in enumerate(self.__vocabulary)}
+        self.__arrays = arrays
+        for array in arrays.values():
+            if isinstance(array, np.ndarray) and not isinstance(array, np.memmap):
+                array.setflags(write=False)
+
+    @staticmethod
+    def from_arrays(vocabulary, arrays):
+        """Trie from arrays returned by `arrays()`, arrays are used without copying.
+
+        Args:
+            vocabulary (list of item):
+                Returned by `vocabulary()`.
+            arrays (dict):
+                Returned by `arrays()`, arrays can be memory mapped.
+
+        Returns:
+            ItemsetTrie:
+                Trie of the same itemsets.
+        """
+
+        trie = ItemsetTrie.__new__(ItemsetTrie)
+        trie.__set_state(vocabulary, arrays)
+        return trie
+
+    def arrays(self):
+        """Flat arrays of trie, for saving trie.
+
+        Returns:
+            dict:
+                Map each name in `ARRAY_DTYPES` into array.
+        """
+
+        return dict(self.__arrays)
+
+    def vocabulary(self):
+        """Items of frequent itemsets.
+
+        Returns:
+            tuple of item:
+                Items in descending support count order, index of item is its item id.
+        """
+
+        return self.__vocabulary
+
+    def __len__(self):
+        return int(np.count_nonzero(self.__arrays['node_counts'] >= 0))
+
+    def __contains__(self, itemset):
+        return self.get(itemset) is not None
+
+    def __child(self, node, item_id):
+        """Child of node with given item.
+
+        This method is intended to be private.
+
+        Args:
+            node (int):
+                Parent node.
+            item_id (int):
+                Item id of child.
+
+        Returns:
+            int:
+                Child node, or -1 if there is no such child.
+        """
+
+        offsets = self.__arrays['item_node_offsets']
+        item_nodes = self.__arrays['item_nodes'][offsets[item_id]:offsets[item_id+1]]
+        i = int(np.searchsorted(item_nodes, self.__arrays['node_ends'][node])) - 1
+        if i >= 0 and self.__arrays['node_parents'][item_nodes[i]] == node:
+            return int(item_nodes[i])
+        return -1
+
+    def __decode(self, node):
+        """Itemset of node.
+
+        This method is intended to be private.
+
+        Args:
+            node (int):
+                Target node.
+
+        Returns:
+            list of item:
+                Items on path from root to node, in item id order.
+        """
+
+        node_items = self.__arrays['node_items']
+        node_parents = self.__arrays['node_parents']
+        itemset = []
+        while node > 0:
+            itemset.append(self.__vocabulary[node_items[node]])
+            node = int(node_parents[node])
+        itemset.reverse()
+        return itemset
+
+    def __collect(self, nodes):
+        """Itemsets of nodes paired with support count, prefix only nodes are skipped.
+
+        This method is intended to be private.
+
+        Args:
+            nodes (array of int):
+                Target nodes.
+
+        Returns:
+            list of tuple of list of item and int:
+                Itemsets paired with support count.
+        """
+
+        node_counts = self.__arrays['node_counts']
+        nodes = np.asarray(nodes, dtype=np.int64)
+        nodes = nodes[node_counts[nodes] >= 0]
+        return [(self.__decode(node), count)
+                for node, count in zip(nodes.tolist(), node_counts[nodes].tolist())]
+
+    def get(self, itemset, default=None):
+        """Support count of itemset if it is in trie.
+
+        Args:
+            itemset (list of item):
+                Target itemset.
+            default (object):
+                Returned if itemset is not in trie.
+
+        Returns:
+            int:
+                Support count of itemset, or `default`.
+        """
+
+        node = 0
+        try:
+            for item_id in sorted(self.__item_ids[item] for item in set(itemset)):
+                node = self.__child(node, item_id)
+                if node < 0:
+                    return default
+        except KeyError:
+            return default
+
+        count = int(self.__arrays['node_counts'][node])
+        return count if count >= 0 and node > 0 else default
+
+    def support_count(self, itemset):
+        """Support count of itemset.
+
+        Args:
+            itemset (list of item):
+                Target itemset.
+
+        Returns:
+            int:
+                Support count of itemset, 0 if itemset is not in trie.
+        """
+
+        return self.get(itemset, 0)
+
+    def itemsets(self, k=None):
+        """All itemsets in trie, in preorder.
+
+        Args:
+            k (int):
+                Only return itemsets of size k if given.
+
+        Returns:
+            list of tuple of list of item and int:
+                Itemsets paired with support count.
+        """
+
+        if k is None:
+            return self.__collect(np.arange(1, len(self.__arrays['node_counts'])))
+        return self.__collect(np.flatnonzero(self.__arrays['node_depths'] == k))
+
+    def subsets(self, itemset):
+        """Itemsets in trie which are subsets of itemset, including itemset itself.
+
+        Only children with items of itemset are visited.
+
+        Args:
+            itemset (list of item):
+                Target itemset, items not in trie are ignored.
+
+        Returns:
+            list of tuple of list of item and int:
+                Subsets paired with support count.
+        """
+
+        item_ids = sorted({self.__item_ids[item] for item in itemset if item in self.__item_ids})
+
+        nodes = []
+        # Node and position in item ids of its next item.
+        stack = [(0, 0)]
+        while stack:
+            node, start = stack.pop()
+            for i in range(start, len(item_ids)):
+                child = self.__child(node, item_ids[i])
+                if child >= 0:
+                    nodes.append(child)
+                    stack.append((child, i + 1))
+        return self.__collect(nodes)
+
+    def supersets(self, itemset):
+        """Itemsets in trie which are supersets of itemset, including itemset itself.
+
+        Path of every superset passes through a node of the last item (largest item id)
+        of itemset, with all other items of itemset above it,
+        so only nodes of the last item are checked,
+        and whole subtree of each matching node is returned.
+
+        Args:
+            itemset (list of item):
+                Target itemset.
+
+        Returns:
+            list of tuple of list of item and int:
+                Supersets paired with support count.
+        """
+
+        if any(item not in self.__item_ids for item in itemset):
+            return []
+        item_ids = sorted({self.__item_ids[item] for item in itemset})
+        if not item_ids:
+            return self.itemsets()
+
+        node_items = self.__arrays['node_items']
+        node_parents = self.__arrays['node_parents']
+        node_ends = self.__arrays['node_ends']
+        node_depths = self.__arrays['node_depths']
+        offsets = self.__arrays['item_node_offsets']
+
+        last_nodes = self.__arrays['item_nodes'][offsets[item_ids[-1]]:offsets[item_ids[-1]+1]]
+        last_nodes = last_nodes[node_depths[last_nodes] >= len(item_ids)]
+
+        nodes = []
+        for node in last_nodes.tolist():
+            # Match other items from bottom up, items ascend along path.
+            i = len(item_ids) - 2
+            ancestor = int(node_parents[node])
+            while i >= 0 and ancestor > 0 and node_items[ancestor] >= item_ids[i]:
+                if node_items[ancestor] == item_ids[i]:
+                    i = i - 1
+                ancestor = int(node_parents[ancestor])
+            if i < 0:
+                nodes.append(np.arange(node, node_ends[node]))
+        if not nodes:
+            return []
+        return self.__collect(np.concatenate(nodes))
+
+# Test section.
+if __name__ == '__main__':
+    TRIE = ItemsetTrie([(['a'], 4), (['b'], 3), (['c'], 2),
+                        (['a', 'b'], 3), (['a', 'c'], 2), (['b', 'c'], 1), (['a', 'b', 'c'], 1)])
+
+    assert TRIE.vocabulary() == ('a', 'b', 'c') and len(TRIE) == 7, 'Bug in `ItemsetTrie`.'
+    assert TRIE.support_count(['c', 'a']) == 2 and TRIE.support_count(['a', 'd']) == 0, \
+        'Bug in `ItemsetTrie.support_count`.'
+    assert sorted(TRIE.subsets(['a', 'c', 'd'])) == [(['a'], 4), (['a', 'c'], 2), (['c'], 2)], \
+        'Bug in `ItemsetTrie.subsets`.'
+    assert sorted(TRIE.supersets(['b'])) == [(['a', 'b'], 3), (['a', 'b', 'c'], 1),
+                                             (['b'], 3), (['b', 'c'], 1)], \
+        'Bug in `ItemsetTrie.supersets`.'
+    assert sorted(TRIE.itemsets(k=2)) == [(['a', 'b'], 3), (['a', 'c'], 2), (['b', 'c'], 1)], \
+        'Bug in `ItemsetTrie.itemsets`.'
+
+    # Print all frequent supersets of 'c'.
+    for itemset, count in TRIE.supersets(['c']):
+        print('support count: {}, itemset: {}'.format(count, itemset))
@@ -0,0 +1,253 @@
+"""Module of approximate itemset counting.
+
+LossyCounter count small itemsets in a single pass with bounded memory.
+See test section for code example.
+"""
+
+import itertools
+import math
+
+class LossyCounter:
+    """Count k-itemsets approximately with Lossy Counting algorithm.
+
+    Transactions are divided into buckets of width ceil(1 / epsilon).
+    Each counted itemset keeps a pair (count, delta),
+    where delta is the maximum possible count missed before itemset is tracked.
+    At the end of each bucket, itemsets with count + delta <= current bucket id are dropped.
+
+    After N transactions, for any itemset:
+        true count - epsilon * N <= count <= true count.
+    Only O(1 / epsilon * log(epsilon * N)) entries are kept for each itemset size.
+    """
+
+    def __init__(self, epsilon=0.001, max_k=2):
+        """Initialize settings for lossy counting.
+
+        Args:
+            epsilon (float):
+                Maximum error of support, must be in (0, 1).
+            max_k (int):
+                Count itemsets of size 1, ..., max_k.
+
+        Raises:
+            ValueError:
+                If epsilon is not in (0, 1) or max_k is not positive.
+        """
+
+        if not 0 < epsilon < 1:
+            raise ValueError('epsilon should be in (0, 1).')
+        if max_k <= 0:
+            raise ValueError('max_k should be greater than 0.')
+
+        self.__epsilon = epsilon
+        self.__max_k = max_k
+        self.__bucket_width = math.ceil(1 / epsilon)
+        self.__bucket_id = 1
+        self.__n_transactions = 0
+
+        # `__counter[k]` maps k-itemset (tuple of item) into [count, delta].
+        self.__counter = {k+1: {} for k in range(max_k)}
+
+    def push(self, transaction, count=1):
+        """Count all k-itemsets of a transaction, k=1, ..., max_k.
+
+        Pushing a transaction with `count` is the same as
+        pushing the same transaction `count` times.
+
+        Args:
+            transaction (list of item):
+                Items must be sortable, duplicated items are ignored.
+            count (int):
+                Number of times the transaction appeared.
+        """
+
+        items = sorted(set(transaction))
+        while count > 0:
+            # Never cross bucket boundary in one step.
+            step = min(count, self.__bucket_width - self.__n_transactions % self.__bucket_width)
+            for k, counter in self.__counter.items():
+                for k_itemset in itertools.combinations(items, k):
+                    if k_itemset in counter:
+                        counter[k_itemset][0] = counter[k_itemset][0] + step
+                    else:
+                        counter[k_itemset] = [step, self.__bucket_id - 1]
+
+            self.__n_transactions = self.__n_transactions + step
+            count = count - step
+
+            # Prune at bucket boundary.
+            if self.__n_transactions % self.__bucket_width == 0:
+                for counter in self.__counter.values():
+                    for k_itemset in [k_itemset
+                                      for k_itemset, (k_count, delta) in counter.items()
+                                      if k_count + delta <= self.__bucket_id]:
+                        del counter[k_itemset]
+                self.__bucket_id = self.__bucket_id + 1
+
+    def push_all(self, transactions, counts=None):
+        """Count all transactions.
+
+        Args:
+            transactions (iterable of list of item):
+                Transactions to be counted.
+            counts (iterable of int):
+                Number of times each transaction appeared,
+                default to 1 for all transactions.
+        """
+
+        if counts is None:
+            for transaction in transactions:
+                self.push(transaction)
+        else:
+            for transaction, count in zip(transactions, counts):
+                self.push(transaction, count)
+
+    def n_transactions(self):
+        """Number of counted transactions.
+
+        Returns:
+            int:
+                Number of counted transactions.
+        """
+
+        return self.__n_transactions
+
+    def n_entries(self):
+        """Number of tracked itemsets.
+
+        Returns:
+            int:
+                Number of tracked itemsets of all sizes.
+        """
+
+        return sum(len(counter) for counter in self.__counter.values())
+
+    def count(self, itemset):
+        """Approximate support count of itemset.
+
+        Args:
+            itemset (list of item):
+                Target itemset, size must not greater than max_k.
+
+        Returns:
+            int:
+                Lower bound of true support count,
+                error is at most epsilon * number of transactions.
+
+        Raises:
+            ValueError:
+                If itemset size is not in 1, ..., max_k.
+        """
+
+        k_itemset = tuple(sorted(set(itemset)))
+        if len(k_itemset) not in self.__counter:
+            raise ValueError('Size of itemset should be in 1, ..., max_k={}.'.format(self.__max_k))
+        return self.__counter[len(k_itemset)].get(k_itemset, [0, 0])[0]
+
+    def frequent_k_itemset(self, min_sup, k=1):
+        """Approximate frequent k-itemset.
+
+        Output every itemset with count >= (min_sup - epsilon) * N.
+        No itemset with true support >= min_sup is missed,
+        and no itemset with true support < min_sup - epsilon is output.
+
+        Args:
+            min_sup (float):
+                Minimum support for frequent itemset.
+            k (int):
+                size of frequent itemset
+
+        Returns:
+            dict:
+                Map k-itemset (tuple of item) into approximate support count.
+
+        Raises:
+            ValueError:
+                Valid range of k should be 0 < k <= max_k.
+        """
+
+        if k not in self.__counter:
+            raise ValueError('k should be in 1, ..., max_k={}.'.format(self.__max_k))
+
+        min_count = (min_sup - self.__epsilon) * self.__n_transactions
+        return {k_itemset: count
+                for k_itemset, (count, _) in self.__counter[k].items()
+                if count >= min_count}
+
+    def verify(self, transactions, min_sup, k=1, counts=None):
+        """Exact frequent k-itemset by counting survivors in one more pass.
+
+        Args:
+            transactions (iterable of list of item):
+                Same transactions which were counted.
+            min_sup (float):
+                Minimum support for frequent itemset.
+            k (int):
+                size of frequent itemset
+            counts (iterable of int):
+                Number of times each transaction appeared,
+                default to 1 for all transactions.
+
+        Returns:
+            dict:
+                Map frequent k-itemset (tuple of item) into exact support count.
+        """
+
+        exact_counter = {k_itemset: 0 for k_itemset in self.frequent_k_itemset(min_sup, k)}
+        if counts is None:
+            counts = itertools.repeat(1)
+
+        n_transactions = 0
+        for transaction, count in zip(transactions, counts):
+            n_transactions = n_transactions + count
+            items = sorted(set(transaction))
+            if len(items) < k:
+                continue
+
+            # Enumerate the smaller side.
+            if len(exact_counter) < math.comb(len(items), k):
+                items = set(items)
+                for k_itemset in exact_counter:
+                    if all(map(lambda item: item in items, k_itemset)):
+                        exact_counter[k_itemset] = exact_counter[k_itemset] + count
+            else:
+                for k_itemset in itertools.combinations(items, k):
+                    if k_itemset in exact_counter:
+                        exact_counter[k_itemset] = exact_counter[k_itemset] + count
+
+        return {k_itemset: count
+                for k_itemset, count in exact_counter.items()
+                if count >= min_sup * n_transactions}
+
+# Test section.
+if __name__ == '__main__':
+    TRANSACTIONS = [
+        [0, 1, 2],
+        [0, 1],
+        [0, 2],
+        [0, 3],
+        [1, 2],
+        [0, 1, 2],
+    ] * 100
+    EPSILON = 0.01
+
+    LC = LossyCounter(epsilon=EPSILON, max_k=2)
+    LC.push_all(TRANSACTIONS)
+
+    for k_itemset, answer in [((0,), 500), ((1,), 400), ((0, 1), 300), ((2, 3), 0)]:
+        assert answer - EPSILON * len(TRANSACTIONS) <= LC.count(k_itemset) <= answer, \
+            'Bug in `LossyCounter.count`.'
+
+    assert set(LC.verify(TRANSACTIONS, 0.5, 2)) == {(0, 1), (0, 2), (1, 2)}, \
+        'Bug in `LossyCounter.verify`.'
+    assert set(LC.frequent_k_itemset(0.6, 1)) == {(0,), (1,), (2,)}, \
+        'Bug in `LossyCounter.frequent_k_itemset`.'
+
+    # Weighted transactions should give the same count.
+    WEIGHTED_LC = LossyCounter(epsilon=EPSILON, max_k=2)
+    WEIGHTED_LC.push_all(TRANSACTIONS[:6], [100] * 6)
+    for k_itemset in [(0,), (1,), (0, 1), (2, 3)]:
+        assert WEIGHTED_LC.count(k_itemset) <= LC.count(k_itemset) + EPSILON * len(TRANSACTIONS), \
+            'Bug in `LossyCounter.push`.'
+    assert WEIGHTED_LC.verify(TRANSACTIONS[:6], 0.5, 2, [100] * 6) == LC.verify(TRANSACTIONS, 0.5, 2), \
+        'Bug in `LossyCounter.verify`.'
@@ -0,0 +1,238 @@
+"""Module of interestingness measures.
+
+Compute interestingness measures of association rules in bulk with NumPy.
+See test section for code example.
+"""
+
+import numpy as np
+
+MEASURES = ('support', 'confidence', 'lift', 'leverage', 'conviction', 'jaccard', 'kulczynski')
+
+def rule_measures(union_count, condition_count, prediction_count, n_transactions):
+    """Interestingness measures of association rules `condition` -> `prediction`.
+
+    All arguments except `n_transactions` are aligned arrays,
+    i-th element of each array belongs to i-th association rule.
+    Conviction is infinity if confidence is 1.
+
+    Args:
+        union_count (array of int):
+            Support count of condition and prediction together.
+        condition_count (array of int):
+            Support count of condition.
+        prediction_count (array of int):
+            Support count of prediction.
+        n_transactions (int):
+            Number of transactions.
+
+    Returns:
+        dict:
+            Map each name in `MEASURES` into array of float.
+    """
+
+    union_sup = np.asarray(union_count, dtype=np.float64) / n_transactions
+    condition_sup = np.asarray(condition_count, dtype=np.float64) / n_transactions
+    prediction_sup = np.asarray(prediction_count, dtype=np.float64) / n_transactions
+
+    # Use count division for confidence, so result is the same as `confidence()`.
+    confidence = (np.asarray(union_count, dtype=np.float64)
+                  / np.asarray(condition_count, dtype=np.float64))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        conviction = np.where(confidence < 1,
+                              (1 - prediction_sup) / (1 - confidence),
+                              np.inf)
+
+    return {
+        'support': union_sup,
+        'confidence': confidence,
+        'lift': confidence / prediction_sup,
+        'leverage': union_sup - condition_sup * prediction_sup,
+        'conviction': conviction,
+        'jaccard': union_sup / (condition_sup + prediction_sup - union_sup),
+        'kulczynski': (union_sup / condition_sup + union_sup / prediction_sup) / 2,
+    }
+
+def split_itemset(itemset):
+    """All possible ways of splitting itemset into two smaller itemsets.
+
+    Same problem as 2 equivalent classes,
+    number of possible combinations is Stirling number of the second kind S(k, 2).
+
+    Args:
+        itemset (list of item):
+            Target itemset to be split, at least 2 items.
+
+    Returns:
+        list of tuple of list of item:
+            All possible combinations of two smaller itemsets.
+    """
+
+    # Recursive end condition.
+    if len(itemset) == 2:
+        return [([itemset[0]], [itemset[1]])]
+
+    all_split = []
+
+    # First way to split: 1-itemset & k-1-itemset
+    all_split.append(([itemset[0]], itemset[1:]))
+    for front, back in split_itemset(itemset[1:]):
+        # Second way to split: 1-itemset + k-n-1-itemset & n-itemset
+        # Keep order by put 1-itemset at front.
+        all_split.append(([itemset[0]]+front, back))
+
+        # Third way to split: k-n-1-itemset & 1-itemset + n-itemset
+        # Keep order by put 1-itemset at front.
+        all_split.append((front, [itemset[0]]+back))
+    return all_split
+
+# Number of candidate rules measured together by `iter_rules`.
+RULE_BATCH_SIZE = 65536
+
+def iter_rules(trie, split_itemset, support_count, allow_rule,
+               n_transactions, min_cof=0.1, min_lift=0, batch_size=RULE_BATCH_SIZE):
+    """Generate association rules and their measures batch by batch.
+
+    Support counts of candidate rules are gathered until a batch is full,
+    then confidence and lift thresholds are applied on arrays of the batch,
+    so memory does not grow with number of rules.
+    Support counts are read from trie,
+    only conditions and predictions not in trie (filtered out by constraint) are counted.
+
+    Args:
+        trie (ItemsetTrie):
+            Frequent itemsets to be splited into rules, with support counts.
+        split_itemset (callable):
+            Split itemset into list of (front, back) pairs, such as `split_itemset`.
+        support_count (callable):
+            Support count of itemset not in trie.
+        allow_rule (callable):
+            Whether rule `condition` -> `prediction` is allowed.
+        n_transactions (int):
+            Number of transactions.
+        min_cof (float):
+            Minimum confidence for association rule.
+        min_lift (float):
+            Minimum lift for association rule.
+        batch_size (int):
+            Number of candidate rules in a batch, 0 for one batch of all rules.
+
+    Yields:
+        tuple of list of dict and dict:
+            Association rules of a batch as in `association_rules()`,
+            and map each name in `MEASURES` into array aligned with rules.
+            At least one (maybe empty) batch is yielded.
+    """
+
+    def measure_batch():
+        measures = rule_measures(union_count, condition_count, prediction_count, n_transactions)
+        keep = (measures['confidence'] >= min_cof) & (measures['lift'] >= min_lift)
+        rules = [{'condition': conditions[i], 'prediction': predictions[i]}
+                 for i in np.flatnonzero(keep)]
+        return rules, {name: values[keep] for name, values in measures.items()}
+
+    conditions = []
+    predictions = []
+    union_count = []
+    condition_count = []
+    prediction_count = []
+    n_batches = 0
+    for f_itemset, f_itemset_count in trie.itemsets():
+        if len(f_itemset) >= 2:
+            for front, back in split_itemset(f_itemset):
+                # Both front -> back and back -> front are candidates.
+                for condition, prediction in ((front, back), (back, front)):
+                    if allow_rule(condition, prediction):
+                        conditions.append(condition)
+                        predictions.append(prediction)
+                        union_count.append(f_itemset_count)
+                        for itemset, counts in ((condition, condition_count),
+                                                (prediction, prediction_count)):
+                            count = trie.get(itemset)
+                            counts.append(support_count(itemset) if count is None else count)
+
+            if batch_size and len(conditions) >= batch_size:
+                yield measure_batch()
+                n_batches = n_batches + 1
+                for values in (conditions, predictions, union_count,
+                               condition_count, prediction_count):
+                    values.clear()
+
+    if conditions or not n_batches:
+        yield measure_batch()
+
+def generate_rules(trie, split_itemset, support_count, allow_rule,
+                   n_transactions, min_cof=0.1, min_lift=0):
+    """Generate association rules and their measures in bulk.
+
+    Same as `iter_rules` with all rules in one batch.
+
+    Args:
+        trie (ItemsetTrie):
+            Frequent itemsets to be splited into rules, with support counts.
+        split_itemset (callable):
+            Split itemset into list of (front, back) pairs, such as `split_itemset`.
+        support_count (callable):
+            Support count of itemset not in trie.
+        allow_rule (callable):
+            Whether rule `condition` -> `prediction` is allowed.
+        n_transactions (int):
+            Number of transactions.
+        min_cof (float):
+            Minimum confidence for association rule.
+        min_lift (float):
+            Minimum lift for association rule.
+
+    Returns:
+        tuple of list of dict and dict:
+            Association rules as in `association_rules()`,
+            and map each name in `MEASURES` into array aligned with rules.
+    """
+
+    return next(iter_rules(trie, split_itemset, support_count, allow_rule,
+                           n_transactions, min_cof, min_lift, batch_size=0))
+
+def attach_measures(rules, measures):
+    """Copy rules with their measures.
+
+    Args:
+        rules (list of dict):
+            Association rules.
+        measures (dict):
+            Map each name in `MEASURES` into array aligned with rules.
+
+    Returns:
+        list of dict:
+            Copied rules, each has extra keys in `MEASURES`.
+    """
+
+    rules_with_measures = []
+    for i, rule in enumerate(rules):
+        rule = dict(rule)
+        for name in MEASURES:
+            rule[name] = float(measures[name][i])
+        rules_with_measures.append(rule)
+    return rules_with_measures
+
+# Test section.
+if __name__ == '__main__':
+    # Rule a -> b with 10 transactions, a appears 5 times, b appears 4 times, ab appears 2 times.
+    MEASURE = rule_measures([2], [5], [4], 10)
+    ANSWER = {
+        'support': 0.2,
+        'confidence': 0.4,
+        'lift': 1.0,
+        'leverage': 0.0,
+        'conviction': 1.0,
+        'jaccard': 2 / 7,
+        'kulczynski': 0.45,
+    }
+    for NAME, VALUE in ANSWER.items():
+        assert abs(MEASURE[NAME][0] - VALUE) < 1e-9, 'Bug in `rule_measures` of {}.'.format(NAME)
+    assert rule_measures([3], [3], [4], 10)['conviction'][0] == np.inf, \
+        'Bug in `rule_measures` of conviction.'
+
+    # Itemset of 3 items splits in S(3, 2) = 3 ways.
+    assert (sorted(split_itemset(['a', 'b', 'c']))
+            == [(['a'], ['b', 'c']), (['a', 'b'], ['c']), (['b'], ['a', 'c'])]), \
+        'Bug in `split_itemset`.'
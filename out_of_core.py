@@ -0,0 +1,527 @@
+"""Module for association rules generation over transactions larger than memory.
+
+Use class `AssociationRuleMining` to generate association rules
+from transactions stored on disk, see test section for code example.
+"""
+
+import json
+import os
+import shutil
+import struct
+import tempfile
+
+from constraint import ItemConstraint
+from encoder import StringToIntegerEncoder, ListToIntegerEncoder, ItemsetView
+from fp_growth import _build_fp_tree, _mine_fp_tree
+from frozen import FrozenModel
+from itemset_trie import ItemsetTrie
+from measure import RULE_BATCH_SIZE, attach_measures, generate_rules, iter_rules, split_itemset
+from support_cache import SupportCache
+
+class TransactionFile:
+    """Transactions stored in JSON lines file, one list of item per line.
+
+    Transactions are read lazily on each iteration,
+    so the file can be iterated many times without loading it into memory.
+    """
+
+    def __init__(self, path):
+        """Initialize transaction file.
+
+        Args:
+            path (str):
+                JSON lines file path.
+        """
+
+        self.__path = path
+
+    def __iter__(self):
+        with open(self.__path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+class AssociationRuleMining:
+    """Generate association rule with disk-backed projected databases.
+
+    First pass counts items and builds F-list (frequent items sorted by descending support count).
+    Second pass writes, for each frequent item, the prefixes of transactions
+    ending right before it in F-list order (its projected database) into its own partition file.
+    Each partition is then loaded and mined independently with FP-Growth,
+    so memory only needs to hold one partition at a time.
+    Result is the same as `fp_growth.AssociationRuleMining`.
+    """
+
+    def __init__(self, transactions=None, min_sup=0.1, min_cof=0.1, max_k=0,
+                 constraint=None, min_lift=0,
+                 support_cache=None, tmp_dir=None, max_buffer_bytes=64 * 1024 * 1024):
+        """Initialize settings for association rule mining.
+
+        Args:
+            transactions （iterable of list of item):
+                Transaction database which can be iterated more than once,
+                such as `TransactionFile`.
+            min_sup (float):
+                Minimum support for frequent itemset.
+            min_cof (float):
+                Minimum confidence for association rule.
+            max_k (int):
+                Maximum size for freuent itemset (k-itemset).
+            constraint (ItemConstraint):
+                Item and length constraints pushed into mining.
+            min_lift (float):
+                Minimum lift for association rule.
+            support_cache (SupportCache):
+                Cache of support counts, default to an unbounded cache.
+            tmp_dir (str):
+                Directory of partition files, default to system temporary directory.
+            max_buffer_bytes (int):
+                Maximum estimated memory (in bytes) of buffered projected transactions
+                before they are flushed into partition files.
+        """
+
+        self.__min_sup = min_sup
+        self.__min_cof = min_cof
+        self.__min_lift = min_lift
+        self.__sup_count = SupportCache() if support_cache is None else support_cache
+        self.__frequent_k_itemset = {}
+        self.__association_rules = []
+        self.__trie = None
+        self.__rule_measures = {}
+        self.__item_encoder = StringToIntegerEncoder()
+        self.__itemset_encoder = ListToIntegerEncoder()
+        self.__transactions = transactions
+        self.__tmp_dir = tmp_dir
+        self.__max_buffer_bytes = max_buffer_bytes
+        self.__constraint = constraint or ItemConstraint()
+
+        # First pass: encode and count items.
+        self.__n_transactions = 0
+        self.__item_count = {}
+        longest_transaction = 0
+        for transaction in self.__encode_transactions():
+            self.__n_transactions = self.__n_transactions + 1
+            longest_transaction = max(longest_transaction, len(transaction))
+            for item in transaction:
+                self.__item_count[item] = self.__item_count.get(item, 0) + 1
+
+        # Push item constraints into mining by projecting transactions,
+        # items have to be counted again in projected transactions.
+        self.__encoded_constraint = self.__constraint.encode(self.__item_encoder)
+        if not self.__constraint.is_empty():
+            self.__item_count = {}
+            for transaction in self.__mining_transactions():
+                for item in transaction:
+                    self.__item_count[item] = self.__item_count.get(item, 0) + 1
+
+        self.__max_k = max_k
+        if self.__max_k <= 0:
+            self.__max_k = longest_transaction
+
+    def __encode_transactions(self):
+        """Encode transactions lazily.
+
+        This method is intended to be private.
+
+        Returns:
+            iterator of list of int:
+                Sorted encoded items of each transaction, duplicated items are removed.
+        """
+
+        for transaction in self.__transactions:
+            yield sorted(set(self.__item_encoder.encode_from_string_list(transaction)))
+
+    def __mining_transactions(self):
+        """Encode and project transactions lazily.
+
+        This method is intended to be private.
+
+        Returns:
+            iterator of list of int:
+                Encoded transactions projected by item constraints.
+        """
+
+        for transaction in self.__encode_transactions():
+            for projected_transaction, _ in self.__encoded_constraint.project([(transaction, 1)]):
+                yield projected_transaction
+
+    @staticmethod
+    def __write_partitions(partition_dir, buffers):
+        """Append buffered projected transactions into partition files.
+
+        Each record is count, length and items, all unsigned 32-bit little endian integers.
+        This method is intended to be private.
+
+        Args:
+            partition_dir (str):
+                Directory of partition files.
+            buffers (dict):
+                Map item into dict of projected transaction (tuple of int) and count.
+        """
+
+        for item, buffer in buffers.items():
+            with open(os.path.join(partition_dir, '{}.bin'.format(item)), 'ab') as f:
+                for transaction, count in buffer.items():
+                    f.write(struct.pack('<{}I'.format(len(transaction) + 2),
+                                        count, len(transaction), *transaction))
+
+    @staticmethod
+    def __read_partition(partition_dir, item):
+        """Read projected database of item.
+
+        This method is intended to be private.
+
+        Args:
+            partition_dir (str):
+                Directory of partition files.
+            item (int):
+                Encoded frequent item.
+
+        Returns:
+            list of tuple of list of int and int:
+                Projected transactions paired with count.
+        """
+
+        path = os.path.join(partition_dir, '{}.bin'.format(item))
+        if not os.path.exists(path):
+            return []
+
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        pattern_base = []
+        offset = 0
+        while offset < len(data):
+            count, length = struct.unpack_from('<II', data, offset)
+            transaction = list(struct.unpack_from('<{}I'.format(length), data, offset + 8))
+            pattern_base.append((transaction, count))
+            offset = offset + 8 + 4 * length
+        return pattern_base
+
+    def __mine(self):
+        """Mine all frequent itemsets with disk-backed projected databases.
+
+        This method is intended to be private.
+        """
+
+        for i in range(self.__max_k):
+            self.__frequent_k_itemset[i+1] = set()
+
+        min_count = self.__min_sup * self.__n_transactions
+
+        # Build F-list.
+        f_list = [item for item, count in self.__item_count.items() if count >= min_count]
+        f_list.sort(key=lambda item: (-self.__item_count[item], item))
+        f_rank = {item: rank for rank, item in enumerate(f_list)}
+
+        partition_dir = tempfile.mkdtemp(prefix='arm-', dir=self.__tmp_dir)
+        try:
+            # Second pass: write projected database of each frequent item.
+            # Identical projected transactions are collapsed in buffer.
+            buffers = {}
+            buffer_bytes = 0
+            for transaction in self.__mining_transactions():
+                transaction = [item for item in transaction if item in f_rank]
+                transaction.sort(key=f_rank.get)
+                for i in range(1, len(transaction)):
+                    prefix = tuple(transaction[:i])
+                    buffer = buffers.setdefault(transaction[i], {})
+                    if prefix in buffer:
+                        buffer[prefix] = buffer[prefix] + 1
+                    else:
+                        buffer[prefix] = 1
+                        # Tuple of i items plus hash table slot and count.
+                        buffer_bytes = buffer_bytes + 8 * i + 160
+                if buffer_bytes >= self.__max_buffer_bytes:
+                    AssociationRuleMining.__write_partitions(partition_dir, buffers)
+                    buffers = {}
+                    buffer_bytes = 0
+            AssociationRuleMining.__write_partitions(partition_dir, buffers)
+            buffers = None
+
+            # Mine each partition independently, then drop it.
+            for item in f_list:
+                result = {(item,): self.__item_count[item]}
+                if self.__max_k > 1:
+                    header_table, item_count = _build_fp_tree(
+                        AssociationRuleMining.__read_partition(partition_dir, item),
+                        min_count,
+                        f_rank)
+                    _mine_fp_tree(header_table, item_count, [item], min_count, self.__max_k,
+                                  list(header_table), result)
+                partition_path = os.path.join(partition_dir, '{}.bin'.format(item))
+                if os.path.exists(partition_path):
+                    os.remove(partition_path)
+
+                for itemset, count in result.items():
+                    if not self.__encoded_constraint.satisfy(itemset):
+                        continue
+                    encoded_itemset = self.__itemset_encoder.encode_from_list(list(itemset))
+                    self.__frequent_k_itemset[len(itemset)].add(encoded_itemset)
+                    self.__sup_count.put(self.__itemset_encoder.decode_to_tuple(encoded_itemset), count, pin=True)
+        finally:
+            shutil.rmtree(partition_dir, ignore_errors=True)
+
+    def support_count(self, itemset):
+        """Support count for the itemset.
+
+        Support count of frequent itemset is cached by mining,
+        other itemsets need one more pass over transactions.
+
+        Args:
+            itemset (list of item):
+                Item cannot be encoded form.
+
+        Returns:
+            int:
+                Support count for the given itemset.
+        """
+
+        # Encode items in itemset without growing encoder,
+        # item never seen before is in no transaction.
+        itemset = self.__item_encoder.lookup_string_list(itemset)
+        if itemset is None:
+            return 0
+
+        # Sorted items are the key of support count cache, so evicted keys are freed.
+        key = tuple(itemset)
+
+        # If already calculated before, skip the calculation process.
+        sup_count = self.__sup_count.get(key)
+        if sup_count is not None:
+            pass
+        # Else enumerate all transactions to do support count.
+        else:
+            sup_count = 0
+            for transaction in self.__encode_transactions():
+                if all(map(lambda item: item in transaction, itemset)):
+                    sup_count = sup_count + 1
+            self.__sup_count.put(key, sup_count)
+
+        # Support count cached result.
+        return sup_count
+
+    def support(self, itemset):
+        """Support for the itemset.
+
+        Args:
+            itemset (list of item):
+                Item cannot be encoded form.
+
+        Returns:
+            float:
+                Support for the given itemset.
+        """
+
+        return self.support_count(itemset) / self.__n_transactions
+
+    def confidence(self, itemset_1, itemset_2):
+        """Confidence of association rule `itemset_1` -> `itemset_2`.
+
+        Args:
+            itemset_1 (list of item):
+                Denominator of confidence formula.
+            itemset_2 (list of item):
+                Combine with `itemset_1` to form nominator of confidence formula.
+
+        Returns:
+            float:
+                Confidence of the given association rule.
+        """
+
+        return self.support_count(itemset_1 + itemset_2) / self.support_count(itemset_1)
+
+    def support_cache_stats(self):
+        """Statistics of support count cache.
+
+        Returns:
+            dict:
+                See `SupportCache.stats` for keys.
+        """
+
+        return self.__sup_count.stats()
+
+    def frequent_k_itemset(self, k=1):
+        """Frequent k-itemset of the transactions.
+
+        All frequent itemsets are generated at first call.
+
+        Args:
+            k (int):
+                size of frequent itemset
+
+        Returns:
+            ItemsetView of k-itemset:
+                Itemsets in list are frequent k-itemset.
+
+        Raises:
+            ValueError:
+                Valid range of k should be 0 < k <= self.max_k.
+        """
+
+        # Validation for k.
+        if k <= 0:
+            raise ValueError('k should be greater than 0.')
+        if k > self.__max_k:
+            raise ValueError('k should be smaller than or equal to max_k={}.'.format(self.__max_k))
+
+        # If already calculated before, skip the calculation process.
+        if k in self.__frequent_k_itemset:
+            pass
+        # Else mine all partitions.
+        else:
+            self.__mine()
+
+        # Frequent k-itemset cached result, decoded only when touched.
+        return ItemsetView(self.__item_encoder,
+                           [self.__itemset_encoder.decode_to_tuple(k_itemset)
+                            for k_itemset in self.__frequent_k_itemset[k]])
+
+    def frequent_itemset(self, len_descend=True):
+        """Frequent itemset of the transactions.
+
+        Calculate frequent k-itemset, k=1, ..., self.max_k,
+        and combine result to form frequent itemset.
+
+        Args:
+            len_descend (bool):
+                Show frequent itemset list in descend length order.
+
+        Returns:
+            ItemsetView of frequent itemset:
+                All frequent itemsets of the transactions.
+        """
+
+        f_itemset = []
+        for k in range(self.__max_k):
+            f_itemset.extend(self.frequent_k_itemset(k+1).encoded())
+        f_itemset.sort(key=len, reverse=len_descend)
+        return ItemsetView(self.__item_encoder, f_itemset)
+
+    def association_rules(self, measures=False):
+        """List all association rules of the transactions.
+
+        Split frequent itemset into two part, and calculate confidence.
+        Number of possible conbination of split is Stiring number of second kind.
+        Measures of all rules are calculated in bulk from cached support counts,
+        and rules with lift smaller than `min_lift` are never generated.
+
+        Args:
+            measures (bool):
+                Also return interestingness measures of each rule.
+
+        Returns:
+            list of dict:
+                Each dict has two keys,
+                'condition' stands occurence of itemset,
+                'prediction' stands cooccurence itemset.
+                If `measures` is set, each dict also has keys in `measure.MEASURES`.
+        """
+
+        # If already calculated before, skip the calculation process.
+        if self.__association_rules:
+            pass
+        # Else enumerate frequent itemset, split into two part and calculate measures.
+        else:
+            self.__association_rules, self.__rule_measures = generate_rules(
+                self.trie(),
+                split_itemset,
+                self.support_count,
+                self.__constraint.allow_rule,
+                self.__n_transactions,
+                self.__min_cof,
+                self.__min_lift)
+
+        if measures:
+            return attach_measures(self.__association_rules, self.__rule_measures)
+
+        # Association rule cached result.
+        return self.__association_rules
+
+    def iter_association_rules(self, batch_size=RULE_BATCH_SIZE):
+        """Stream association rules with their measures.
+
+        Rules are generated batch by batch and are not cached,
+        so memory does not grow with number of rules.
+
+        Args:
+            batch_size (int):
+                Number of candidate rules measured together.
+
+        Yields:
+            dict:
+                Association rule as in `association_rules(measures=True)`.
+        """
+
+        for rules, measures in iter_rules(
+                self.trie(),
+                split_itemset,
+                self.support_count,
+                self.__constraint.allow_rule,
+                self.__n_transactions,
+                self.__min_cof,
+                self.__min_lift,
+                batch_size):
+            yield from attach_measures(rules, measures)
+
+    def trie(self):
+        """Frequent itemsets with support counts in a prefix trie.
+
+        Built once from `frequent_itemset()`, and shared by rule generation and `freeze()`.
+
+        Returns:
+            ItemsetTrie:
+                Trie for support, subset and superset queries of frequent itemsets.
+        """
+
+        # If already built before, skip the building process.
+        if self.__trie is None:
+            self.__trie = ItemsetTrie([(f_itemset, self.support_count(f_itemset))
+                                       for f_itemset in self.frequent_itemset()])
+
+        # Trie cached result.
+        return self.__trie
+
+    def freeze(self):
+        """Immutable model of mining result for concurrent queries.
+
+        Queries of frozen model never mutate caches or encoders,
+        so one frozen model can be shared by many threads.
+        Later changes of this object are not reflected in frozen model.
+
+        Returns:
+            FrozenModel:
+                Frequent itemsets, supports and association rules.
+        """
+
+        return FrozenModel(self.trie(),
+                           self.association_rules(measures=True),
+                           self.__n_transactions,
+                           self.support_count)
+
+# Test section.
+if __name__ == '__main__':
+    # Load data.
+    DATA_PATH = os.path.dirname(os.path.abspath(__file__)) + '/data'
+    DATA_NAME = '/IBM.json'
+
+    with open(DATA_PATH + DATA_NAME, 'r') as f:
+        TRANSACTIONS = json.loads(f.read())
+
+    with tempfile.TemporaryDirectory() as TMP_DIR:
+        # Store transactions as JSON lines, so they are never loaded into memory at once.
+        TRANSACTION_PATH = os.path.join(TMP_DIR, 'transactions.jsonl')
+        with open(TRANSACTION_PATH, 'w') as f:
+            for transaction in TRANSACTIONS:
+                f.write(json.dumps(transaction) + '\n')
+
+        # Create instance, flush projected transactions often.
+        ARM = AssociationRuleMining(transactions=TransactionFile(TRANSACTION_PATH),
+                                    min_sup=0.2,
+                                    min_cof=0.5,
+                                    tmp_dir=TMP_DIR,
+                                    max_buffer_bytes=1024)
+
+        # Print support count for all frequent itemsets.
+        for fi in ARM.frequent_itemset():
+            print('support count: {}, itemset: {}'.format(ARM.support_count(fi), fi))
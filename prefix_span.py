@@ -0,0 +1,494 @@
+"""Module for sequential patterns generation.
+
+Use class `SequentialPatternMining` to generate frequent sequences and sequential rules
+with PrefixSpan algorithm, see test section for code example.
+"""
+
+import bisect
+
+import numpy as np
+
+from encoder import StringToIntegerEncoder
+from measure import MEASURES, attach_measures, rule_measures
+from support_cache import SupportCache
+
+class SequenceFile:
+    """Sequences stored in IBM format file.
+
+    Each line has whitespace separated columns of customer id, transaction id and item.
+    Lines of the same customer are consecutive and ordered by transaction id,
+    each customer is a sequence, and each transaction of customer is an element of sequence.
+    Sequences are read lazily on each iteration,
+    so the file can be iterated many times without loading it into memory.
+    """
+
+    def __init__(self, path):
+        """Initialize sequence file.
+
+        Args:
+            path (str):
+                IBM format file path.
+        """
+
+        self.__path = path
+
+    def __iter__(self):
+        with open(self.__path, 'r') as f:
+            customer_id = None
+            transaction_id = None
+            sequence = []
+            for line in f:
+                columns = line.split()
+                if len(columns) < 3:
+                    continue
+                if columns[0] != customer_id:
+                    if sequence:
+                        yield sequence
+                    sequence = []
+                    transaction_id = None
+                if columns[1] != transaction_id:
+                    sequence.append([])
+                customer_id = columns[0]
+                transaction_id = columns[1]
+                sequence[-1].append(columns[2])
+            if sequence:
+                yield sequence
+
+class SequentialPatternMining:
+    """Generate frequent sequences and sequential rules with PrefixSpan algorithm.
+
+    A sequence is a list of elements, and each element is a list of items (a transaction).
+    Projected databases are pseudo-projections: each projected sequence is an index of
+    (sequence, element, item position) where the prefix ends, instead of a copied suffix,
+    so projecting never copies sequences.
+    """
+
+    def __init__(self, sequences=None, min_sup=0.1, min_cof=0.1, max_k=0, min_lift=0,
+                 support_cache=None):
+        """Initialize settings for sequential pattern mining.
+
+        Args:
+            sequences (iterable of list of list of item):
+                Sequence database, such as `SequenceFile`.
+            min_sup (float):
+                Minimum support for frequent sequence.
+            min_cof (float):
+                Minimum confidence for sequential rule.
+            max_k (int):
+                Maximum number of items of frequent sequence, 0 for no limit.
+            min_lift (float):
+                Minimum lift for sequential rule.
+            support_cache (SupportCache):
+                Cache of support counts, default to an unbounded cache.
+        """
+
+        self.__min_sup = min_sup
+        self.__min_cof = min_cof
+        self.__min_lift = min_lift
+        self.__max_k = max_k
+        self.__sup_count = SupportCache() if support_cache is None else support_cache
+        self.__frequent_sequences = None
+        self.__sequential_rules = []
+        self.__rule_measures = {}
+        self.__item_encoder = StringToIntegerEncoder()
+
+        # Encode sequences to speed up calculation,
+        # each element is a sorted tuple of items,
+        # and identical sequences are collapsed and paired with their count.
+        sequence_count = {}
+        self.__n_sequences = 0
+        for sequence in sequences:
+            encoded_sequence = self.__encode_sequence(sequence)
+            sequence_count[encoded_sequence] = sequence_count.get(encoded_sequence, 0) + 1
+            self.__n_sequences = self.__n_sequences + 1
+        self.__encoded_sequences = list(sequence_count.items())
+
+    def __encode_sequence(self, sequence):
+        """Encode items of sequence.
+
+        This method is intended to be private.
+
+        Args:
+            sequence (list of list of item):
+                Target sequence.
+
+        Returns:
+            tuple of tuple of int:
+                Encoded sequence, items of each element are sorted and unique.
+        """
+
+        return tuple(tuple(sorted(set(self.__item_encoder.encode_from_string_list(element))))
+                     for element in sequence if element)
+
+    def __decode_sequence(self, sequence):
+        """Decode items of sequence.
+
+        This method is intended to be private.
+
+        Args:
+            sequence (tuple of tuple of int):
+                Encoded sequence.
+
+        Returns:
+            list of list of item:
+                Decoded sequence.
+        """
+
+        return [self.__item_encoder.decode_to_string_list(list(element)) for element in sequence]
+
+    @staticmethod
+    def __contain(sequence, pattern):
+        """Whether sequence contains pattern as subsequence.
+
+        Each element of pattern is matched to the earliest possible element of sequence.
+        This method is intended to be private.
+
+        Args:
+            sequence (tuple of tuple of int):
+                Encoded sequence.
+            pattern (tuple of tuple of int):
+                Encoded pattern.
+
+        Returns:
+            bool:
+                True if every element of pattern is a subset of an element of sequence in order.
+        """
+
+        e = 0
+        for pattern_element in pattern:
+            while e < len(sequence) and not set(pattern_element).issubset(sequence[e]):
+                e = e + 1
+            if e == len(sequence):
+                return False
+            e = e + 1
+        return True
+
+    @staticmethod
+    def __find(element, item, start=0):
+        """Position of item in sorted element.
+
+        This method is intended to be private.
+
+        Args:
+            element (tuple of int):
+                Sorted element.
+            item (int):
+                Target item.
+            start (int):
+                Only search from this position.
+
+        Returns:
+            int:
+                Position of item, -1 if not found.
+        """
+
+        position = bisect.bisect_left(element, item, start)
+        if position < len(element) and element[position] == item:
+            return position
+        return -1
+
+    def support_count(self, sequence):
+        """Support count for the sequence.
+
+        Number of sequences in database containing the sequence as subsequence.
+
+        Args:
+            sequence (list of list of item):
+                Item cannot be encoded form.
+
+        Returns:
+            int:
+                Support count for the given sequence.
+        """
+
+        pattern = self.__encode_sequence(sequence)
+
+        # If already calculated before, skip the calculation process.
+        sup_count = self.__sup_count.get(pattern)
+        if sup_count is not None:
+            pass
+        # Else enumerate all sequences to do support count.
+        else:
+            sup_count = 0
+            for encoded_sequence, count in self.__encoded_sequences:
+                if SequentialPatternMining.__contain(encoded_sequence, pattern):
+                    sup_count = sup_count + count
+            self.__sup_count.put(pattern, sup_count)
+
+        # Support count cached result.
+        return sup_count
+
+    def support(self, sequence):
+        """Support for the sequence.
+
+        Args:
+            sequence (list of list of item):
+                Item cannot be encoded form.
+
+        Returns:
+            float:
+                Support for the given sequence.
+        """
+
+        return self.support_count(sequence) / self.__n_sequences
+
+    def confidence(self, sequence_1, sequence_2):
+        """Confidence of sequential rule `sequence_1` -> `sequence_2`.
+
+        Args:
+            sequence_1 (list of list of item):
+                Sequence happening first, denominator of confidence formula.
+            sequence_2 (list of list of item):
+                Sequence happening after `sequence_1`,
+                combine with `sequence_1` to form nominator of confidence formula.
+
+        Returns:
+            float:
+                Confidence of the given sequential rule.
+        """
+
+        return self.support_count(sequence_1 + sequence_2) / self.support_count(sequence_1)
+
+    def support_cache_stats(self):
+        """Statistics of support count cache.
+
+        Returns:
+            dict:
+                See `SupportCache.stats` for keys.
+        """
+
+        return self.__sup_count.stats()
+
+    def __is_frequent(self, count):
+        """Whether support count reaches minimum support.
+
+        This method is intended to be private.
+
+        Args:
+            count (int):
+                Support count.
+
+        Returns:
+            bool:
+                True if support is greater than or equal to minimum support.
+        """
+
+        return count / self.__n_sequences >= self.__min_sup
+
+    def __mine(self, prefix, n_items, projection):
+        """Mine frequent sequences with prefix recursively.
+
+        Frequent items of projected database extend prefix in two ways,
+        added into last element of prefix (itemset extension),
+        or appended as a new element (sequence extension).
+        This method is intended to be private.
+
+        Args:
+            prefix (tuple of tuple of int):
+                Encoded frequent sequence.
+            n_items (int):
+                Number of items of prefix.
+            projection (list of tuple of int):
+                Pseudo-projected database of prefix,
+                (sequence index, element index, item position) of the earliest end of prefix.
+        """
+
+        if self.__max_k and n_items >= self.__max_k:
+            return
+
+        last_element = prefix[-1]
+        i_count = {}
+        s_count = {}
+        for i, e, p in projection:
+            sequence, count = self.__encoded_sequences[i]
+
+            # Items after prefix in the same element, or in a later element
+            # containing last element of prefix, can extend last element.
+            i_items = set(sequence[e][p+1:])
+            s_items = set()
+            for element in sequence[e+1:]:
+                s_items.update(element)
+                if set(last_element).issubset(element):
+                    i_items.update(element[bisect.bisect_right(element, last_element[-1]):])
+
+            for item in i_items:
+                i_count[item] = i_count.get(item, 0) + count
+            for item in s_items:
+                s_count[item] = s_count.get(item, 0) + count
+
+        # Itemset extension.
+        for item in sorted(i_count):
+            if not self.__is_frequent(i_count[item]):
+                continue
+            extended_element = last_element + (item,)
+            new_projection = []
+            for i, e, p in projection:
+                sequence, _ = self.__encoded_sequences[i]
+                position = SequentialPatternMining.__find(sequence[e], item, p+1)
+                if position >= 0:
+                    new_projection.append((i, e, position))
+                    continue
+                for next_e in range(e+1, len(sequence)):
+                    if set(extended_element).issubset(sequence[next_e]):
+                        new_projection.append(
+                            (i, next_e, SequentialPatternMining.__find(sequence[next_e], item)))
+                        break
+            self.__add_frequent(prefix[:-1] + (extended_element,), i_count[item])
+            self.__mine(prefix[:-1] + (extended_element,), n_items + 1, new_projection)
+
+        # Sequence extension.
+        for item in sorted(s_count):
+            if not self.__is_frequent(s_count[item]):
+                continue
+            new_projection = []
+            for i, e, _ in projection:
+                sequence, _ = self.__encoded_sequences[i]
+                for next_e in range(e+1, len(sequence)):
+                    position = SequentialPatternMining.__find(sequence[next_e], item)
+                    if position >= 0:
+                        new_projection.append((i, next_e, position))
+                        break
+            self.__add_frequent(prefix + ((item,),), s_count[item])
+            self.__mine(prefix + ((item,),), n_items + 1, new_projection)
+
+    def __add_frequent(self, sequence, count):
+        """Keep a frequent sequence and its support count.
+
+        This method is intended to be private.
+
+        Args:
+            sequence (tuple of tuple of int):
+                Encoded frequent sequence.
+            count (int):
+                Support count of sequence.
+        """
+
+        self.__frequent_sequences.append(sequence)
+        # Support count of frequent sequence is never evicted.
+        self.__sup_count.put(sequence, count, pin=True)
+
+    def __mine_all(self):
+        """Mine all frequent sequences.
+
+        This method is intended to be private.
+        """
+
+        self.__frequent_sequences = []
+
+        # Count each item once per sequence.
+        item_count = {}
+        for sequence, count in self.__encoded_sequences:
+            for item in set().union(*sequence):
+                item_count[item] = item_count.get(item, 0) + count
+
+        for item in sorted(item_count):
+            if not self.__is_frequent(item_count[item]):
+                continue
+            # Pseudo-projection on the earliest occurrence of item.
+            projection = []
+            for i, (sequence, _) in enumerate(self.__encoded_sequences):
+                for e, element in enumerate(sequence):
+                    position = SequentialPatternMining.__find(element, item)
+                    if position >= 0:
+                        projection.append((i, e, position))
+                        break
+            self.__add_frequent(((item,),), item_count[item])
+            self.__mine(((item,),), 1, projection)
+
+    def frequent_sequence(self, len_descend=True):
+        """Frequent sequences of the sequence database.
+
+        Args:
+            len_descend (bool):
+                Show frequent sequence list in descend order of number of items.
+
+        Returns:
+            list of frequent sequence:
+                All frequent sequences, each is a list of elements (list of items).
+        """
+
+        # If not calculated before, mine all frequent sequences.
+        if self.__frequent_sequences is None:
+            self.__mine_all()
+
+        f_sequence = [self.__decode_sequence(sequence) for sequence in self.__frequent_sequences]
+        f_sequence.sort(key=lambda sequence: sum(map(len, sequence)), reverse=len_descend)
+        return f_sequence
+
+    def sequential_rules(self, measures=False):
+        """List all sequential rules of the sequence database.
+
+        Split frequent sequence between elements into `condition` happening first
+        and `prediction` happening after, both parts are frequent sequences.
+        Rules with confidence smaller than `min_cof` or lift smaller than `min_lift`
+        are never generated.
+
+        Args:
+            measures (bool):
+                Also return interestingness measures of each rule.
+
+        Returns:
+            list of dict:
+                Each dict has two keys,
+                'condition' stands sequence happening first,
+                'prediction' stands sequence happening after.
+                If `measures` is set, each dict also has keys in `measure.MEASURES`.
+        """
+
+        # If already calculated before, skip the calculation process.
+        if self.__sequential_rules:
+            pass
+        # Else enumerate frequent sequences, split into two part and calculate measures.
+        else:
+            conditions = []
+            predictions = []
+            union_count = []
+            condition_count = []
+            prediction_count = []
+            for f_sequence in self.frequent_sequence():
+                for j in range(1, len(f_sequence)):
+                    conditions.append(f_sequence[:j])
+                    predictions.append(f_sequence[j:])
+                    union_count.append(self.support_count(f_sequence))
+                    condition_count.append(self.support_count(f_sequence[:j]))
+                    prediction_count.append(self.support_count(f_sequence[j:]))
+
+            all_measures = rule_measures(union_count, condition_count, prediction_count,
+                                         self.__n_sequences)
+            keep = ((all_measures['confidence'] >= self.__min_cof)
+                    & (all_measures['lift'] >= self.__min_lift))
+            self.__sequential_rules = [{'condition': conditions[i], 'prediction': predictions[i]}
+                                       for i in np.flatnonzero(keep)]
+            self.__rule_measures = {name: all_measures[name][keep] for name in MEASURES}
+
+        if measures:
+            return attach_measures(self.__sequential_rules, self.__rule_measures)
+
+        # Sequential rule cached result.
+        return self.__sequential_rules
+
+# Test section.
+if __name__ == '__main__':
+    # Example sequence database of PrefixSpan paper.
+    SEQUENCES = [
+        [['a'], ['a', 'b', 'c'], ['a', 'c'], ['d'], ['c', 'f']],
+        [['a', 'd'], ['c'], ['b', 'c'], ['a', 'e']],
+        [['e', 'f'], ['a', 'b'], ['d', 'f'], ['c'], ['b']],
+        [['e'], ['g'], ['a', 'f'], ['c'], ['b'], ['c']],
+    ]
+
+    SPM = SequentialPatternMining(sequences=SEQUENCES, min_sup=2/4, min_cof=0.5)
+    assert len(SPM.frequent_sequence()) == 53, 'Bug in `SequentialPatternMining.frequent_sequence`.'
+    assert SPM.support_count([['a', 'b'], ['c']]) == 2 and SPM.support_count([['b', 'a']]) == 2, \
+        'Bug in `SequentialPatternMining.support_count`.'
+
+    # Print support count for all frequent sequences.
+    for fs in SPM.frequent_sequence():
+        print('support count: {}, sequence: {}'.format(SPM.support_count(fs), fs))
+
+    # Print confidence for all sequential rules.
+    for rule in SPM.sequential_rules():
+        print('confidence: {:.4f}, rule: {} -> {}'
+              .format(SPM.confidence(rule['condition'], rule['prediction']),
+                      rule['condition'],
+                      rule['prediction']))
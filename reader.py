@@ -0,0 +1,88 @@
+"""Module for reading transaction files.
+
+Use class `TransactionReader` to iterate transactions of a file lazily,
+see test section for code example.
+"""
+
+import gzip
+import json
+import re
+
+INPUT_FORMATS = ('ibm', 'basket', 'json', 'jsonl')
+
+class TransactionReader:
+    """Read transactions lazily from file.
+
+    Supported formats:
+        'ibm': whitespace separated columns of customer id, transaction id and item,
+               lines are grouped into transactions by the first column (customer id),
+               so lines of the same customer must be consecutive.
+        'basket': one transaction per line, items are separated by whitespace or comma.
+        'json': a JSON list of transactions.
+        'jsonl': one JSON list of items per line.
+    File ending with '.gz' is decompressed while reading.
+    Every iteration reads the file again, so transactions can be iterated many times.
+    """
+
+    def __init__(self, path, input_format='basket'):
+        """Initialize reader.
+
+        Args:
+            path (str):
+                Transaction file path.
+            input_format (str):
+                One of `INPUT_FORMATS`.
+
+        Raises:
+            ValueError:
+                If input format is unknown.
+        """
+
+        if input_format not in INPUT_FORMATS:
+            raise ValueError('input_format should be one of {}.'.format(', '.join(INPUT_FORMATS)))
+
+        self.__path = path
+        self.__input_format = input_format
+
+    def __iter__(self):
+        opener = gzip.open if self.__path.endswith('.gz') else open
+        with opener(self.__path, 'rt') as f:
+            if self.__input_format == 'json':
+                yield from json.load(f)
+            elif self.__input_format == 'jsonl':
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            elif self.__input_format == 'basket':
+                for line in f:
+                    items = [item for item in re.split(r'[\s,]+', line) if item]
+                    if items:
+                        yield items
+            else:
+                transaction_id = None
+                transaction = []
+                for line in f:
+                    columns = line.split()
+                    if len(columns) < 3:
+                        continue
+                    if columns[0] != transaction_id and transaction:
+                        yield transaction
+                        transaction = []
+                    transaction_id = columns[0]
+                    transaction.append(columns[2])
+                if transaction:
+                    yield transaction
+
+# Test section.
+if __name__ == '__main__':
+    import os
+    # Load data.
+    DATA_PATH = os.path.dirname(os.path.abspath(__file__)) + '/data'
+
+    # Iterate transactions of IBM data, lines are grouped by customer id.
+    READER = TransactionReader(DATA_PATH + '/IBM.txt', 'ibm')
+    for transaction in READER:
+        print(transaction)
+
+    # Transactions are read again on every iteration.
+    assert list(READER) == list(READER), 'Bug in `TransactionReader.__iter__`.'
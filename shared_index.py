@@ -0,0 +1,252 @@
+"""Module of shared memory index of encoded transactions.
+
+SharedIndex puts encoded transactions, transaction bitsets of selected items
+and other arrays of caller into one `multiprocessing.shared_memory` block,
+so worker processes attach to them without copying or pickling.
+See test section for code example.
+"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Alignment (in bytes) of every array in shared memory block.
+ALIGNMENT = 64
+
+class SharedIndex:
+    """Encoded transactions and vertical bitsets in shared memory.
+
+    Arrays:
+        'items', 'offsets': encoded transactions packed as flat items with offsets.
+        'counts': count of each (collapsed) transaction.
+        'bitsets': bitsets of transaction ids given by creator, one row of 64-bit words each.
+        Any other name: array given by creator, see `array()`.
+    Creator owns the block and unlinks it on `close()`,
+    processes attaching with `descriptor()` only close their own mapping.
+    Arrays are read-only views of shared memory.
+    """
+
+    def __init__(self, encoded_transactions, bitsets=None, arrays=None):
+        """Copy encoded transactions into a new shared memory block.
+
+        Args:
+            encoded_transactions (list of tuple of list of int and int):
+                Encoded transactions paired with count.
+            bitsets (list of int):
+                Bitsets of transaction ids (bit i for i-th transaction), one row each,
+                usually of frequent items only. No bitsets if not given.
+            arrays (dict):
+                Map name into int64 array, also copied into the block.
+        """
+
+        offsets = np.zeros(len(encoded_transactions) + 1, dtype=np.int64)
+        np.cumsum([len(transaction) for transaction, _ in encoded_transactions], out=offsets[1:])
+        items = np.fromiter((item for transaction, _ in encoded_transactions for item in transaction),
+                            dtype=np.int64, count=int(offsets[-1]))
+        counts = np.array([count for _, count in encoded_transactions], dtype=np.int64)
+
+        bitsets = bitsets or []
+        arrays = {name: np.asarray(array, dtype=np.int64) for name, array in (arrays or {}).items()}
+        n_words = (len(encoded_transactions) + 63) // 64
+        shapes = {'items': items.shape,
+                  'offsets': offsets.shape,
+                  'counts': counts.shape,
+                  'bitsets': (len(bitsets), n_words)}
+        dtypes = {'items': np.int64, 'offsets': np.int64, 'counts': np.int64, 'bitsets': np.uint64}
+        for name, array in arrays.items():
+            shapes[name] = array.shape
+            dtypes[name] = np.int64
+
+        layout = {}
+        size = 0
+        for name, shape in shapes.items():
+            layout[name] = {'offset': size, 'dtype': np.dtype(dtypes[name]).str, 'shape': shape}
+            size = size + -(-int(np.prod(shape)) * np.dtype(dtypes[name]).itemsize
+                            // ALIGNMENT) * ALIGNMENT
+
+        self.__owner = True
+        self.__block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.__layout = layout
+        self.__map_arrays(writable=True)
+
+        self.__arrays['items'][:] = items
+        self.__arrays['offsets'][:] = offsets
+        self.__arrays['counts'][:] = counts
+        for row, bitset in enumerate(bitsets):
+            self.__arrays['bitsets'][row] = np.frombuffer(bitset.to_bytes(n_words * 8, 'little'),
+                                                          dtype='<u8')
+        for name, array in arrays.items():
+            self.__arrays[name][:] = array
+        for array in self.__arrays.values():
+            array.setflags(write=False)
+
+    def __map_arrays(self, writable=False):
+        """Map arrays onto shared memory block.
+
+        This method is intended to be private.
+
+        Args:
+            writable (bool):
+                Whether arrays can be written.
+        """
+
+        self.__arrays = {}
+        for name, layout in self.__layout.items():
+            array = np.ndarray(tuple(layout['shape']), dtype=np.dtype(layout['dtype']),
+                               buffer=self.__block.buf, offset=layout['offset'])
+            array.setflags(write=writable)
+            self.__arrays[name] = array
+
+    def descriptor(self):
+        """Small picklable description for attaching from another process.
+
+        Returns:
+            dict:
+                Name of shared memory block and layout of arrays.
+        """
+
+        return {'name': self.__block.name, 'layout': self.__layout}
+
+    @staticmethod
+    def attach(descriptor):
+        """Attach to index created by another process without copying.
+
+        Args:
+            descriptor (dict):
+                Returned by `descriptor()` of creator.
+
+        Returns:
+            SharedIndex:
+                Index sharing memory with creator.
+        """
+
+        index = SharedIndex.__new__(SharedIndex)
+        index.__owner = False
+        index.__block = shared_memory.SharedMemory(name=descriptor['name'])
+        index.__layout = descriptor['layout']
+        index.__map_arrays()
+        return index
+
+    def close(self):
+        """Release shared memory, creator also destroys the block."""
+
+        if self.__block is None:
+            return
+        self.__arrays = {}
+        self.__block.close()
+        if self.__owner:
+            self.__block.unlink()
+        self.__block = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def n_transactions(self):
+        """Number of (collapsed) transactions.
+
+        Returns:
+            int:
+                Number of encoded transactions, which is also number of bits of bitsets.
+        """
+
+        return len(self.__arrays['counts'])
+
+    def transactions(self):
+        """Encoded transactions paired with count.
+
+        Returns:
+            iterator of tuple of array of int and int:
+                Sorted items (view of shared memory) and count of each transaction.
+        """
+
+        items = self.__arrays['items']
+        offsets = self.__arrays['offsets'].tolist()
+        for i, count in enumerate(self.__arrays['counts'].tolist()):
+            yield items[offsets[i]:offsets[i+1]], count
+
+    def bitset(self, row):
+        """Bitset of given row.
+
+        Args:
+            row (int):
+                Position of bitset in `bitsets` given by creator.
+
+        Returns:
+            numpy.ndarray:
+                Array of uint64 words.
+        """
+
+        return self.__arrays['bitsets'][row]
+
+    def array(self, name):
+        """Array given by creator.
+
+        Args:
+            name (str):
+                Key of array in `arrays` given by creator.
+
+        Returns:
+            numpy.ndarray:
+                Read-only int64 array in shared memory.
+        """
+
+        return self.__arrays[name]
+
+    def count(self, bitset):
+        """Weighted popcount of transaction bitset.
+
+        Args:
+            bitset (numpy.ndarray):
+                Array of uint64 words.
+
+        Returns:
+            int:
+                Number of transactions in bitset, counting duplicated transactions.
+        """
+
+        bits = np.unpackbits(bitset.view(np.uint8), count=self.n_transactions(), bitorder='little')
+        return int(np.dot(bits, self.__arrays['counts']))
+
+    def support_count(self, rows):
+        """Support count of intersection of bitsets.
+
+        Args:
+            rows (list of int):
+                Rows of bitsets, such as rows of items of an itemset.
+
+        Returns:
+            int:
+                Number of transactions in all bitsets.
+        """
+
+        bitset = np.full(self.__arrays['bitsets'].shape[1], np.iinfo(np.uint64).max, dtype=np.uint64)
+        for row in rows:
+            bitset = bitset & self.bitset(row)
+        return self.count(bitset)
+
+# Test section.
+if __name__ == '__main__':
+    import multiprocessing
+
+    ENCODED_TRANSACTIONS = [([0, 1, 2], 2), ([0, 2], 1), ([1, 3], 1)]
+    # Bitsets of items 0, 1, 2 and 3, bit i for i-th transaction.
+    BITSETS = [0b011, 0b101, 0b011, 0b100]
+
+    def support_count_in_worker(args):
+        descriptor, itemset = args
+        with SharedIndex.attach(descriptor) as index:
+            return index.support_count(itemset)
+
+    with SharedIndex(ENCODED_TRANSACTIONS, BITSETS, {'lengths': [3, 2, 2]}) as SI:
+        assert SI.support_count([0, 2]) == 3 and SI.support_count([1]) == 3, \
+            'Bug in `SharedIndex.support_count`.'
+        assert [(list(items), count) for items, count in SI.transactions()] == ENCODED_TRANSACTIONS, \
+            'Bug in `SharedIndex.transactions`.'
+        assert SI.array('lengths').tolist() == [3, 2, 2], 'Bug in `SharedIndex.array`.'
+        with multiprocessing.get_context('fork').Pool(2) as POOL:
+            assert POOL.map(support_count_in_worker,
+                            [(SI.descriptor(), [0, 1]), (SI.descriptor(), [3])]) == [2, 1], \
+                'Bug in `SharedIndex.attach`.'
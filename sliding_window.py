@@ -0,0 +1,728 @@
+"""Module for association rules generation over transaction stream.
+
+Use class `AssociationRuleMining` to generate association rules
+from the latest transactions of a stream,
+see test section for code example.
+"""
+
+import collections
+import time
+
+from constraint import ItemConstraint
+from encoder import StringToIntegerEncoder, ListToIntegerEncoder, ItemsetView
+from frozen import FrozenModel
+from itemset_trie import ItemsetTrie
+from measure import RULE_BATCH_SIZE, attach_measures, generate_rules, iter_rules, split_itemset
+from support_cache import SupportCache
+
+class AssociationRuleMining:
+    """Generate association rule over a sliding window of transactions.
+
+    Transactions are pushed one by one, and only the latest `window_size`
+    transactions (or the transactions not older than `window_time` seconds)
+    are kept. Transactions in the window are stored in a canonical-order
+    prefix tree (CanTree), so push and expiry only touch one path of the tree.
+    Frequent itemsets are mined from the tree with FP-Growth once, then kept current
+    incrementally: push and expiry update support counts of tracked itemsets,
+    which are frequent itemsets and their negative border (infrequent itemsets
+    whose immediate subsets are all frequent). Frequent itemsets only change
+    when a tracked itemset crosses minimum support, so the first query after
+    the window changes mines the tree again only in that case.
+    That query also drops support counts this window put into cache,
+    and forgets items no longer in window, so encoder does not grow with the stream.
+    Itemset views decode items lazily, so views should be consumed before querying
+    a window which has changed.
+    """
+
+    def __init__(self, min_sup=0.1, min_cof=0.1, max_k=0, window_size=1000, window_time=None,
+                 constraint=None, min_lift=0,
+                 support_cache=None):
+        """Initialize settings for association rule mining.
+
+        Args:
+            min_sup (float):
+                Minimum support for frequent itemset.
+            min_cof (float):
+                Minimum confidence for association rule.
+            max_k (int):
+                Maximum size for freuent itemset (k-itemset).
+                If not given, there is no limit on itemset size.
+            constraint (ItemConstraint):
+                Item and length constraints pushed into mining.
+            window_size (int):
+                Maximum number of transactions in window.
+            window_time (float):
+                Maximum age (in seconds) of transactions in window.
+                If not given, transactions only expire by `window_size`.
+            min_lift (float):
+                Minimum lift for association rule.
+            support_cache (SupportCache):
+                Cache of support counts, default to an unbounded cache.
+                Entries put by this window are dropped whenever window changes.
+        """
+
+        self.__min_sup = min_sup
+        self.__min_cof = min_cof
+        self.__min_lift = min_lift
+        self.__max_k = max_k
+        self.__window_size = window_size
+        self.__window_time = window_time
+        self.__window = collections.deque()
+        self.__fp_tree = {'value': 0, 'child': {}, 'parent': None}
+        self.__item_sup_count = {}
+        self.__item_encoder = StringToIntegerEncoder()
+        self.__constraint = constraint or ItemConstraint()
+        self.__encoded_constraint = self.__constraint.encode(self.__item_encoder)
+        self.__sup_count = SupportCache() if support_cache is None else support_cache
+        self.__cache_keys = set()
+        self.__frequent = {}
+        self.__border = {}
+        self.__tracking = False
+        # Items of constraint are always kept by encoder.
+        self.__constraint_items = {item
+                                   for name, items in self.__encoded_constraint.settings().items()
+                                   if name != 'min_k' and items
+                                   for item in items}
+        self.__reset_cache()
+
+    def __reset_cache(self):
+        """Drop cached mining result.
+
+        Only support counts put by this window are dropped, since cache may be given by caller.
+        Itemset encoder is also renewed so it will not grow with the stream.
+        This method is intended to be private.
+        """
+
+        self.__window_changed = False
+        for key in self.__cache_keys:
+            self.__sup_count.discard(key)
+        self.__cache_keys = set()
+        self.__frequent_k_itemset = {}
+        self.__closed_itemset = []
+        self.__association_rules = []
+        self.__trie = None
+        self.__rule_measures = {}
+        self.__itemset_encoder = ListToIntegerEncoder()
+
+    def __cache(self, key, count, pin=False):
+        """Put support count into cache and remember its key.
+
+        Forgotten keys are pruned once they outnumber cached entries,
+        so remembered keys are bounded by the cache as well.
+        This method is intended to be private.
+
+        Args:
+            key (tuple of int):
+                Sorted encoded items of itemset.
+            count (int):
+                Support count.
+            pin (bool):
+                Never evict this entry.
+        """
+
+        self.__sup_count.put(key, count, pin)
+        self.__cache_keys.add(key)
+        if len(self.__cache_keys) > 2 * len(self.__sup_count):
+            self.__cache_keys = {key for key in self.__cache_keys if key in self.__sup_count}
+
+    def __refresh(self):
+        """Bring mining result up to date and forget expired items if window changed.
+
+        Frequent itemsets are mined again only if a tracked itemset crosses minimum support,
+        else they are the same and only their support counts are refreshed.
+        Called by every query, so pushing many transactions between queries is cheap.
+        This method is intended to be private.
+        """
+
+        if not self.__window_changed:
+            return
+
+        if not self.__tracking or self.__crossed():
+            self.__mine()
+        self.__reset_cache()
+        for itemset, count in self.__frequent.items():
+            if self.__encoded_constraint.satisfy(itemset):
+                encoded_itemset = self.__itemset_encoder.encode_from_list(itemset)
+                self.__frequent_k_itemset.setdefault(len(itemset), set()).add(encoded_itemset)
+                self.__cache(itemset, count, pin=True)
+        self.__item_encoder.retain(self.__item_sup_count.keys() | self.__constraint_items)
+
+    def __crossed(self):
+        """Whether any tracked itemset crosses minimum support.
+
+        This method is intended to be private.
+
+        Returns:
+            bool:
+                True if a frequent itemset becomes infrequent, or a border itemset becomes frequent.
+        """
+
+        min_count = self.__min_sup * len(self.__window)
+        return (any(not count or count < min_count for count in self.__frequent.values())
+                or any(count and count >= min_count for count in self.__border.values()))
+
+    def __count_tracked(self, transaction, delta, count_frequent=True):
+        """Update support counts of tracked itemsets contained in transaction.
+
+        Every tracked itemset without its last item is a frequent itemset,
+        so tracked itemsets are enumerated by extending frequent itemsets
+        with later items of transaction.
+        Items not tracked yet are added to border.
+        This method is intended to be private.
+
+        Args:
+            transaction (list of int):
+                Projected transaction, items in ascending order.
+            delta (int):
+                Change of support count.
+            count_frequent (bool):
+                Also update frequent itemsets, else only border is updated.
+        """
+
+        stack = [((item,), i) for i, item in enumerate(transaction)]
+        while stack:
+            itemset, i = stack.pop()
+            if itemset in self.__frequent:
+                if count_frequent:
+                    self.__frequent[itemset] = self.__frequent[itemset] + delta
+                if self.__max_k > 0 and len(itemset) >= self.__max_k:
+                    continue
+                for j in range(i+1, len(transaction)):
+                    stack.append((itemset + (transaction[j],), j))
+            elif itemset in self.__border or len(itemset) == 1:
+                count = self.__border.get(itemset, 0) + delta
+                # Item no longer in window is not tracked.
+                if len(itemset) == 1 and not count:
+                    del self.__border[itemset]
+                else:
+                    self.__border[itemset] = count
+
+    def __insert(self, transaction):
+        """Insert encoded transaction into fp tree.
+
+        Encoded transaction is sorted by item code, which is the canonical order of tree.
+        Support counts of tracked itemsets are updated as well.
+        This method is intended to be private.
+
+        Args:
+            transaction (list of int):
+                Encoded transaction.
+        """
+
+        current_node = self.__fp_tree
+        current_node['value'] = current_node['value'] + 1
+        for item in transaction:
+            if item not in current_node['child']:
+                current_node['child'][item] = {'value': 0, 'child': {}, 'parent': current_node}
+            current_node = current_node['child'][item]
+            current_node['value'] = current_node['value'] + 1
+            self.__item_sup_count[item] = self.__item_sup_count.get(item, 0) + 1
+
+        if self.__tracking:
+            for projected_transaction, _ in self.__encoded_constraint.project([(transaction, 1)]):
+                self.__count_tracked(projected_transaction, 1)
+
+    def __remove(self, transaction):
+        """Remove encoded transaction from fp tree.
+
+        Nodes with zero count are deleted, thus tree size is bounded by window.
+        Support counts of tracked itemsets are updated as well.
+        This method is intended to be private.
+
+        Args:
+            transaction (list of int):
+                Encoded transaction, must be inserted before.
+        """
+
+        current_node = self.__fp_tree
+        current_node['value'] = current_node['value'] - 1
+        for item in transaction:
+            child_node = current_node['child'][item]
+            child_node['value'] = child_node['value'] - 1
+            if child_node['value'] == 0:
+                del current_node['child'][item]
+            current_node = child_node
+
+            self.__item_sup_count[item] = self.__item_sup_count[item] - 1
+            if self.__item_sup_count[item] == 0:
+                del self.__item_sup_count[item]
+
+        if self.__tracking:
+            for projected_transaction, _ in self.__encoded_constraint.project([(transaction, 1)]):
+                self.__count_tracked(projected_transaction, -1)
+
+    def push(self, transaction, timestamp=None):
+        """Push a transaction into window.
+
+        Transactions out of window are expired after push.
+
+        Args:
+            transaction (list of item):
+                New transaction.
+            timestamp (float):
+                Time of transaction,
+                default to current time.
+        """
+
+        if timestamp is None:
+            timestamp = time.time()
+
+        encoded_transaction = self.__item_encoder.encode_from_string_list(transaction)
+        self.__window.append((timestamp, encoded_transaction))
+        self.__insert(encoded_transaction)
+        self.__window_changed = True
+
+        # Expire by window size.
+        while len(self.__window) > self.__window_size:
+            self.__remove(self.__window.popleft()[1])
+
+        # Expire by window time.
+        if self.__window_time is not None:
+            self.expire(timestamp - self.__window_time)
+
+    def expire(self, before):
+        """Expire transactions pushed before given time.
+
+        Args:
+            before (float):
+                Transactions with timestamp smaller than `before` are removed.
+
+        Returns:
+            int:
+                Number of expired transactions.
+        """
+
+        n_expired = 0
+        while self.__window and self.__window[0][0] < before:
+            self.__remove(self.__window.popleft()[1])
+            n_expired = n_expired + 1
+
+        if n_expired:
+            self.__window_changed = True
+        return n_expired
+
+    def n_transactions(self):
+        """Number of transactions in window.
+
+        Returns:
+            int:
+                Number of transactions in window.
+        """
+
+        return len(self.__window)
+
+    def support_count(self, itemset):
+        """Support count for the itemset in window.
+
+        The input itemset will first be encoded element-wised (encode each item),
+        then be encoded list-wised (encode the encoded itemset).
+        Using the enocded result to count support throught out the window.
+
+        Args:
+            itemset (list of item):
+                Item cannot be encoded form.
+
+        Returns:
+            int:
+                Support count for the given itemset.
+        """
+
+        self.__refresh()
+
+        # Encode items in itemset without growing encoder,
+        # item never seen before is in no transaction.
+        itemset = self.__item_encoder.lookup_string_list(itemset)
+        if itemset is None:
+            return 0
+
+        # Sorted items are the key of support count cache, so evicted keys are freed.
+        key = tuple(itemset)
+
+        # If already calculated before, skip the calculation process.
+        sup_count = self.__sup_count.get(key)
+        if sup_count is not None:
+            pass
+        # Else if itemset is 1-itemset, use item support count of window.
+        elif len(itemset) == 1:
+            sup_count = self.__item_sup_count.get(itemset[0], 0)
+            self.__cache(key, sup_count)
+        # Else enumerate all transactions in window to do support count.
+        else:
+            sup_count = 0
+            for _, transaction in self.__window:
+                if all(map(lambda item: item in transaction, itemset)):
+                    sup_count = sup_count + 1
+            self.__cache(key, sup_count)
+
+        # Support count cached result.
+        return sup_count
+
+    def support(self, itemset):
+        """Support for the itemset in window.
+
+        Calculate the ratio of itemset appeared in all transaction of window.
+        Empty window will give zero support.
+
+        Args:
+            itemset (list of item):
+                Item cannot be encoded form.
+
+        Returns:
+            float:
+                Support for the given itemset.
+        """
+
+        if not self.__window:
+            return 0
+        return self.support_count(itemset) / len(self.__window)
+
+    def confidence(self, itemset_1, itemset_2):
+        """Confidence of association rule `itemset_1` -> `itemset_2`.
+
+        Args:
+            itemset_1 (list of item):
+                Denominator of confidence formula.
+            itemset_2 (list of item):
+                Combine with `itemset_1` to form nominator of confidence formula.
+
+        Returns:
+            float:
+                Confidence of the given association rule.
+        """
+
+        return self.support_count(itemset_1 + itemset_2) / self.support_count(itemset_1)
+
+    def __pattern_base(self):
+        """Convert fp tree into pattern base.
+
+        Each path of tree is paired with number of transactions ending on that path.
+        This method is intended to be private.
+
+        Returns:
+            list of tuple of list of int and int:
+                Path of tree and its count.
+        """
+
+        pattern_base = []
+        stack = [([], self.__fp_tree)]
+        while stack:
+            path, node = stack.pop()
+            count = node['value'] - sum(child['value'] for child in node['child'].values())
+            if path and count:
+                pattern_base.append((path, count))
+            for item, child in node['child'].items():
+                stack.append((path + [item], child))
+        return pattern_base
+
+    def __fp_growth(self, pattern_base, suffix, min_count):
+        """Mine frequent itemsets from conditional pattern base.
+
+        Items in each path are in ascending order,
+        so conditional pattern base of an item is the prefix of paths before that item.
+        All frequent itemsets of pattern base are tracked, even if not satisfying constraint.
+        This method is intended to be private.
+
+        Args:
+            pattern_base (list of tuple of list of int and int):
+                Conditional pattern base of `suffix`.
+            suffix (list of int):
+                Encoded itemset which pattern base is conditioned on.
+            min_count (float):
+                Minimum support count for frequent itemset.
+        """
+
+        counter = {}
+        for path, count in pattern_base:
+            for item in path:
+                counter[item] = counter.get(item, 0) + count
+
+        for item, count in counter.items():
+            if count < min_count:
+                continue
+
+            itemset = [item] + suffix
+            self.__frequent[tuple(sorted(itemset))] = count
+
+            if self.__max_k > 0 and len(itemset) >= self.__max_k:
+                continue
+
+            conditional_pattern_base = []
+            for path, path_count in pattern_base:
+                if item in path:
+                    prefix = path[:path.index(item)]
+                    if prefix:
+                        conditional_pattern_base.append((prefix, path_count))
+            if conditional_pattern_base:
+                self.__fp_growth(conditional_pattern_base, itemset, min_count)
+
+    def __mine(self):
+        """Mine frequent itemsets in window and count their negative border.
+
+        This method is intended to be private.
+        """
+
+        # Push constraint by projecting pattern base.
+        pattern_base = self.__encoded_constraint.project(self.__pattern_base())
+        self.__frequent = {}
+        self.__fp_growth(pattern_base, [], self.__min_sup * len(self.__window))
+
+        # Extend frequent itemset with a later frequent item,
+        # it is in border if all its immediate subsets are frequent.
+        frequent_items = sorted(itemset[0] for itemset in self.__frequent if len(itemset) == 1)
+        self.__border = {}
+        for itemset in self.__frequent:
+            if self.__max_k > 0 and len(itemset) >= self.__max_k:
+                continue
+            for item in frequent_items:
+                if item <= itemset[-1]:
+                    continue
+                candidate = itemset + (item,)
+                if (candidate not in self.__frequent
+                        and all(candidate[:i] + candidate[i+1:] in self.__frequent
+                                for i in range(len(itemset)))):
+                    self.__border[candidate] = 0
+
+        for path, count in pattern_base:
+            self.__count_tracked(path, count, count_frequent=False)
+        self.__tracking = True
+
+    def support_cache_stats(self):
+        """Statistics of support count cache.
+
+        Returns:
+            dict:
+                See `SupportCache.stats` for keys.
+        """
+
+        return self.__sup_count.stats()
+
+    def frequent_k_itemset(self, k=1):
+        """Frequent k-itemset of the window.
+
+        If support of an k-itemset is greater than minimum support threshold,
+        it will be in the list of frequent k-itemset.
+
+        Args:
+            k (int):
+                size of frequent itemset
+
+        Returns:
+            ItemsetView of k-itemset:
+                Itemsets in list are frequent k-itemset.
+
+        Raises:
+            ValueError:
+                Valid range of k should be 0 < k <= self.max_k.
+        """
+
+        # Validation for k.
+        if k <= 0:
+            raise ValueError('k should be greater than 0.')
+        if 0 < self.__max_k < k:
+            raise ValueError('k should be smaller than or equal to max_k={}.'.format(self.__max_k))
+
+        self.__refresh()
+
+        # Frequent k-itemset cached result, decoded only when touched.
+        return ItemsetView(self.__item_encoder,
+                           [self.__itemset_encoder.decode_to_tuple(k_itemset)
+                            for k_itemset in self.__frequent_k_itemset.get(k, set())])
+
+    def frequent_itemset(self, len_descend=True):
+        """Frequent itemset of the window.
+
+        Args:
+            len_descend (bool):
+                Show frequent itemset list in descend length order.
+
+        Returns:
+            ItemsetView of frequent itemset:
+                All frequent itemsets of the window.
+        """
+
+        self.__refresh()
+
+        f_itemset = []
+        for k in sorted(self.__frequent_k_itemset):
+            f_itemset.extend(self.frequent_k_itemset(k).encoded())
+        f_itemset.sort(key=len, reverse=len_descend)
+        return ItemsetView(self.__item_encoder, f_itemset)
+
+    def closed_itemset(self, len_descend=True):
+        """Closed frequent itemset of the window.
+
+        A frequent itemset is closed if none of its frequent supersets
+        has the same support count.
+        Only supersets with one more item need to be checked,
+        since support count never increase with itemset size.
+
+        Args:
+            len_descend (bool):
+                Show closed itemset list in descend length order.
+
+        Returns:
+            ItemsetView of closed itemset:
+                All closed frequent itemsets of the window.
+        """
+
+        self.__refresh()
+
+        # If already calculated before, skip the calculation process.
+        if self.__closed_itemset:
+            pass
+        else:
+            for k, k_itemsets in self.__frequent_k_itemset.items():
+                k_1_itemsets = [set(self.__itemset_encoder.decode_to_list(k_1_itemset))
+                                for k_1_itemset in self.__frequent_k_itemset.get(k+1, set())]
+                k_1_counts = [self.__sup_count.get(self.__itemset_encoder.decode_to_tuple(k_1_itemset))
+                              for k_1_itemset in self.__frequent_k_itemset.get(k+1, set())]
+                for k_itemset in k_itemsets:
+                    itemset = self.__itemset_encoder.decode_to_list(k_itemset)
+                    count = self.__sup_count.get(self.__itemset_encoder.decode_to_tuple(k_itemset))
+                    if not any(count == k_1_count and set(itemset) <= k_1_itemset
+                               for k_1_itemset, k_1_count in zip(k_1_itemsets, k_1_counts)):
+                        self.__closed_itemset.append(tuple(itemset))
+
+        closed_itemset = list(self.__closed_itemset)
+        closed_itemset.sort(key=len, reverse=len_descend)
+        return ItemsetView(self.__item_encoder, closed_itemset)
+
+    def association_rules(self, measures=False):
+        """List all association rules of the window.
+
+        Split frequent itemset into two part, and calculate confidence.
+        Number of possible conbination of split is Stiring number of second kind.
+        Measures of all rules are calculated in bulk from cached support counts,
+        and rules with lift smaller than `min_lift` are never generated.
+
+        Args:
+            measures (bool):
+                Also return interestingness measures of each rule.
+
+        Returns:
+            list of dict:
+                Each dict has two keys,
+                'condition' stands occurence of itemset,
+                'prediction' stands cooccurence itemset.
+                If `measures` is set, each dict also has keys in `measure.MEASURES`.
+        """
+
+        self.__refresh()
+
+        # If already calculated before, skip the calculation process.
+        if self.__association_rules:
+            pass
+        # Else enumerate frequent itemset, split into two part and calculate measures.
+        else:
+            self.__association_rules, self.__rule_measures = generate_rules(
+                self.trie(),
+                split_itemset,
+                self.support_count,
+                self.__constraint.allow_rule,
+                len(self.__window),
+                self.__min_cof,
+                self.__min_lift)
+
+        if measures:
+            return attach_measures(self.__association_rules, self.__rule_measures)
+
+        # Association rule cached result.
+        return self.__association_rules
+
+    def iter_association_rules(self, batch_size=RULE_BATCH_SIZE):
+        """Stream association rules with their measures.
+
+        Rules are generated batch by batch and are not cached,
+        so memory does not grow with number of rules.
+
+        Args:
+            batch_size (int):
+                Number of candidate rules measured together.
+
+        Yields:
+            dict:
+                Association rule as in `association_rules(measures=True)`.
+        """
+
+        self.__refresh()
+
+        for rules, measures in iter_rules(
+                self.trie(),
+                split_itemset,
+                self.support_count,
+                self.__constraint.allow_rule,
+                len(self.__window),
+                self.__min_cof,
+                self.__min_lift,
+                batch_size):
+            yield from attach_measures(rules, measures)
+
+    def trie(self):
+        """Frequent itemsets with support counts in a prefix trie.
+
+        Built once from `frequent_itemset()`, and shared by rule generation and `freeze()`.
+
+        Returns:
+            ItemsetTrie:
+                Trie for support, subset and superset queries of frequent itemsets.
+        """
+
+        self.__refresh()
+
+        # If already built before, skip the building process.
+        if self.__trie is None:
+            self.__trie = ItemsetTrie([(f_itemset, self.support_count(f_itemset))
+                                       for f_itemset in self.frequent_itemset()])
+
+        # Trie cached result.
+        return self.__trie
+
+    def freeze(self):
+        """Immutable model of mining result for concurrent queries.
+
+        Queries of frozen model never mutate caches or encoders,
+        so one frozen model can be shared by many threads.
+        Later changes of this window are not reflected in frozen model.
+
+        Returns:
+            FrozenModel:
+                Frequent itemsets, supports and association rules.
+        """
+
+        return FrozenModel(self.trie(),
+                           self.association_rules(measures=True),
+                           len(self.__window),
+                           self.support_count)
+
+# Test section.
+if __name__ == '__main__':
+    import json
+    import os
+    # Load data.
+    DATA_PATH = os.path.dirname(os.path.abspath(__file__)) + '/data'
+    DATA_NAME = '/example.json'
+
+    with open(DATA_PATH + DATA_NAME, 'r') as f:
+        # Create instance, only keep latest 4 transactions.
+        ARM = AssociationRuleMining(min_sup=0.5,
+                                    min_cof=0.5,
+                                    window_size=4)
+
+        # Push transactions one by one.
+        for t in json.loads(f.read()):
+            ARM.push(t)
+
+        # Print support count for all frequent itemsets.
+        for fi in ARM.frequent_itemset():
+            print('support count: {}, itemset: {}'.format(ARM.support_count(fi), fi))
+
+        # Print support count for all closed itemsets.
+        for ci in ARM.closed_itemset():
+            print('support count: {}, closed itemset: {}'.format(ARM.support_count(ci), ci))
+
+        # Print confidence for all association rules.
+        for rule in ARM.association_rules():
+            print('confidence: {:.4f}, rule: {} -> {}'
+                  .format(ARM.confidence(rule['condition'], rule['prediction']),
+                          ''.join(rule['condition']),
+                          ''.join(rule['prediction'])))
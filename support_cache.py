@@ -0,0 +1,201 @@
+"""Module of support count cache.
+
+SupportCache keeps support counts of encoded itemsets with bounded size.
+See test section for code example.
+"""
+
+import collections
+
+class SupportCache:
+    """Bounded least recently used (LRU) cache of support counts.
+
+    Keys are sorted encoded items of itemsets (tuple of int) and values are support counts.
+    Pinned entries (frequent itemsets found by mining) are never evicted,
+    other entries (infrequent candidates and ad-hoc queries) are evicted
+    in least recently used order once the cache is full.
+    Pinned entries count toward the bound as well.
+
+    A cache belongs to one engine instance, since encoded items
+    of different engines are not compatible.
+    """
+
+    # Estimated memory (in bytes) of one entry,
+    # including hash table slot, ordering links, tuple key and integer value.
+    ENTRY_BYTES = 128
+
+    def __init__(self, max_size=None, max_bytes=None):
+        """Initialize settings for support cache.
+
+        Args:
+            max_size (int):
+                Maximum number of entries.
+            max_bytes (int):
+                Maximum estimated memory (in bytes) of entries.
+                If both bounds are not given, cache is unbounded.
+
+        Raises:
+            ValueError:
+                If any bound is negative.
+        """
+
+        if max_size is not None and max_size < 0:
+            raise ValueError('max_size should be greater than or equal to 0.')
+        if max_bytes is not None and max_bytes < 0:
+            raise ValueError('max_bytes should be greater than or equal to 0.')
+
+        self.__max_size = None
+        if max_size is not None:
+            self.__max_size = max_size
+        if max_bytes is not None:
+            max_size = max_bytes // SupportCache.ENTRY_BYTES
+            if self.__max_size is None or max_size < self.__max_size:
+                self.__max_size = max_size
+
+        self.__pinned = {}
+        self.__entries = collections.OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def __len__(self):
+        return len(self.__pinned) + len(self.__entries)
+
+    def __contains__(self, key):
+        return key in self.__pinned or key in self.__entries
+
+    def get(self, key):
+        """Cached support count of encoded itemset.
+
+        Args:
+            key (tuple of int):
+                Sorted encoded items of itemset.
+
+        Returns:
+            int:
+                Support count, or None if not cached.
+        """
+
+        if key in self.__pinned:
+            self.__hits = self.__hits + 1
+            return self.__pinned[key]
+        if key in self.__entries:
+            self.__hits = self.__hits + 1
+            self.__entries.move_to_end(key)
+            return self.__entries[key]
+
+        self.__misses = self.__misses + 1
+        return None
+
+    def put(self, key, count, pin=False):
+        """Cache support count of encoded itemset.
+
+        Args:
+            key (tuple of int):
+                Sorted encoded items of itemset.
+            count (int):
+                Support count.
+            pin (bool):
+                Never evict this entry.
+        """
+
+        if pin or key in self.__pinned:
+            self.__entries.pop(key, None)
+            self.__pinned[key] = count
+        else:
+            self.__entries[key] = count
+            self.__entries.move_to_end(key)
+        self.__evict()
+
+    def pin(self, key):
+        """Never evict a cached entry.
+
+        Nothing happens if the entry is not cached.
+
+        Args:
+            key (tuple of int):
+                Sorted encoded items of itemset.
+        """
+
+        if key in self.__entries:
+            self.__pinned[key] = self.__entries.pop(key)
+
+    def discard(self, key):
+        """Drop a cached entry, even if it is pinned.
+
+        Nothing happens if the entry is not cached.
+
+        Args:
+            key (tuple of int):
+                Sorted encoded items of itemset.
+        """
+
+        self.__pinned.pop(key, None)
+        self.__entries.pop(key, None)
+
+    def clear(self):
+        """Drop all entries, statistics are kept."""
+
+        self.__pinned = {}
+        self.__entries = collections.OrderedDict()
+
+    def stats(self):
+        """Statistics of cache usage.
+
+        Returns:
+            dict:
+                'hits', 'misses', 'evictions', 'n_entries', 'n_pinned',
+                'max_size' (None if unbounded) and 'hit_rate'.
+        """
+
+        n_lookups = self.__hits + self.__misses
+        return {
+            'hits': self.__hits,
+            'misses': self.__misses,
+            'evictions': self.__evictions,
+            'n_entries': len(self),
+            'n_pinned': len(self.__pinned),
+            'max_size': self.__max_size,
+            'hit_rate': self.__hits / n_lookups if n_lookups else 0,
+        }
+
+    def __evict(self):
+        """Evict least recently used entries until cache is not over bound.
+
+        This method is intended to be private.
+        """
+
+        if self.__max_size is None:
+            return
+        while self.__entries and len(self) > self.__max_size:
+            self.__entries.popitem(last=False)
+            self.__evictions = self.__evictions + 1
+
+# Test section.
+if __name__ == '__main__':
+    SC = SupportCache(max_size=3)
+    SC.put((0,), 10, pin=True)
+    SC.put((1,), 5)
+    SC.put((2,), 4)
+    assert SC.get((1,)) == 5, 'Bug in `SupportCache.get`.'
+
+    # Key 2 is the least recently used unpinned entry.
+    SC.put((3,), 1)
+    assert (2,) not in SC and (1,) in SC and (3,) in SC, 'Bug in `SupportCache.put`.'
+
+    # Pinned entries are never evicted.
+    SC.pin((1,))
+    SC.put((4,), 2)
+    SC.put((5,), 2)
+    assert (0,) in SC and (1,) in SC and (5,) in SC and len(SC) == 3, 'Bug in `SupportCache.pin`.'
+    assert SC.get((2,)) is None, 'Bug in `SupportCache.get`.'
+
+    # Discarded entries are dropped even if pinned.
+    SC.discard((0,))
+    assert (0,) not in SC and len(SC) == 2, 'Bug in `SupportCache.discard`.'
+    SC.put((0,), 10, pin=True)
+
+    STATS = SC.stats()
+    assert (STATS['hits'], STATS['misses'], STATS['evictions']) == (1, 1, 3), \
+        'Bug in `SupportCache.stats`.'
+    assert SupportCache(max_bytes=SupportCache.ENTRY_BYTES * 2).stats()['max_size'] == 2, \
+        'Bug in `SupportCache.__init__`.'
@@ -0,0 +1,205 @@
+"""Module for threshold sweep.
+
+Use class `ThresholdSweep` to get frequent itemsets and association rules
+of many (min_sup, min_cof) combinations with a single mining run,
+see test section for code example.
+"""
+
+import itertools
+
+import numpy as np
+
+import auto
+
+class ThresholdSweep:
+    """Mine once at the lowest thresholds, then filter for every threshold.
+
+    Frequent itemsets of a higher `min_sup` are a subset of those of a lower one,
+    and so are association rules of a higher `min_sup` or `min_cof`,
+    so results of every combination are filtered from support and confidence tables.
+    """
+
+    def __init__(self, transactions=None, min_sups=(0.1,), min_cofs=(0.1,), max_k=0,
+                 engine=None, n_jobs=1, constraint=None):
+        """Mine transactions at the lowest thresholds.
+
+        Args:
+            transactions （list of list of item):
+                Transaction database.
+            min_sups (list of float):
+                Minimum supports to sweep.
+            min_cofs (list of float):
+                Minimum confidences to sweep.
+            max_k (int):
+                Maximum size for freuent itemset (k-itemset).
+            engine (str):
+                Override selected engine, must be a key of `auto.ENGINES`.
+            n_jobs (int):
+                Number of processes, only used by Eclat and FP-Growth.
+            constraint (ItemConstraint):
+                Item and length constraints pushed into mining.
+
+        Raises:
+            ValueError:
+                If `min_sups` or `min_cofs` is empty.
+        """
+
+        if not min_sups or not min_cofs:
+            raise ValueError('min_sups and min_cofs should not be empty.')
+
+        self.__min_sups = sorted(set(min_sups))
+        self.__min_cofs = sorted(set(min_cofs))
+
+        arm = auto.AssociationRuleMining(transactions=transactions,
+                                         min_sup=self.__min_sups[0],
+                                         min_cof=self.__min_cofs[0],
+                                         max_k=max_k,
+                                         engine=engine,
+                                         n_jobs=n_jobs,
+                                         constraint=constraint)
+        self.__engine_name = arm.engine()
+
+        # Support table of frequent itemsets.
+        self.__frequent_itemsets = arm.frequent_itemset()
+        self.__itemset_supports = np.array([arm.support(f_itemset)
+                                            for f_itemset in self.__frequent_itemsets],
+                                           dtype=np.float64)
+
+        # Support and confidence table of association rules.
+        self.__association_rules = arm.association_rules(measures=True)
+        self.__rule_supports = np.array([rule['support'] for rule in self.__association_rules],
+                                        dtype=np.float64)
+        self.__rule_confidences = np.array([rule['confidence']
+                                            for rule in self.__association_rules],
+                                           dtype=np.float64)
+
+    def __check_threshold(self, min_sup, min_cof=None):
+        """Check thresholds are not lower than mined thresholds.
+
+        This method is intended to be private.
+
+        Args:
+            min_sup (float):
+                Minimum support for frequent itemset.
+            min_cof (float):
+                Minimum confidence for association rule.
+
+        Raises:
+            ValueError:
+                If threshold is lower than mined threshold.
+        """
+
+        if min_sup < self.__min_sups[0]:
+            raise ValueError('min_sup should be greater than or equal to {}.'
+                             .format(self.__min_sups[0]))
+        if min_cof is not None and min_cof < self.__min_cofs[0]:
+            raise ValueError('min_cof should be greater than or equal to {}.'
+                             .format(self.__min_cofs[0]))
+
+    def engine(self):
+        """Name of engine used for mining.
+
+        Returns:
+            str:
+                Key of `auto.ENGINES`.
+        """
+
+        return self.__engine_name
+
+    def frequent_itemset(self, min_sup, len_descend=True):
+        """Frequent itemset under `min_sup`.
+
+        Args:
+            min_sup (float):
+                Minimum support for frequent itemset.
+            len_descend (bool):
+                Show frequent itemset list in descend length order.
+
+        Returns:
+            list of frequent itemset:
+                All frequent itemsets under `min_sup`.
+
+        Raises:
+            ValueError:
+                If `min_sup` is lower than mined threshold.
+        """
+
+        self.__check_threshold(min_sup)
+
+        f_itemset = [self.__frequent_itemsets[i]
+                     for i in np.flatnonzero(self.__itemset_supports >= min_sup)]
+        f_itemset.sort(key=len, reverse=len_descend)
+        return f_itemset
+
+    def association_rules(self, min_sup, min_cof, measures=False):
+        """Association rules under `min_sup` and `min_cof`.
+
+        Args:
+            min_sup (float):
+                Minimum support for frequent itemset.
+            min_cof (float):
+                Minimum confidence for association rule.
+            measures (bool):
+                Also return interestingness measures of each rule.
+
+        Returns:
+            list of dict:
+                Each dict has two keys,
+                'condition' stands occurence of itemset,
+                'prediction' stands cooccurence itemset.
+                If `measures` is set, each dict also has keys in `measure.MEASURES`.
+
+        Raises:
+            ValueError:
+                If `min_sup` or `min_cof` is lower than mined threshold.
+        """
+
+        self.__check_threshold(min_sup, min_cof)
+
+        keep = (self.__rule_supports >= min_sup) & (self.__rule_confidences >= min_cof)
+        if measures:
+            return [dict(self.__association_rules[i]) for i in np.flatnonzero(keep)]
+        return [{'condition': self.__association_rules[i]['condition'],
+                 'prediction': self.__association_rules[i]['prediction']}
+                for i in np.flatnonzero(keep)]
+
+    def curve(self):
+        """Number of frequent itemsets and association rules of every requested combination.
+
+        Returns:
+            list of dict:
+                Each dict has keys 'min_sup', 'min_cof',
+                'n_frequent_itemsets' and 'n_association_rules',
+                sorted by 'min_sup' then 'min_cof'.
+        """
+
+        summary = []
+        for min_sup, min_cof in itertools.product(self.__min_sups, self.__min_cofs):
+            summary.append({
+                'min_sup': min_sup,
+                'min_cof': min_cof,
+                'n_frequent_itemsets': int(np.count_nonzero(self.__itemset_supports >= min_sup)),
+                'n_association_rules': int(np.count_nonzero(
+                    (self.__rule_supports >= min_sup) & (self.__rule_confidences >= min_cof))),
+            })
+        return summary
+
+# Test section.
+if __name__ == '__main__':
+    import json
+    import os
+    # Load data.
+    DATA_PATH = os.path.dirname(os.path.abspath(__file__)) + '/data'
+    DATA_NAME = '/IBM.json'
+
+    with open(DATA_PATH + DATA_NAME, 'r') as f:
+        # Mine once for every threshold of the experiments.
+        TS = ThresholdSweep(transactions=json.loads(f.read()),
+                            min_sups=[0.2, 0.4],
+                            min_cofs=[0.5, 0.7, 0.9])
+
+        # Print summary curve.
+        for point in TS.curve():
+            print('min_sup: {min_sup}, min_cof: {min_cof}, '
+                  'frequent itemsets: {n_frequent_itemsets}, '
+                  'association rules: {n_association_rules}'.format(**point))
@@ -0,0 +1,202 @@
+"""Module of item taxonomy.
+
+Taxonomy holds is-a hierarchy of items (such as item -> brand -> category -> department),
+so that generalized association rules of every level are mined in one run.
+See test section for code example.
+"""
+
+class Taxonomy:
+    """Is-a hierarchy of items for generalized association rule mining (Cumulate).
+
+    Ancestors of every item are precomputed once.
+    Transactions are extended with ancestors of their items,
+    and itemsets containing an item together with its own ancestor are pruned,
+    since such an itemset has the same support as the itemset without the ancestor.
+    """
+
+    def __init__(self, parents=None):
+        """Initialize taxonomy and precompute ancestors of every item.
+
+        Args:
+            parents (dict of item to item or list of item):
+                Parent (or parents, if taxonomy is not a tree) of each item.
+
+        Raises:
+            ValueError:
+                If taxonomy has a cycle.
+        """
+
+        self.__parents = {}
+        for child, parent in (parents or {}).items():
+            if isinstance(parent, (list, tuple, set, frozenset)):
+                self.__parents[child] = set(parent)
+            else:
+                self.__parents[child] = {parent}
+
+        # Ancestor closure of every item, found by depth first search.
+        self.__ancestors = {}
+        for item in self.__parents:
+            self.__ancestor_closure(item, set())
+
+    def __ancestor_closure(self, item, path):
+        """Ancestors of item, computed recursively and memorized.
+
+        This method is intended to be private.
+
+        Args:
+            item (item):
+                Target item.
+            path (set of item):
+                Items on the current search path, used to detect cycle.
+
+        Returns:
+            frozenset of item:
+                All ancestors of item.
+
+        Raises:
+            ValueError:
+                If taxonomy has a cycle.
+        """
+
+        if item in self.__ancestors:
+            return self.__ancestors[item]
+        if item in path:
+            raise ValueError('Taxonomy has a cycle through item {}.'.format(item))
+
+        path.add(item)
+        ancestors = set()
+        for parent in self.__parents.get(item, ()):
+            ancestors.add(parent)
+            ancestors.update(self.__ancestor_closure(parent, path))
+        path.remove(item)
+
+        self.__ancestors[item] = frozenset(ancestors)
+        return self.__ancestors[item]
+
+    def encode(self, item_encoder):
+        """Encode items of taxonomy.
+
+        Args:
+            item_encoder (StringToIntegerEncoder):
+                Encoder used by mining engine.
+
+        Returns:
+            Taxonomy:
+                Taxonomy with encoded items.
+        """
+
+        return Taxonomy({item_encoder.encode_from_string(child):
+                         [item_encoder.encode_from_string(parent) for parent in parents]
+                         for child, parents in self.__parents.items()})
+
+    def settings(self):
+        """JSON serializable settings of taxonomy.
+
+        Returns:
+            list of list:
+                Pairs of child and sorted parents, sorted by child.
+        """
+
+        return [[child, sorted(parents)] for child, parents in sorted(self.__parents.items())]
+
+    def ancestors(self, item):
+        """Ancestors of item.
+
+        Args:
+            item (item):
+                Target item.
+
+        Returns:
+            frozenset of item:
+                All ancestors of item, empty if item has no parent.
+        """
+
+        return self.__ancestors.get(item, frozenset())
+
+    def count_ancestors(self, transactions):
+        """Support count of all ancestors.
+
+        Args:
+            transactions (list of tuple of list of item and int):
+                Transactions paired with count.
+
+        Returns:
+            dict of item to int:
+                Support count of every ancestor appearing in transactions.
+        """
+
+        ancestor_count = {}
+        for transaction, count in transactions:
+            ancestors = set()
+            for item in transaction:
+                ancestors.update(self.ancestors(item))
+            for ancestor in ancestors:
+                ancestor_count[ancestor] = ancestor_count.get(ancestor, 0) + count
+        return ancestor_count
+
+    def extend(self, transactions, allowed_ancestors=None):
+        """Extend transactions with ancestors of their items.
+
+        Args:
+            transactions (list of tuple of list of item and int):
+                Transactions paired with count.
+            allowed_ancestors (set of item):
+                If given, only these ancestors are added, such as frequent ancestors.
+
+        Returns:
+            list of tuple of list of item and int:
+                Extended transactions paired with count, items are sorted.
+        """
+
+        # Ancestors to add for each item, filtered once.
+        item_ancestors = {}
+
+        extended_transactions = []
+        for transaction, count in transactions:
+            extended_transaction = set(transaction)
+            for item in transaction:
+                if item not in item_ancestors:
+                    item_ancestors[item] = self.ancestors(item)
+                    if allowed_ancestors is not None:
+                        item_ancestors[item] = item_ancestors[item] & allowed_ancestors
+                extended_transaction.update(item_ancestors[item])
+            extended_transactions.append((sorted(extended_transaction), count))
+        return extended_transactions
+
+    def contain_ancestor(self, itemset):
+        """Whether itemset contains an item together with its own ancestor.
+
+        Args:
+            itemset (list of item):
+                Target itemset.
+
+        Returns:
+            bool:
+                True if some item of itemset is an ancestor of another item of itemset.
+        """
+
+        items = set(itemset)
+        return any(not self.ancestors(item).isdisjoint(items) for item in itemset)
+
+# Test section.
+if __name__ == '__main__':
+    TAXONOMY = Taxonomy({'jacket': 'outerwear', 'ski pants': 'outerwear',
+                         'outerwear': 'clothes', 'shirt': 'clothes',
+                         'shoes': 'footwear', 'hiking boots': 'footwear'})
+    assert TAXONOMY.ancestors('jacket') == {'outerwear', 'clothes'}, \
+        'Bug in `Taxonomy.ancestors`.'
+    assert TAXONOMY.contain_ancestor(['jacket', 'clothes']) \
+        and not TAXONOMY.contain_ancestor(['jacket', 'footwear']), \
+        'Bug in `Taxonomy.contain_ancestor`.'
+
+    TRANSACTIONS = [(['shirt'], 1), (['jacket', 'hiking boots'], 2), (['ski pants'], 1)]
+    assert TAXONOMY.count_ancestors(TRANSACTIONS) == {'clothes': 4, 'outerwear': 3, 'footwear': 2}, \
+        'Bug in `Taxonomy.count_ancestors`.'
+    assert TAXONOMY.extend(TRANSACTIONS, {'clothes'})[1] == (['clothes', 'hiking boots', 'jacket'], 2), \
+        'Bug in `Taxonomy.extend`.'
+
+    try:
+        Taxonomy({'a': 'b', 'b': 'a'})
+        assert False, 'Bug in `Taxonomy.__init__`.'
+    except ValueError:
+        pass
@@ -1,8 +1,28 @@
 import os
+import csv
+import gzip
 import json
+import multiprocessing
+import tempfile
 import brutal_force
 import apriori
 import fp_growth
+import out_of_core
+import prefix_span
+import sliding_window
+import eclat
+import auto
+import cba
+import cli
+import distributed
+import ingest
+import item_query
+import sweep
+from budget import MiningBudget
+from constraint import ItemConstraint
+from frozen import FrozenModel
+from support_cache import SupportCache
+from taxonomy import Taxonomy
 
 def frequent_itemset_compare(ground_truth, target):
     for f_itemset in target:
@@ -12,30 +32,658 @@ def association_rule_compare(ground_truth, target):
     for rule in target:
         assert rule in ground_truth, 'association rule is not the same.'
 
-data_path = os.path.dirname(os.path.abspath(__file__)) + '/data'
-data_name = '/example.json'
-
-f = open(data_path + data_name, 'r')
-transactions = json.loads(f.read())
-f.close()
-
-min_sup = 0.4
-min_cof = 0.5
-
-bf = brutal_force.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof)
-ap = apriori.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof)
-fp = fp_growth.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof)
-
-print('brutal force versus apriori')
-frequent_itemset_compare(bf.frequent_itemset(), ap.frequent_itemset())
-frequent_itemset_compare(ap.frequent_itemset(), bf.frequent_itemset())
-association_rule_compare(bf.association_rules(), ap.association_rules())
-association_rule_compare(ap.association_rules(), bf.association_rules())
-print('same')
-
-print('brutal force versus fp-growth')
-frequent_itemset_compare(bf.frequent_itemset(), fp.frequent_itemset())
-frequent_itemset_compare(fp.frequent_itemset(), bf.frequent_itemset())
-association_rule_compare(bf.association_rules(), fp.association_rules())
-association_rule_compare(fp.association_rules(), bf.association_rules())
-print('same')
+def sorted_itemsets(itemsets):
+    return [sorted(itemset) for itemset in itemsets]
+
+def sorted_rules(rules):
+    return [{'condition': sorted(rule['condition']), 'prediction': sorted(rule['prediction'])}
+            for rule in rules]
+
+class CountedBudget(MiningBudget):
+    """Budget exceeded after given number of checks, to stop mining at a fixed point."""
+
+    def __init__(self, n_checks):
+        super().__init__()
+        self.n_checks = n_checks
+        self.n_calls = 0
+
+    def exceeded(self):
+        self.n_calls = self.n_calls + 1
+        self.n_checks = self.n_checks - 1
+        return self.n_checks < 0
+
+# Worker processes of parallel engines may re-import this module (spawn and forkserver start methods),
+# so tests only run in main process.
+if __name__ == '__main__':
+    data_path = os.path.dirname(os.path.abspath(__file__)) + '/data'
+    data_name = '/example.json'
+
+    f = open(data_path + data_name, 'r')
+    transactions = json.loads(f.read())
+    f.close()
+
+    min_sup = 0.4
+    min_cof = 0.5
+
+    bf = brutal_force.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof)
+    ap = apriori.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof)
+    fp = fp_growth.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof)
+
+    print('brutal force versus apriori')
+    frequent_itemset_compare(bf.frequent_itemset(), ap.frequent_itemset())
+    frequent_itemset_compare(ap.frequent_itemset(), bf.frequent_itemset())
+    association_rule_compare(bf.association_rules(), ap.association_rules())
+    association_rule_compare(ap.association_rules(), bf.association_rules())
+    print('same')
+
+    print('brutal force versus fp-growth')
+    frequent_itemset_compare(bf.frequent_itemset(), fp.frequent_itemset())
+    frequent_itemset_compare(fp.frequent_itemset(), bf.frequent_itemset())
+    association_rule_compare(bf.association_rules(), fp.association_rules())
+    association_rule_compare(fp.association_rules(), bf.association_rules())
+    print('same')
+
+    print('brutal force versus sliding window')
+    sw = sliding_window.AssociationRuleMining(min_sup=min_sup, min_cof=min_cof, window_size=3)
+    for transaction in transactions:
+        sw.push(transaction)
+    bf_window = brutal_force.AssociationRuleMining(transactions=transactions[-3:], min_sup=min_sup, min_cof=min_cof)
+    frequent_itemset_compare(sorted_itemsets(bf_window.frequent_itemset()),
+                             sorted_itemsets(sw.frequent_itemset()))
+    frequent_itemset_compare(sorted_itemsets(sw.frequent_itemset()),
+                             sorted_itemsets(bf_window.frequent_itemset()))
+    association_rule_compare(sorted_rules(bf_window.association_rules()),
+                             sorted_rules(sw.association_rules()))
+    association_rule_compare(sorted_rules(sw.association_rules()),
+                             sorted_rules(bf_window.association_rules()))
+
+    # Queries between pushes see the current window, after expired items are forgotten.
+    sw = sliding_window.AssociationRuleMining(min_sup=min_sup, min_cof=min_cof, window_size=2)
+    stream = transactions + [['unique item']] * 2 + transactions
+    for i, transaction in enumerate(stream):
+        sw.push(transaction)
+        bf_window = brutal_force.AssociationRuleMining(transactions=stream[max(0, i-1):i+1],
+                                                       min_sup=min_sup, min_cof=min_cof)
+        assert sorted(map(sorted, sw.frequent_itemset())) == sorted(map(sorted, bf_window.frequent_itemset())), \
+            'frequent itemset is not the same.'
+        for f_itemset in bf_window.frequent_itemset():
+            assert sw.support_count(f_itemset) == bf_window.support_count(f_itemset), \
+                'support count is not the same.'
+
+    # Frequent itemsets are kept current incrementally over a longer stream,
+    # and support counts of others in cache given by caller are kept.
+    support_cache = SupportCache()
+    support_cache.put(('not', 'this', 'window'), 1, pin=True)
+    sw = sliding_window.AssociationRuleMining(min_sup=min_sup, min_cof=min_cof, max_k=3, window_size=5,
+                                              support_cache=support_cache)
+    stream = [transaction[i:] + transaction[:i] for i in range(4) for transaction in transactions]
+    for i, transaction in enumerate(stream):
+        sw.push(transaction[:len(transaction) - i % 3])
+        bf_window = brutal_force.AssociationRuleMining(
+            transactions=[t[:len(t) - j % 3] for j, t in enumerate(stream) if i - 5 < j <= i],
+            min_sup=min_sup, min_cof=min_cof, max_k=3)
+        frequent_itemset_compare(sorted_itemsets(bf_window.frequent_itemset()),
+                                 sorted_itemsets(sw.frequent_itemset()))
+        frequent_itemset_compare(sorted_itemsets(sw.frequent_itemset()),
+                                 sorted_itemsets(bf_window.frequent_itemset()))
+        association_rule_compare(sorted_rules(bf_window.association_rules()),
+                                 sorted_rules(sw.association_rules()))
+        for f_itemset in bf_window.frequent_itemset():
+            assert sw.support_count(f_itemset) == bf_window.support_count(f_itemset), \
+                'support count is not the same.'
+        assert support_cache.get(('not', 'this', 'window')) == 1, \
+            'support counts of others should be kept.'
+    print('same')
+
+    print('brutal force versus apriori with lossy counting')
+    ap_lossy = apriori.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                             epsilon=0.1)
+    frequent_itemset_compare(sorted_itemsets(bf.frequent_itemset()),
+                             sorted_itemsets(ap_lossy.frequent_itemset()))
+    frequent_itemset_compare(sorted_itemsets(ap_lossy.frequent_itemset()),
+                             sorted_itemsets(bf.frequent_itemset()))
+    association_rule_compare(sorted_rules(bf.association_rules()),
+                             sorted_rules(ap_lossy.association_rules()))
+    association_rule_compare(sorted_rules(ap_lossy.association_rules()),
+                             sorted_rules(bf.association_rules()))
+    print('same')
+
+    print('apriori with unverified lossy counting reports exact support counts')
+    # Longer stream, so lossy counting prunes counts between buckets.
+    lossy_transactions = [[item for j, item in enumerate('abcdefg') if i * (j + 3) % (j + 2) == 0] or ['a']
+                          for i in range(60)]
+    ap_unverified = apriori.AssociationRuleMining(transactions=lossy_transactions, min_sup=0.2, min_cof=min_cof,
+                                                  epsilon=0.1, verify=False)
+    bf_lossy = brutal_force.AssociationRuleMining(transactions=lossy_transactions, min_sup=0.2, min_cof=min_cof)
+    for itemset in ap_unverified.frequent_itemset():
+        assert ap_unverified.support_count(itemset) == bf_lossy.support_count(itemset), \
+            'Approximate support count of {} is cached.'.format(itemset)
+    print('same')
+
+    print('brutal force versus parallel fp-growth')
+    fp_parallel = fp_growth.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                                  n_jobs=2)
+    frequent_itemset_compare(sorted_itemsets(bf.frequent_itemset()),
+                             sorted_itemsets(fp_parallel.frequent_itemset()))
+    frequent_itemset_compare(sorted_itemsets(fp_parallel.frequent_itemset()),
+                             sorted_itemsets(bf.frequent_itemset()))
+    association_rule_compare(sorted_rules(bf.association_rules()),
+                             sorted_rules(fp_parallel.association_rules()))
+    association_rule_compare(sorted_rules(fp_parallel.association_rules()),
+                             sorted_rules(bf.association_rules()))
+    print('same')
+
+    print('brutal force versus parallel eclat')
+    ec_parallel = eclat.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                              n_jobs=2)
+    frequent_itemset_compare(sorted_itemsets(bf.frequent_itemset()),
+                             sorted_itemsets(ec_parallel.frequent_itemset()))
+    frequent_itemset_compare(sorted_itemsets(ec_parallel.frequent_itemset()),
+                             sorted_itemsets(bf.frequent_itemset()))
+    association_rule_compare(sorted_rules(bf.association_rules()),
+                             sorted_rules(ec_parallel.association_rules()))
+    association_rule_compare(sorted_rules(ec_parallel.association_rules()),
+                             sorted_rules(bf.association_rules()))
+    print('same')
+
+    print('brutal force versus eclat')
+    ec = eclat.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof)
+    frequent_itemset_compare(sorted_itemsets(bf.frequent_itemset()),
+                             sorted_itemsets(ec.frequent_itemset()))
+    frequent_itemset_compare(sorted_itemsets(ec.frequent_itemset()),
+                             sorted_itemsets(bf.frequent_itemset()))
+    association_rule_compare(sorted_rules(bf.association_rules()),
+                             sorted_rules(ec.association_rules()))
+    association_rule_compare(sorted_rules(ec.association_rules()),
+                             sorted_rules(bf.association_rules()))
+    print('same')
+
+    print('brutal force versus automatic engine selection')
+    for engine in [None] + list(auto.ENGINES):
+        am = auto.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                        engine=engine)
+        frequent_itemset_compare(sorted_itemsets(bf.frequent_itemset()),
+                                 sorted_itemsets(am.frequent_itemset()))
+        frequent_itemset_compare(sorted_itemsets(am.frequent_itemset()),
+                                 sorted_itemsets(bf.frequent_itemset()))
+        association_rule_compare(sorted_rules(bf.association_rules()),
+                                 sorted_rules(am.association_rules()))
+        association_rule_compare(sorted_rules(am.association_rules()),
+                                 sorted_rules(bf.association_rules()))
+    print('same')
+
+    print('filtered brutal force versus constrained engines')
+    constraints = [
+        ItemConstraint(required_items=['c'], excluded_items=['p'], min_k=2),
+        ItemConstraint(condition_items=['f', 'c', 'a'], prediction_items=['m']),
+    ]
+    for ic in constraints:
+        filtered_itemsets = [f_itemset for f_itemset in bf.frequent_itemset() if ic.satisfy(f_itemset)]
+        filtered_rules = [rule for rule in bf.association_rules()
+                          if ic.satisfy(rule['condition'] + rule['prediction'])
+                          and ic.allow_rule(rule['condition'], rule['prediction'])]
+        sw = sliding_window.AssociationRuleMining(min_sup=min_sup, min_cof=min_cof,
+                                                  window_size=len(transactions), constraint=ic)
+        for transaction in transactions:
+            sw.push(transaction)
+        engines = [sw] + [auto.AssociationRuleMining(transactions=transactions, min_sup=min_sup,
+                                                     min_cof=min_cof, engine=engine, constraint=ic)
+                          for engine in auto.ENGINES]
+        engines.append(fp_growth.AssociationRuleMining(transactions=transactions, min_sup=min_sup,
+                                                       min_cof=min_cof, n_jobs=2, constraint=ic))
+        engines.append(eclat.AssociationRuleMining(transactions=transactions, min_sup=min_sup,
+                                                   min_cof=min_cof, n_jobs=2, constraint=ic))
+        engines.append(apriori.AssociationRuleMining(transactions=transactions, min_sup=min_sup,
+                                                     min_cof=min_cof, epsilon=0.1, constraint=ic))
+        for engine in engines:
+            frequent_itemset_compare(sorted_itemsets(filtered_itemsets),
+                                     sorted_itemsets(engine.frequent_itemset()))
+            frequent_itemset_compare(sorted_itemsets(engine.frequent_itemset()),
+                                     sorted_itemsets(filtered_itemsets))
+            association_rule_compare(sorted_rules(filtered_rules),
+                                     sorted_rules(engine.association_rules()))
+            association_rule_compare(sorted_rules(engine.association_rules()),
+                                     sorted_rules(filtered_rules))
+            for f_itemset in engine.frequent_itemset():
+                assert engine.support_count(f_itemset) == bf.support_count(f_itemset), \
+                    'support count is not the same.'
+    print('same')
+
+    print('brutal force rules versus bulk measures and minimum lift')
+    min_lift = 1.2
+    for engine in auto.ENGINES:
+        am = auto.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                        engine=engine, min_lift=min_lift)
+        lifted_rules = []
+        for rule in bf.association_rules():
+            lift = (bf.confidence(rule['condition'], rule['prediction'])
+                    / bf.support(rule['prediction']))
+            if lift >= min_lift:
+                lifted_rules.append(rule)
+        association_rule_compare(sorted_rules(lifted_rules),
+                                 sorted_rules(am.association_rules()))
+        association_rule_compare(sorted_rules(am.association_rules()),
+                                 sorted_rules(lifted_rules))
+        for rule in am.association_rules(measures=True):
+            assert abs(rule['confidence']
+                       - bf.confidence(rule['condition'], rule['prediction'])) < 1e-9, \
+                'confidence is not the same.'
+            assert abs(rule['support']
+                       - bf.support(rule['condition'] + rule['prediction'])) < 1e-9, \
+                'support is not the same.'
+            assert abs(rule['lift'] * bf.support(rule['prediction'])
+                       - rule['confidence']) < 1e-9, \
+                'lift is not the same.'
+    print('same')
+
+    print('brutal force versus engines with bounded support cache')
+    max_size = 5
+    for engine in auto.ENGINES:
+        am = auto.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                        engine=engine, support_cache=SupportCache(max_size=max_size))
+        frequent_itemset_compare(sorted_itemsets(bf.frequent_itemset()),
+                                 sorted_itemsets(am.frequent_itemset()))
+        frequent_itemset_compare(sorted_itemsets(am.frequent_itemset()),
+                                 sorted_itemsets(bf.frequent_itemset()))
+        association_rule_compare(sorted_rules(bf.association_rules()),
+                                 sorted_rules(am.association_rules()))
+        association_rule_compare(sorted_rules(am.association_rules()),
+                                 sorted_rules(bf.association_rules()))
+        for item in ['a', 'b', 'c', 'z']:
+            assert am.support_count([item, 'f']) == bf.support_count([item, 'f']), \
+                'support count is not the same.'
+        n_entries = am.support_cache_stats()['n_entries']
+        for i in range(100):
+            assert am.support_count(['a', 'unseen-%d' % i]) == 0, \
+                'support count of unseen item should be 0.'
+        stats = am.support_cache_stats()
+        assert stats['n_entries'] == n_entries, \
+            'itemset with unseen item should not be cached.'
+        assert stats['n_entries'] <= max(max_size, stats['n_pinned']), \
+            'support cache is not bounded.'
+        assert stats['n_pinned'] == len(am.frequent_itemset()), \
+            'support counts of frequent itemsets should be pinned.'
+    print('same')
+
+    print('brutal force versus frozen models')
+    frozen_bf = bf.freeze()
+    for engine in auto.ENGINES:
+        fm = auto.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                        engine=engine).freeze()
+        frequent_itemset_compare(sorted_itemsets(bf.frequent_itemset()),
+                                 sorted_itemsets(fm.frequent_itemset()))
+        frequent_itemset_compare(sorted_itemsets(fm.frequent_itemset()),
+                                 sorted_itemsets(bf.frequent_itemset()))
+        association_rule_compare(sorted_rules(bf.association_rules()),
+                                 sorted_rules(fm.association_rules()))
+        association_rule_compare(sorted_rules(fm.association_rules()),
+                                 sorted_rules(bf.association_rules()))
+        for f_itemset in bf.frequent_itemset():
+            assert fm.support_count(f_itemset) == bf.support_count(f_itemset), \
+                'support count is not the same.'
+        assert fm.support_count(['unknown item']) == 0, 'unknown item should have zero support.'
+        assert fm.vocabulary() == frozen_bf.vocabulary(), 'vocabulary is not the same.'
+
+        # Conditions and predictions filtered out by constraint keep their counts.
+        ic = ItemConstraint(required_items=['c'], min_k=2)
+        fm = auto.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                        engine=engine, constraint=ic).freeze()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            fm.save(os.path.join(tmp_dir, 'model.bin'))
+            loaded = FrozenModel.load(os.path.join(tmp_dir, 'model.bin'))
+            for model in [fm, loaded]:
+                assert model.association_rules(), 'constrained frozen model has no rule.'
+                for rule in model.association_rules():
+                    assert model.confidence(rule['condition'], rule['prediction']) \
+                        == bf.confidence(rule['condition'], rule['prediction']), \
+                        'confidence is not the same.'
+            del loaded, model
+    print('same')
+
+    print('frozen model versus saved and loaded frozen model')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = os.path.join(tmp_dir, 'model.bin')
+        frozen_bf.save(model_path)
+        loaded = FrozenModel.load(model_path)
+        assert loaded.frequent_itemset() == frozen_bf.frequent_itemset(), \
+            'frequent itemset is not the same.'
+        assert loaded.association_rules(measures=True) == frozen_bf.association_rules(measures=True), \
+            'association rule is not the same.'
+        for f_itemset in bf.frequent_itemset():
+            assert loaded.support_count(f_itemset) == bf.support_count(f_itemset), \
+                'support count is not the same.'
+        del loaded
+    print('same')
+
+    print('decoded itemsets versus encoded result views')
+    for engine in auto.ENGINES:
+        am = auto.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                        engine=engine)
+        view = am.frequent_itemset()
+        item_encoder = view.item_encoder()
+        assert [item_encoder.decode_to_string_list(item_ids) for item_ids in view.encoded()] == view, \
+            'encoded itemsets are not the same.'
+        frequent_itemset_compare(sorted_itemsets(bf.frequent_itemset()), sorted_itemsets(view))
+        view[0].append('unknown item')
+        assert 'unknown item' not in view[0] and len(view) == len(bf.frequent_itemset()), \
+            'view should be read-only.'
+        assert view[:1] + am.frequent_k_itemset(1) == [view[0]] + list(am.frequent_k_itemset(1)), \
+            'sliced view is not the same.'
+    print('same')
+
+    print('brutal force versus frequent itemset tries')
+    bf_counts = {frozenset(f_itemset): bf.support_count(f_itemset) for f_itemset in bf.frequent_itemset()}
+    query_items = sorted({item for f_itemset in bf.frequent_itemset() for item in f_itemset})
+    queries = [[], ['unknown item']] + [[item] for item in query_items] + \
+              [query_items[i:i+3] for i in range(len(query_items))]
+    tries = [auto.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                        engine=engine).trie()
+             for engine in auto.ENGINES]
+    tries.append(frozen_bf.trie())
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = os.path.join(tmp_dir, 'model.bin')
+        frozen_bf.save(model_path)
+        tries.append(FrozenModel.load(model_path).trie())
+        for trie in tries:
+            assert len(trie) == len(bf_counts), 'number of frequent itemsets is not the same.'
+            for query in queries:
+                assert trie.support_count(query) == bf_counts.get(frozenset(query), 0), \
+                    'support count is not the same.'
+                for found, expected in [(trie.subsets(query),
+                                         [itemset for itemset in bf_counts if itemset <= set(query)]),
+                                        (trie.supersets(query),
+                                         [itemset for itemset in bf_counts if itemset >= set(query)])]:
+                    assert sorted(map(sorted, expected)) == sorted(sorted(itemset) for itemset, _ in found), \
+                        'subsets or supersets are not the same.'
+                    for itemset, count in found:
+                        assert count == bf_counts[frozenset(itemset)], 'support count is not the same.'
+        del tries
+    print('same')
+
+    print('brutal force versus threshold sweep')
+    min_sups = [min_sup, min_sup + 0.1, min_sup + 0.2]
+    min_cofs = [min_cof, min_cof + 0.2]
+    ts = sweep.ThresholdSweep(transactions=transactions, min_sups=min_sups, min_cofs=min_cofs)
+    for point in ts.curve():
+        bf_point = brutal_force.AssociationRuleMining(transactions=transactions,
+                                                      min_sup=point['min_sup'],
+                                                      min_cof=point['min_cof'])
+        frequent_itemset_compare(sorted_itemsets(bf_point.frequent_itemset()),
+                                 sorted_itemsets(ts.frequent_itemset(point['min_sup'])))
+        frequent_itemset_compare(sorted_itemsets(ts.frequent_itemset(point['min_sup'])),
+                                 sorted_itemsets(bf_point.frequent_itemset()))
+        association_rule_compare(sorted_rules(bf_point.association_rules()),
+                                 sorted_rules(ts.association_rules(point['min_sup'], point['min_cof'])))
+        association_rule_compare(sorted_rules(ts.association_rules(point['min_sup'], point['min_cof'])),
+                                 sorted_rules(bf_point.association_rules()))
+        assert point['n_frequent_itemsets'] == len(bf_point.frequent_itemset()), \
+            'number of frequent itemsets is not the same.'
+        assert point['n_association_rules'] == len(bf_point.association_rules()), \
+            'number of association rules is not the same.'
+    print('same')
+
+    print('brutal force versus budgeted and resumed engines')
+    for engine_class, kwargs in [(apriori.AssociationRuleMining, {}),
+                                 (apriori.AssociationRuleMining, {'epsilon': 0.1}),
+                                 (fp_growth.AssociationRuleMining, {}),
+                                 (fp_growth.AssociationRuleMining, {'n_jobs': 2})]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            checkpoint_path = os.path.join(tmp_dir, 'checkpoint.jsonl')
+            stopped = engine_class(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                   budget=MiningBudget(time_limit=0), checkpoint=checkpoint_path,
+                                   **kwargs)
+            assert stopped.frequent_itemset() == [] and stopped.is_partial(), \
+                'mining should stop when budget is exceeded.'
+            for _ in range(2):
+                resumed = engine_class(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                       checkpoint=checkpoint_path, **kwargs)
+                frequent_itemset_compare(sorted_itemsets(bf.frequent_itemset()),
+                                         sorted_itemsets(resumed.frequent_itemset()))
+                frequent_itemset_compare(sorted_itemsets(resumed.frequent_itemset()),
+                                         sorted_itemsets(bf.frequent_itemset()))
+                association_rule_compare(sorted_rules(bf.association_rules()),
+                                         sorted_rules(resumed.association_rules()))
+                association_rule_compare(sorted_rules(resumed.association_rules()),
+                                         sorted_rules(bf.association_rules()))
+                assert not resumed.is_partial(), 'mining should not be partial.'
+                for f_itemset in bf.frequent_itemset():
+                    assert resumed.support_count(f_itemset) == bf.support_count(f_itemset), \
+                        'support count is not the same.'
+    print('same')
+
+    print('brutal force versus fp-growth stopped in the middle of mining')
+    # Count checks of full mining with a budget which is never exceeded.
+    never_exceeded = CountedBudget(float('inf'))
+    fp_growth.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                    budget=never_exceeded).frequent_itemset()
+    for n_checks in range(1, never_exceeded.n_calls, 4):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            checkpoint_path = os.path.join(tmp_dir, 'checkpoint.jsonl')
+            stopped = fp_growth.AssociationRuleMining(transactions=transactions, min_sup=min_sup,
+                                                      min_cof=min_cof,
+                                                      budget=CountedBudget(n_checks),
+                                                      checkpoint=checkpoint_path)
+            frequent_itemset_compare(sorted_itemsets(bf.frequent_itemset()),
+                                     sorted_itemsets(stopped.frequent_itemset()))
+            assert stopped.is_partial(), 'mining should stop when budget is exceeded.'
+            for f_itemset in stopped.frequent_itemset():
+                assert stopped.support_count(f_itemset) == bf.support_count(f_itemset), \
+                    'support count is not the same.'
+            resumed = fp_growth.AssociationRuleMining(transactions=transactions, min_sup=min_sup,
+                                                      min_cof=min_cof, checkpoint=checkpoint_path)
+            frequent_itemset_compare(sorted_itemsets(resumed.frequent_itemset()),
+                                     sorted_itemsets(bf.frequent_itemset()))
+            assert len(resumed.frequent_itemset()) == len(bf.frequent_itemset()), \
+                'number of frequent itemsets is not the same.'
+    print('same')
+
+    print('fp-growth versus out-of-core projected databases')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        transaction_path = os.path.join(tmp_dir, 'transactions.jsonl')
+        with open(transaction_path, 'w') as f:
+            for transaction in transactions:
+                f.write(json.dumps(transaction) + '\n')
+        for ic in [None] + constraints:
+            fp = fp_growth.AssociationRuleMining(transactions=transactions, min_sup=min_sup,
+                                                 min_cof=min_cof, constraint=ic)
+            oc = out_of_core.AssociationRuleMining(transactions=out_of_core.TransactionFile(transaction_path),
+                                                   min_sup=min_sup, min_cof=min_cof, constraint=ic,
+                                                   tmp_dir=tmp_dir, max_buffer_bytes=1024)
+            frequent_itemset_compare(sorted_itemsets(fp.frequent_itemset()),
+                                     sorted_itemsets(oc.frequent_itemset()))
+            frequent_itemset_compare(sorted_itemsets(oc.frequent_itemset()),
+                                     sorted_itemsets(fp.frequent_itemset()))
+            association_rule_compare(sorted_rules(fp.association_rules()),
+                                     sorted_rules(oc.association_rules()))
+            association_rule_compare(sorted_rules(oc.association_rules()),
+                                     sorted_rules(fp.association_rules()))
+            for f_itemset in fp.frequent_itemset():
+                assert oc.support_count(f_itemset) == fp.support_count(f_itemset), \
+                    'support count is not the same.'
+        assert os.listdir(tmp_dir) == ['transactions.jsonl'], 'partition files are not removed.'
+    print('same')
+
+    print('brutal force versus command line output')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        transaction_path = os.path.join(tmp_dir, 'transactions.txt')
+        with open(transaction_path, 'w') as f:
+            for transaction in transactions:
+                f.write(' '.join(transaction) + '\n')
+        for engine in cli.ENGINES:
+            output_path = os.path.join(tmp_dir, 'output.jsonl')
+            summary = cli.main([transaction_path, '--engine', engine,
+                                '--min-sup', str(min_sup), '--min-cof', str(min_cof),
+                                '--output', output_path])
+            with open(output_path, 'r') as f:
+                records = [json.loads(line) for line in f]
+            itemsets = [record['items'] for record in records if record['type'] == 'itemset']
+            rules = [record for record in records if record['type'] == 'rule']
+            frequent_itemset_compare(sorted_itemsets(bf.frequent_itemset()), sorted_itemsets(itemsets))
+            frequent_itemset_compare(sorted_itemsets(itemsets), sorted_itemsets(bf.frequent_itemset()))
+            association_rule_compare(sorted_rules(bf.association_rules()), sorted_rules(rules))
+            association_rule_compare(sorted_rules(rules), sorted_rules(bf.association_rules()))
+            assert summary['n_frequent_itemsets'] == len(itemsets), 'summary is not the same.'
+            assert summary['n_association_rules'] == len(rules), 'summary is not the same.'
+            for rule in rules:
+                assert rule['support_count'] == bf.support_count(rule['condition'] + rule['prediction']), \
+                    'support count is not the same.'
+
+        # Rules streamed in small batches are the same as rules listed at once.
+        for engine in auto.ENGINES:
+            am = auto.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                            engine=engine)
+            assert sorted(map(str, am.iter_association_rules(batch_size=3))) \
+                == sorted(map(str, am.association_rules(measures=True))), \
+                'streamed association rules are not the same.'
+
+        output_path = os.path.join(tmp_dir, 'output.csv')
+        cli.main([transaction_path, '--min-sup', str(min_sup), '--min-cof', str(min_cof),
+                  '--output', output_path, '--output-format', 'csv'])
+        with open(output_path, 'r', newline='') as f:
+            records = list(csv.DictReader(f))
+        assert len(records) == len(bf.frequent_itemset()) + len(bf.association_rules()), \
+            'number of csv records is not the same.'
+        for record in records:
+            items = (record['items'] if record['type'] == 'itemset'
+                     else record['condition'] + ' ' + record['prediction']).split()
+            assert int(record['support_count']) == bf.support_count(items), \
+                'support count is not the same.'
+    print('same')
+
+    print('brutal force on extended transactions versus taxonomy-aware apriori')
+    taxonomy = Taxonomy({'a': 'x', 'c': 'x', 'm': ['x', 'y'], 'b': 'y', 'x': 'z', 'y': 'z'})
+    extended_transactions = [transaction + sorted(set().union(*map(taxonomy.ancestors, transaction)))
+                             for transaction in transactions]
+    bf_extended = brutal_force.AssociationRuleMining(transactions=extended_transactions,
+                                                     min_sup=min_sup, min_cof=min_cof)
+    bf_itemsets = [f_itemset for f_itemset in bf_extended.frequent_itemset()
+                   if not taxonomy.contain_ancestor(f_itemset)]
+    bf_rules = [rule for rule in bf_extended.association_rules()
+                if not taxonomy.contain_ancestor(rule['condition'] + rule['prediction'])]
+    for am in [apriori.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                             taxonomy=taxonomy),
+               apriori.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                             taxonomy=taxonomy, epsilon=0.1),
+               auto.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof,
+                                          taxonomy=taxonomy)]:
+        frequent_itemset_compare(sorted_itemsets(bf_itemsets), sorted_itemsets(am.frequent_itemset()))
+        frequent_itemset_compare(sorted_itemsets(am.frequent_itemset()), sorted_itemsets(bf_itemsets))
+        association_rule_compare(sorted_rules(bf_rules), sorted_rules(am.association_rules()))
+        association_rule_compare(sorted_rules(am.association_rules()), sorted_rules(bf_rules))
+        for f_itemset in bf_extended.frequent_itemset():
+            assert am.support_count(f_itemset) == bf_extended.support_count(f_itemset), \
+                'support count is not the same.'
+    print('same')
+
+    print('brutal force versus prefixspan on single transaction sequences')
+    with open(data_path + '/IBM.json', 'r') as f:
+        ibm_transactions = json.loads(f.read())
+    bf_ibm = brutal_force.AssociationRuleMining(transactions=ibm_transactions, min_sup=0.2, min_cof=0.5)
+    ps = prefix_span.SequentialPatternMining(sequences=prefix_span.SequenceFile(data_path + '/IBM.txt'),
+                                             min_sup=0.2, min_cof=0.5)
+    assert all(len(f_sequence) == 1 for f_sequence in ps.frequent_sequence()), \
+        'frequent sequence is not the same.'
+    ps_itemsets = [f_sequence[0] for f_sequence in ps.frequent_sequence()]
+    frequent_itemset_compare(sorted_itemsets(bf_ibm.frequent_itemset()), sorted_itemsets(ps_itemsets))
+    frequent_itemset_compare(sorted_itemsets(ps_itemsets), sorted_itemsets(bf_ibm.frequent_itemset()))
+    for f_itemset in bf_ibm.frequent_itemset():
+        assert ps.support_count([f_itemset]) == bf_ibm.support_count(f_itemset), \
+            'support count is not the same.'
+    assert ps.sequential_rules() == [], 'sequential rule is not the same.'
+    print('same')
+
+    print('rule loop versus batch associative classifier')
+    records = [[item for item in transaction if item != '1'] for transaction in ibm_transactions]
+    labels = ['1' if '1' in transaction else 'not 1' for transaction in ibm_transactions]
+    ac = cba.AssociativeClassifier(transactions=records, labels=labels, min_sup=0.1, min_cof=0.5)
+    max_match_bytes = cba.AssociativeClassifier.MAX_MATCH_BYTES
+    cba.AssociativeClassifier.MAX_MATCH_BYTES = 64
+    unseen_records = records + [['unseen'], []]
+    loop_predictions = []
+    for record in unseen_records:
+        loop_predictions.append(ac.default_label())
+        for rule in ac.rules():
+            if all(item in record for item in rule['condition']):
+                loop_predictions[-1] = rule['prediction'][0]
+                break
+    assert ac.predict(unseen_records) == loop_predictions, 'prediction is not the same.'
+    cba.AssociativeClassifier.MAX_MATCH_BYTES = max_match_bytes
+    print('same')
+
+    print('apriori versus count distribution over socket workers')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        addresses = [os.path.join(tmp_dir, 'worker{}.sock'.format(i)) for i in range(2)]
+        processes = [multiprocessing.Process(target=distributed.serve, args=(transactions[i::2], address))
+                     for i, address in enumerate(addresses)]
+        for process in processes:
+            process.start()
+        dm = distributed.AssociationRuleMining(workers=addresses, min_sup=min_sup, min_cof=min_cof)
+        ap = apriori.AssociationRuleMining(transactions=transactions, min_sup=min_sup, min_cof=min_cof)
+        frequent_itemset_compare(sorted_itemsets(ap.frequent_itemset()),
+                                 sorted_itemsets(dm.frequent_itemset()))
+        frequent_itemset_compare(sorted_itemsets(dm.frequent_itemset()),
+                                 sorted_itemsets(ap.frequent_itemset()))
+        association_rule_compare(ap.association_rules(measures=True), dm.association_rules(measures=True))
+        association_rule_compare(dm.association_rules(measures=True), ap.association_rules(measures=True))
+        for f_itemset in ap.frequent_itemset() + [['a', 'unseen']]:
+            assert dm.support_count(f_itemset) == ap.support_count(f_itemset), \
+                'support count is not the same.'
+        dm.close(shutdown=True)
+        for process in processes:
+            process.join()
+    print('same')
+
+    print('brutal force versus engines on ingested gzip shards')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        shard_paths = []
+        for i in range(3):
+            shard_paths.append(os.path.join(tmp_dir, 'shard{}.txt.gz'.format(i)))
+            with gzip.open(shard_paths[-1], 'wt') as f:
+                for transaction in transactions[i::3]:
+                    f.write(' '.join(transaction) + '\n')
+        ingested = ingest.ingest(shard_paths, n_jobs=2, chunk_size=1, max_queue_chunks=1)
+        assert sorted(map(sorted, ingested)) == sorted(map(sorted, transactions)), \
+            'ingested transactions are not the same.'
+        for engine in [None] + list(auto.ENGINES):
+            am = auto.AssociationRuleMining(transactions=ingested, min_sup=min_sup, min_cof=min_cof,
+                                            engine=engine)
+            frequent_itemset_compare(sorted_itemsets(bf.frequent_itemset()),
+                                     sorted_itemsets(am.frequent_itemset()))
+            frequent_itemset_compare(sorted_itemsets(am.frequent_itemset()),
+                                     sorted_itemsets(bf.frequent_itemset()))
+            association_rule_compare(sorted_rules(bf.association_rules()),
+                                     sorted_rules(am.association_rules()))
+            association_rule_compare(sorted_rules(am.association_rules()),
+                                     sorted_rules(bf.association_rules()))
+        try:
+            ingest.ingest(shard_paths + [os.path.join(tmp_dir, 'missing.txt')])
+            assert False, 'missing shard should not be ingested.'
+        except ValueError:
+            pass
+    print('same')
+
+    print('filtered brutal force versus on-demand item queries')
+    for max_trees in [None, 1]:
+        iq = item_query.ItemQuery(transactions=transactions, min_sup=min_sup, max_trees=max_trees)
+        query_items = sorted({item for transaction in transactions for item in transaction})
+        targets = [[item] for item in query_items] + [query_items[i:i+2] for i in range(len(query_items))]
+        for target in targets + targets:
+            filtered_itemsets = [f_itemset for f_itemset in bf.frequent_itemset()
+                                 if set(target) <= set(f_itemset)]
+            filtered_rules = [rule for rule in bf.association_rules()
+                              if set(target) <= set(rule['condition'])]
+            frequent_itemset_compare(sorted_itemsets(filtered_itemsets),
+                                     sorted_itemsets(iq.frequent_itemset(target)))
+            frequent_itemset_compare(sorted_itemsets(iq.frequent_itemset(target)),
+                                     sorted_itemsets(filtered_itemsets))
+            association_rule_compare(sorted_rules(filtered_rules),
+                                     sorted_rules(iq.association_rules(target, min_cof=min_cof)))
+            association_rule_compare(sorted_rules(iq.association_rules(target, min_cof=min_cof)),
+                                     sorted_rules(filtered_rules))
+            for f_itemset in filtered_itemsets:
+                assert iq.support_count(f_itemset) == bf.support_count(f_itemset), \
+                    'support count is not the same.'
+        stats = iq.tree_cache_stats()
+        assert stats['hits'] > 0 and stats['n_entries'] <= (max_trees or len(targets)), \
+            'conditional tree cache is not used.'
+    print('same')